@@ -8,9 +8,10 @@ branch_labels = None
 depends_on = None
 
 def upgrade() -> None:
+    # в SQLite автоинкремент есть только у INTEGER PRIMARY KEY — отсюда with_variant у id
     op.create_table(
         "users",
-        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True),
         sa.Column("email", sa.String(320), unique=True, nullable=False),
         sa.Column("password_hash", sa.String(255), nullable=False),
         sa.Column("locale", sa.String(8), nullable=False, server_default="ru"),
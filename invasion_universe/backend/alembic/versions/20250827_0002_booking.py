@@ -10,7 +10,7 @@ depends_on = None
 def upgrade() -> None:
     op.create_table(
         "zones",
-        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True),
         sa.Column("name", sa.String(120), nullable=False),
         sa.Column("code", sa.String(64), nullable=False, unique=True),
         sa.Column("is_active", sa.Boolean, nullable=False, server_default=sa.text("true"))
@@ -19,7 +19,7 @@ def upgrade() -> None:
 
     op.create_table(
         "seats",
-        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True),
         sa.Column("zone_id", sa.BigInteger, sa.ForeignKey("zones.id", ondelete="CASCADE"), nullable=False, index=True),
         sa.Column("label", sa.String(32), nullable=False, index=True),
         sa.Column("seat_type", sa.String(32), nullable=False, server_default="standard"),
@@ -29,7 +29,7 @@ def upgrade() -> None:
 
     op.create_table(
         "bookings",
-        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True),
         sa.Column("user_id", sa.BigInteger, nullable=False, index=True),
         sa.Column("seat_id", sa.BigInteger, sa.ForeignKey("seats.id", ondelete="RESTRICT"), nullable=False, index=True),
         sa.Column("start_time", sa.DateTime(timezone=True), nullable=False, index=True),
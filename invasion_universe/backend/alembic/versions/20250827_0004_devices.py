@@ -10,7 +10,7 @@ depends_on = None
 def upgrade() -> None:
     op.create_table(
         "devices",
-        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True),
         sa.Column("user_id", sa.BigInteger, nullable=False, index=True),
         sa.Column("platform", sa.String(16), nullable=False),
         sa.Column("token", sa.String(512), nullable=False, unique=True),
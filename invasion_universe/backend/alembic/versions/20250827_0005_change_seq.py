@@ -0,0 +1,38 @@
+from __future__ import annotations
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20250827_0005"
+down_revision = "20250827_0004"
+branch_labels = None
+depends_on = None
+
+TABLES = ("zones", "seats", "bookings")
+
+def upgrade() -> None:
+    # последовательность есть только в Postgres; в SQLite номера выдаёт приложение
+    # (app/services/sync.py), существующие строки нумеруем по id подряд через все таблицы
+    bind = op.get_bind()
+    pg = bind.dialect.name == "postgresql"
+    if pg:
+        op.execute("CREATE SEQUENCE IF NOT EXISTS change_seq")
+    offset = 0
+    for t in TABLES:
+        op.add_column(t, sa.Column("change_seq", sa.BigInteger, nullable=True))
+        if pg:
+            op.execute(f"UPDATE {t} SET change_seq = nextval('change_seq')")
+        else:
+            op.execute(f"UPDATE {t} SET change_seq = id + {offset}")
+            offset = bind.execute(sa.text(f"SELECT coalesce(max(change_seq), {offset}) FROM {t}")).scalar()
+        op.create_index(f"ix_{t}_change_seq", t, ["change_seq"])
+    # /sync выбирает брони одного пользователя по возрастанию номера
+    op.create_index("ix_bookings_user_change_seq", "bookings", ["user_id", "change_seq"])
+
+def downgrade() -> None:
+    op.drop_index("ix_bookings_user_change_seq", table_name="bookings")
+    for t in TABLES:
+        op.drop_index(f"ix_{t}_change_seq", table_name=t)
+        with op.batch_alter_table(t) as batch:
+            batch.drop_column("change_seq")
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP SEQUENCE IF EXISTS change_seq")
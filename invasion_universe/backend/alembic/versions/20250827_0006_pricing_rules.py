@@ -0,0 +1,24 @@
+from __future__ import annotations
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20250827_0006"
+down_revision = "20250827_0005"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "pricing_rules",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True),
+        sa.Column("zone_id", sa.BigInteger, sa.ForeignKey("zones.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("seat_type", sa.String(32), nullable=True),
+        sa.Column("weekdays", sa.Integer, nullable=False, server_default="127"),
+        sa.Column("hour_from", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("hour_to", sa.Integer, nullable=False, server_default="24"),
+        sa.Column("multiplier_pct", sa.Integer, nullable=False, server_default="100"),
+        sa.Column("is_active", sa.Boolean, nullable=False, server_default=sa.true()),
+    )
+
+def downgrade() -> None:
+    op.drop_table("pricing_rules")
@@ -0,0 +1,32 @@
+from __future__ import annotations
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20250827_0007"
+down_revision = "20250827_0006"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "waitlist",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True),
+        sa.Column("user_id", sa.BigInteger, nullable=False, index=True),
+        sa.Column("seat_id", sa.BigInteger, sa.ForeignKey("seats.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("zone_id", sa.BigInteger, sa.ForeignKey("zones.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("seat_type", sa.String(32), nullable=True),
+        sa.Column("start_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("end_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("auto_book", sa.Boolean, nullable=False, server_default=sa.false()),
+        sa.Column("status", sa.String(16), nullable=False, server_default="waiting"),
+        sa.Column("booking_id", sa.BigInteger, nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    # в индексе только ждущие: выполненные/отменённые записи поиск не трогает
+    op.create_index("ix_waitlist_seat_start", "waitlist", ["seat_id", "start_time"], postgresql_where=sa.text("status = 'waiting'"))
+    op.create_index("ix_waitlist_zone_start", "waitlist", ["zone_id", "start_time"], postgresql_where=sa.text("status = 'waiting'"))
+
+def downgrade() -> None:
+    op.drop_index("ix_waitlist_zone_start", table_name="waitlist")
+    op.drop_index("ix_waitlist_seat_start", table_name="waitlist")
+    op.drop_table("waitlist")
@@ -0,0 +1,41 @@
+from __future__ import annotations
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20250827_0008"
+down_revision = "20250827_0007"
+branch_labels = None
+depends_on = None
+
+TABLES = ("zones", "seats", "bookings")
+
+def upgrade() -> None:
+    # id записавшей транзакции — курсор /sync в Postgres (app/services/sync.py);
+    # у уже записанных строк 0: их транзакции давно завершены
+    pg = op.get_bind().dialect.name == "postgresql"
+    for t in TABLES:
+        op.add_column(t, sa.Column("change_xid", sa.BigInteger, nullable=True))
+        if pg:
+            op.execute(f"UPDATE {t} SET change_xid = 0")
+        op.create_index(f"ix_{t}_change_xid", t, ["change_xid"])
+    op.create_index("ix_bookings_user_change_xid", "bookings", ["user_id", "change_xid"])
+    # счётчик номеров там, где нет sequence (SQLite); продолжает уже выданные номера
+    op.create_table(
+        "change_seq_counter",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("value", sa.BigInteger, nullable=False, server_default="0"),
+    )
+    if not pg:
+        op.execute(
+            "INSERT INTO change_seq_counter (id, value) SELECT 1, COALESCE(MAX(s), 0) FROM ("
+            + " UNION ALL ".join(f"SELECT MAX(change_seq) AS s FROM {t}" for t in TABLES)
+            + ")"
+        )
+
+def downgrade() -> None:
+    op.drop_table("change_seq_counter")
+    op.drop_index("ix_bookings_user_change_xid", table_name="bookings")
+    for t in TABLES:
+        op.drop_index(f"ix_{t}_change_xid", table_name=t)
+        with op.batch_alter_table(t) as b:
+            b.drop_column("change_xid")
@@ -1,13 +1,19 @@
 from __future__ import annotations
-from fastapi import Depends, HTTPException, Header, status
+from fastapi import Depends, HTTPException, Header, Request, status
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
-from app.db import get_db
+from app.db import get_db, replica_ok, replica_engine, SessionLocal, ReplicaSessionLocal
+from app.utils.replica import recently_wrote
 from app.utils.errors import err
 from app.config import settings
 from app.models.user import User
+from app.utils.flight_recorder import phase
 
 def get_current_user_bearer(authorization: str = Header(...), db: Session = Depends(get_db)) -> User:
+    with phase("auth"):
+        return _current_user(authorization, db)
+
+def _current_user(authorization: str, db: Session) -> User:
     if not authorization.startswith("Bearer "):
         raise err("AUTH_MISSING_BEARER", status.HTTP_401_UNAUTHORIZED)
     token = authorization.split(" ", 1)[1]
@@ -27,3 +33,37 @@ def require_admin(user: User = Depends(get_current_user_bearer)) -> User:
     if user.role != "admin":
         raise err("ADMIN_ONLY", status.HTTP_403_FORBIDDEN)
     return user
+
+def _bearer_user_id(authorization: str) -> int | None:
+    # только разбор JWT, без запроса в БД — для выбора сессии
+    if not authorization.startswith("Bearer "):
+        return None
+    try:
+        sub = jwt.decode(authorization.split(" ", 1)[1], settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]).get("sub")
+        return int(sub) if sub else None
+    except (JWTError, ValueError):
+        return None
+
+def wrote_recently(request: Request) -> bool | None:
+    """Писал ли пользователь запроса последние REPLICA_PIN_SECONDS; None — неизвестно (Redis
+    недоступен). Без реплики не проверяется: читать и так из primary. Общая зависимость:
+    FastAPI кэширует её на запрос, так что JWT и Redis проверяются один раз."""
+    if replica_engine is None:
+        return False
+    uid = _bearer_user_id(request.headers.get("authorization", ""))
+    return False if uid is None else recently_wrote(uid)
+
+def get_read_db(pinned: bool | None = Depends(wrote_recently)):
+    """Сессия для read-only эндпоинтов: реплика, если она не отстаёт и пользователь
+    точно не делал записей последние REPLICA_PIN_SECONDS (read-your-writes), иначе primary."""
+    db = (ReplicaSessionLocal if pinned is False and replica_ok() else SessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def shared_reads(pinned: bool | None = Depends(wrote_recently)) -> bool:
+    """Можно ли отдать этому запросу общий (склеенный) результат: нет, если пользователь
+    только что писал — он должен увидеть свою запись, а не чужой расчёт, начатый до неё.
+    Недоступный Redis склейку не выключает: это не повод считать всех писавшими."""
+    return pinned is not True
@@ -1,13 +1,34 @@
 from __future__ import annotations
-from fastapi import APIRouter, Depends, HTTPException, status
+import os, re
+from typing import Annotated
+from datetime import datetime, date, timezone, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel, Field
+from sqlalchemy import select, and_, update
 from sqlalchemy.orm import Session
 from app.db import get_db
-from app.api.deps import require_admin
+from app.api.deps import require_admin, get_read_db
+from app.utils.replica import mark_recent_write
 from app.models.booking import Booking
+from app.models.seat import Seat
+from app.models.user import User
+from app.models.pricing_rule import PricingRule
 from app.utils.errors import err
+from app.services.catalog import invalidate_catalog
+from app.services.broadcast import start_broadcast, get_progress
+from app.services.waitlist import match_waitlist_safe
+from app.utils.flight_recorder import slow_requests, dump_to_file
+from app.utils.admission import admission_stats
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+# из каких статусов админ может перевести бронь в целевой
+TRANSITIONS: dict[str, tuple[str, ...]] = {
+    "paid": ("pending",),
+    "completed": ("paid", "pending"),
+    "no_show": ("pending",),
+}
+
 def _get(db: Session, booking_id: int) -> Booking:
     b = db.get(Booking, booking_id)
     if not b:
@@ -15,36 +36,95 @@ def _get(db: Session, booking_id: int) -> Booking:
     return b
 
 @router.post("/bookings/{booking_id}/mark_paid")
-def mark_paid(booking_id: int, _: object = Depends(require_admin), db: Session = Depends(get_db)):
+def mark_paid(booking_id: int, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
     b = _get(db, booking_id)
-    if b.status not in ("pending",):
+    if b.status not in TRANSITIONS["paid"]:
         raise err("CANNOT_CANCEL", 409)
     b.status = "paid"
     db.add(b); db.commit(); db.refresh(b)
+    mark_recent_write(b.user_id, admin.id)  # владелец брони должен увидеть смену статуса сразу
     return {"id": b.id, "status": b.status}
 
 @router.post("/bookings/{booking_id}/complete")
-def complete(booking_id: int, _: object = Depends(require_admin), db: Session = Depends(get_db)):
+def complete(booking_id: int, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
     b = _get(db, booking_id)
-    if b.status not in ("paid", "pending"):
+    if b.status not in TRANSITIONS["completed"]:
         raise err("CANNOT_CANCEL", 409)
     b.status = "completed"
     db.add(b); db.commit(); db.refresh(b)
+    mark_recent_write(b.user_id, admin.id)
     return {"id": b.id, "status": b.status}
 
 @router.post("/bookings/{booking_id}/no_show")
-def no_show(booking_id: int, _: object = Depends(require_admin), db: Session = Depends(get_db)):
+def no_show(booking_id: int, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
     b = _get(db, booking_id)
-    if b.status not in ("pending",):
+    if b.status not in TRANSITIONS["no_show"]:
         raise err("CANNOT_CANCEL", 409)
     b.status = "no_show"
     db.add(b); db.commit(); db.refresh(b)
+    mark_recent_write(b.user_id, admin.id)
+    match_waitlist_safe(db, b.seat_id, b.start_time, b.end_time)
     return {"id": b.id, "status": b.status}
 
+# ===== Bulk status transition (end of shift) =====
+class BulkStatusRequest(BaseModel):
+    status: str = Field(pattern="^(paid|completed|no_show)$")
+    ids: list[int] | None = Field(default=None, max_length=5000)
+    # либо фильтр: зона + окно по start_time
+    zone_id: int | None = None
+    start_from: datetime | None = None
+    start_to: datetime | None = None
+
+@router.post("/bookings/bulk_status")
+def bulk_status(payload: BulkStatusRequest, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
+    """Переводит пачку броней одним UPDATE ... WHERE status IN (...) RETURNING id.
+
+    По ids отвечает поштучно: updated / not_found / invalid_status (с текущим статусом) —
+    для не обновлённых ids один добирающий SELECT. По фильтру берутся только брони в
+    допустимых статусах, в ответе — обновлённые ids.
+    """
+    allowed = TRANSITIONS[payload.status]
+    stmt = update(Booking).where(Booking.status.in_(allowed))
+    if payload.ids is not None:
+        ids = list(dict.fromkeys(payload.ids))
+        stmt = stmt.where(Booking.id.in_(ids))
+    elif payload.start_from and payload.start_to:
+        stmt = stmt.where(Booking.start_time >= payload.start_from, Booking.start_time < payload.start_to)
+        if payload.zone_id:
+            stmt = stmt.where(Booking.seat_id.in_(select(Seat.id).where(Seat.zone_id == payload.zone_id)))
+    else:
+        raise err("BULK_SELECTION_REQUIRED", 422)
+
+    rows = db.execute(
+        stmt.values(status=payload.status)
+        .returning(Booking.id, Booking.user_id, Booking.seat_id, Booking.start_time, Booking.end_time)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    updated = [r.id for r in rows]
+    if updated:
+        mark_recent_write(*(r.user_id for r in rows), admin.id)
+    if payload.status == "no_show":
+        # no_show освобождает слот — отдаём его листу ожидания
+        for r in rows:
+            match_waitlist_safe(db, r.seat_id, r.start_time, r.end_time)
+    if payload.ids is None:
+        return {"status": payload.status, "updated": updated, "count": len(updated)}
+
+    done = set(updated)
+    rest = [i for i in ids if i not in done]
+    current = dict(db.execute(select(Booking.id, Booking.status).where(Booking.id.in_(rest))).all()) if rest else {}
+    results = []
+    for i in ids:
+        if i in done:
+            results.append({"id": i, "result": "updated", "status": payload.status})
+        elif i in current:
+            results.append({"id": i, "result": "invalid_status", "status": current[i]})
+        else:
+            results.append({"id": i, "result": "not_found"})
+    return {"status": payload.status, "count": len(updated), "results": results}
+
 # ===== Seat seeding for a zone (grid) =====
-from pydantic import BaseModel, Field
-from sqlalchemy import select
-from app.models.seat import Seat
 
 class SeedSeatsRequest(BaseModel):
     rows: int = Field(ge=1, le=26, description="Количество рядов, максимум 26 (A..Z)")
@@ -104,15 +184,13 @@ def seed_seats(
             created += 1
 
     db.commit()
+    invalidate_catalog()
     return {"zone_id": zone_id, "created": created, "updated": updated, "skipped": skipped}
 
 # ===== Today's bookings =====
-from datetime import datetime, timezone, timedelta
-from sqlalchemy import select, and_
-from app.models.user import User
 
 @router.get("/bookings/today")
-def bookings_today(zone_id: int | None = None, _: object = Depends(require_admin), db: Session = Depends(get_db)):
+def bookings_today(zone_id: int | None = None, _: object = Depends(require_admin), db: Session = Depends(get_read_db)):
     # считаем «сегодня» по UTC (для MVP; позже можно сдвигать таймзоной клуба)
     now = datetime.now(timezone.utc)
     start = datetime(year=now.year, month=now.month, day=now.day, tzinfo=timezone.utc)
@@ -149,7 +227,6 @@ def bookings_today(zone_id: int | None = None, _: object = Depends(require_admin
     return {"items": items}
 
 # ===== Bulk price update by row =====
-import re
 
 ROW_RE = re.compile(r"^([A-Za-z]+)(\d+)$")
 
@@ -184,4 +261,88 @@ def update_row_price(
         db.add(s)
         updated += 1
     db.commit()
-    return {"zone_id": zone_id, "row": target, "updated": updated}
\ No newline at end of file
+    if updated:
+        invalidate_catalog()
+    return {"zone_id": zone_id, "row": target, "updated": updated}
+
+# ===== Pricing rules (peak/off-peak, weekday/weekend, seat type) =====
+class PricingRuleRequest(BaseModel):
+    zone_id: int | None = None
+    seat_type: str | None = Field(default=None, pattern="^(standard|vip)$")
+    weekdays: int = Field(default=127, ge=1, le=127)  # бит 0 = пн ... бит 6 = вс
+    hour_from: int = Field(default=0, ge=0, le=23)
+    hour_to: int = Field(default=24, ge=1, le=24)
+    multiplier_pct: int = Field(ge=1, le=1000)
+
+def _rule_dict(r: PricingRule) -> dict:
+    return {
+        "id": r.id, "zone_id": r.zone_id, "seat_type": r.seat_type, "weekdays": r.weekdays,
+        "hour_from": r.hour_from, "hour_to": r.hour_to, "multiplier_pct": r.multiplier_pct,
+    }
+
+@router.get("/pricing/rules")
+def list_pricing_rules(_: object = Depends(require_admin), db: Session = Depends(get_db)):
+    rules = db.scalars(select(PricingRule).where(PricingRule.is_active.is_(True)).order_by(PricingRule.id)).all()
+    return {"items": [_rule_dict(r) for r in rules]}
+
+@router.post("/pricing/rules", status_code=201)
+def create_pricing_rule(payload: PricingRuleRequest, _: object = Depends(require_admin), db: Session = Depends(get_db)):
+    if payload.hour_to <= payload.hour_from:
+        raise err("PRICING_HOURS_RANGE", 422)
+    r = PricingRule(**payload.model_dump(), is_active=True)
+    db.add(r); db.commit(); db.refresh(r)
+    invalidate_catalog()  # таблицы цен пересобираются вместе с каталогом
+    return _rule_dict(r)
+
+@router.delete("/pricing/rules/{rule_id}")
+def delete_pricing_rule(rule_id: int, _: object = Depends(require_admin), db: Session = Depends(get_db)):
+    r = db.get(PricingRule, rule_id)
+    if not r or not r.is_active:
+        raise err("PRICING_RULE_NOT_FOUND", 404)
+    r.is_active = False
+    db.commit()
+    invalidate_catalog()
+    return {"ok": True}
+
+# ===== Broadcast push to users with bookings =====
+class BroadcastRequest(BaseModel):
+    title: str = Field(min_length=1, max_length=120)
+    body: str = Field(min_length=1, max_length=1000)
+    data: dict[str, str] = Field(default_factory=dict)
+    zone_id: int | None = None
+    date_from: date | None = Field(default=None, description="Брони с началом не раньше этой даты (UTC)")
+    date_to: date | None = Field(default=None, description="…и не позже этой даты включительно")
+    statuses: list[Annotated[str, Field(pattern="^(pending|paid|completed|cancelled|no_show)$")]] = Field(
+        default=["pending", "paid"], min_length=1,
+    )
+
+@router.post("/broadcasts", status_code=202)
+async def create_broadcast(payload: BroadcastRequest, _: object = Depends(require_admin)):
+    # рассылка идёт фоновой задачей, ответ — сразу; прогресс — GET /admin/broadcasts/{id}
+    campaign_id = await start_broadcast(
+        payload.title, payload.body, payload.data,
+        zone_id=payload.zone_id, date_from=payload.date_from, date_to=payload.date_to,
+        statuses=payload.statuses,
+    )
+    return {"id": campaign_id, "status": "queued"}
+
+@router.get("/broadcasts/{campaign_id}")
+def broadcast_progress(campaign_id: str, _: object = Depends(require_admin)):
+    p = get_progress(campaign_id)
+    if not p:
+        raise err("BROADCAST_NOT_FOUND", 404)
+    return p
+
+# ===== Slow-request flight recorder =====
+# буфер свой у каждого воркера — смотрим/сбрасываем тот, что обработал запрос
+@router.get("/slow_requests")
+def get_slow_requests(limit: int = Query(default=50, ge=1, le=1000), _: object = Depends(require_admin)):
+    return {"pid": os.getpid(), "items": slow_requests(limit)}
+
+@router.post("/slow_requests/dump")
+def dump_slow_requests(_: object = Depends(require_admin)):
+    return {"pid": os.getpid(), "path": dump_to_file()}
+
+@router.get("/admission")
+def get_admission(_: object = Depends(require_admin)):
+    return {"pid": os.getpid(), "groups": admission_stats()}
@@ -1,38 +1,142 @@
 from __future__ import annotations
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Header, Response
 from sqlalchemy.orm import Session
-from datetime import datetime, date, timezone
+from sqlalchemy import select
+from datetime import datetime, date, timezone, timedelta
 from app.db import get_db
-from app.api.deps import get_current_user_bearer
+from app.api.deps import get_current_user_bearer, get_read_db, shared_reads
 from app.models.booking import Booking
-from app.services.booking import create_booking, cancel_booking, seat_availability
-from app.schemas.booking import BookingCreate, BookingRead, AvailabilityResponse, SeatAvailability
+from app.services.booking import create_booking, create_group_booking, cancel_booking, seat_availability, seat_availability_compact, SLOTS_PER_DAY, find_free_windows, quote_prices
+from app.schemas.booking import BookingCreate, BookingRead, GroupBookingCreate, GroupBookingRead, AvailabilityResponse, SeatAvailability, AvailabilityCompactResponse, FreeWindowsResponse, QuoteRequest, QuoteResponse
+from app.services.catalog import get_catalog
+from app.utils.idempotency import idempotent
+from app.utils.fastjson import FastJSONResponse, schema_columns, rows_to_dicts
+from app.utils.singleflight import single_flight
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
 
-@router.get("/availability", response_model=AvailabilityResponse)
+def _json(body: bytes) -> Response:
+    # готовые байты (в т.ч. общий результат single-flight) — без повторной сериализации
+    return Response(content=body, media_type="application/json")
+
+@router.get("/availability", response_model=AvailabilityResponse, response_class=FastJSONResponse)
 def get_availability(
-    date_str: str = Query(..., description="YYYY-MM-DD (UTC)"),
+    date_str: date = Query(..., description="YYYY-MM-DD (UTC)"),
+    zone_id: int | None = None,
+    seat_id: int | None = None,
+    db: Session = Depends(get_read_db),
+    shared: bool = Depends(shared_reads),
+):
+    d = date_str
+    d_utc = datetime(d.year, d.month, d.day, tzinfo=timezone.utc)
+
+    def compute() -> bytes:
+        items = seat_availability(db, d_utc, zone_id=zone_id, seat_id=seat_id)
+        # items уже в форме SeatAvailability — отдаём без повторной валидации
+        return FastJSONResponse({"date": d, "ZoneId": zone_id, "SeatId": seat_id, "items": items}).body
+    return _json(single_flight(f"avail:v1:{d}:{zone_id}:{seat_id}", compute) if shared else compute())
+
+@router.get("/availability/v2", response_model=AvailabilityCompactResponse, response_class=FastJSONResponse)
+def get_availability_v2(
+    date_str: date = Query(..., description="YYYY-MM-DD (UTC)"),
     zone_id: int | None = None,
     seat_id: int | None = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db),
+    shared: bool = Depends(shared_reads),
 ):
-    d = date.fromisoformat(date_str)
+    d = date_str
     d_utc = datetime(d.year, d.month, d.day, tzinfo=timezone.utc)
-    items = seat_availability(db, d_utc, zone_id=zone_id, seat_id=seat_id)
-    return {"date": d, "ZoneId": zone_id, "SeatId": seat_id, "items": items}
+
+    def compute() -> bytes:
+        day_start, tiers, items = seat_availability_compact(db, d_utc, zone_id=zone_id, seat_id=seat_id)
+        return FastJSONResponse({
+            "date": d, "day_start": day_start, "slot_minutes": 60, "slots": SLOTS_PER_DAY,
+            "zone_id": zone_id, "seat_id": seat_id, "price_tiers": tiers, "items": items,
+        }).body
+    return _json(single_flight(f"avail:v2:{d}:{zone_id}:{seat_id}", compute) if shared else compute())
+
+@router.get("/windows", response_model=FreeWindowsResponse, response_class=FastJSONResponse)
+def search_windows(
+    hours: int = Query(..., ge=1, le=24, description="Длительность окна в часах"),
+    zone_id: int | None = None,
+    seat_type: str | None = Query(default=None, pattern="^(standard|vip)$"),
+    start_from: datetime | None = Query(default=None, description="ISO с таймзоной; по умолчанию — сейчас"),
+    horizon_days: int = Query(default=7, ge=1, le=30),
+    limit: int = Query(default=5, ge=1, le=50),
+    db: Session = Depends(get_read_db)
+):
+    if start_from is None:
+        start_from = datetime.now(timezone.utc)
+    elif start_from.tzinfo is None:
+        start_from = start_from.replace(tzinfo=timezone.utc)
+    items = find_free_windows(
+        db, start_from, timedelta(days=horizon_days), hours, limit, zone_id=zone_id, seat_type=seat_type
+    )
+    return FastJSONResponse({"hours": hours, "items": items})
+
+@router.post("/quote", response_model=QuoteResponse, response_class=FastJSONResponse)
+def quote(data: QuoteRequest):
+    # цены из предвычисленных таблиц каталога, без БД; время без зоны — UTC, как в /windows
+    starts = [
+        i.start_time.astimezone(timezone.utc) if i.start_time.tzinfo else i.start_time.replace(tzinfo=timezone.utc)
+        for i in data.items
+    ]
+    prices = quote_prices([(i.seat_id, t, i.hours) for i, t in zip(data.items, starts)])
+    return FastJSONResponse({"items": [
+        {"seat_id": i.seat_id, "start_time": t, "hours": i.hours, "price_cents": p}
+        for i, t, p in zip(data.items, starts, prices)
+    ]})
 
 @router.post("", response_model=BookingRead, status_code=201)
-def create(data: BookingCreate, current=Depends(get_current_user_bearer), db: Session = Depends(get_db)):
-    b = create_booking(db, user_id=current.id, seat_id=data.seat_id, start=data.start_time, hours=data.hours)
-    return b
+def create(
+    data: BookingCreate,
+    current=Depends(get_current_user_bearer),
+    db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=128),
+):
+    def run():
+        b = create_booking(db, user_id=current.id, seat_id=data.seat_id, start=data.start_time, hours=data.hours)
+        return BookingRead.model_validate(b).model_dump(mode="json")
+    return idempotent(current.id, idempotency_key, ["POST /bookings", data.model_dump(mode="json")], 201, run)
+
+@router.post("/group", response_model=GroupBookingRead, status_code=201)
+def create_group(
+    data: GroupBookingCreate,
+    current=Depends(get_current_user_bearer),
+    db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=128),
+):
+    # size мест рядом в зоне: один ряд, иначе два соседних; бронируются все разом
+    def run():
+        bookings, same_row = create_group_booking(
+            db, user_id=current.id, zone_id=data.zone_id, size=data.size,
+            start=data.start_time, hours=data.hours, seat_type=data.seat_type,
+        )
+        catalog = get_catalog()
+        return GroupBookingRead(
+            same_row=same_row, labels=[catalog.seat(b.seat_id).label for b in bookings],
+            price_cents=sum(b.price_cents for b in bookings),
+            bookings=[BookingRead.model_validate(b) for b in bookings],
+        ).model_dump(mode="json")
+    return idempotent(current.id, idempotency_key, ["POST /bookings/group", data.model_dump(mode="json")], 201, run)
 
-@router.get("/me", response_model=list[BookingRead])
+@router.get("/me", response_model=list[BookingRead], response_class=FastJSONResponse)
 def my_bookings(current=Depends(get_current_user_bearer), db: Session = Depends(get_db)):
-    q = db.query(Booking).filter(Booking.user_id == current.id).order_by(Booking.start_time.desc())
-    return list(q.all())
+    q = (
+        select(*schema_columns(Booking, BookingRead))
+        .where(Booking.user_id == current.id)
+        .order_by(Booking.start_time.desc())
+    )
+    return FastJSONResponse(rows_to_dicts(db.execute(q)))
 
 @router.delete("/{booking_id}", response_model=BookingRead)
-def cancel(booking_id: int, current=Depends(get_current_user_bearer), db: Session = Depends(get_db)):
-    b = cancel_booking(db, user_id=current.id, booking_id=booking_id)
-    return b
+def cancel(
+    booking_id: int,
+    current=Depends(get_current_user_bearer),
+    db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=128),
+):
+    def run():
+        b = cancel_booking(db, user_id=current.id, booking_id=booking_id)
+        return BookingRead.model_validate(b).model_dump(mode="json")
+    return idempotent(current.id, idempotency_key, ["DELETE /bookings", booking_id], 200, run)
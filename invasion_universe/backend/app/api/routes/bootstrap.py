@@ -0,0 +1,62 @@
+from __future__ import annotations
+from datetime import date, datetime, timezone
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.db import get_db
+from app.api.deps import get_current_user_bearer
+from app.api.routes.zones import layout_rows
+from app.models.booking import Booking
+from app.models.device import Device
+from app.schemas.booking import BookingRead
+from app.schemas.bootstrap import BootstrapResponse
+from app.schemas.device import DeviceRead
+from app.services.booking import SLOTS_PER_DAY, seat_availability_compact
+from app.services.catalog import get_catalog
+from app.utils.errors import err
+from app.utils.fastjson import FastJSONResponse, schema_columns, rows_to_dicts
+
+router = APIRouter(tags=["bootstrap"])
+
+@router.get("/bootstrap", response_model=BootstrapResponse, response_class=FastJSONResponse)
+def bootstrap(
+    zone_id: int | None = None,
+    date_str: date | None = Query(default=None, description="YYYY-MM-DD (UTC), по умолчанию — сегодня"),
+    current=Depends(get_current_user_bearer),
+    db: Session = Depends(get_db),
+):
+    """Всё для старта приложения за один запрос: /auth/me, /zones, /zones/{id}/layout,
+    /bookings/availability/v2, /bookings/me и /devices/me в тех же формах.
+    Одна проверка токена и одна сессия (get_db общий с авторизацией); зоны и схема — из каталога
+    в памяти, из БД — брони пользователя, устройства и занятость зоны на дату."""
+    catalog = get_catalog()
+    zones = catalog.active_zones()
+    if zone_id is None:
+        zone_id = zones[0].id if zones else None
+    elif not (z := catalog.zones.get(zone_id)) or not z.is_active:
+        raise err("ZONE_NOT_FOUND", 404)
+    d = date_str or datetime.now(timezone.utc).date()
+
+    layout = availability = None
+    if zone_id is not None:
+        layout = {"zone_id": zone_id, "rows": layout_rows(zone_id)}
+        day_start, tiers, items = seat_availability_compact(db, datetime(d.year, d.month, d.day, tzinfo=timezone.utc), zone_id=zone_id)
+        availability = {
+            "date": d, "day_start": day_start, "slot_minutes": 60, "slots": SLOTS_PER_DAY,
+            "zone_id": zone_id, "seat_id": None, "price_tiers": tiers, "items": items,
+        }
+    bookings = db.execute(
+        select(*schema_columns(Booking, BookingRead))
+        .where(Booking.user_id == current.id)
+        .order_by(Booking.start_time.desc())
+    )
+    devices = db.execute(select(*schema_columns(Device, DeviceRead)).where(Device.user_id == current.id))
+    return FastJSONResponse({
+        "user": {"id": current.id, "email": current.email, "locale": current.locale, "role": current.role},
+        "zones": [{"id": z.id, "name": z.name, "code": z.code} for z in zones],
+        "zone_id": zone_id,
+        "layout": layout,
+        "availability": availability,
+        "bookings": rows_to_dicts(bookings),
+        "devices": rows_to_dicts(devices),
+    })
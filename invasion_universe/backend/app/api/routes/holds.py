@@ -0,0 +1,36 @@
+from __future__ import annotations
+from fastapi import APIRouter, Depends, Header
+from sqlalchemy.orm import Session
+from app.db import get_db
+from app.api.deps import get_current_user_bearer
+from app.schemas.booking import BookingRead
+from app.schemas.hold import HoldCreate, HoldRead
+from app.services.holds import create_hold, convert_hold, my_holds, user_hold, release_hold
+from app.utils.idempotency import idempotent
+
+router = APIRouter(prefix="/holds", tags=["holds"])
+
+@router.post("", response_model=HoldRead, status_code=201)
+def hold(data: HoldCreate, current=Depends(get_current_user_bearer), db: Session = Depends(get_db)):
+    return create_hold(db, current.id, data.seat_id, data.start_time, data.hours)
+
+@router.get("/me", response_model=list[HoldRead])
+def list_my_holds(current=Depends(get_current_user_bearer)):
+    return my_holds(current.id)
+
+@router.post("/{hold_id}/book", response_model=BookingRead, status_code=201)
+def book_hold(
+    hold_id: str,
+    current=Depends(get_current_user_bearer),
+    db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=128),
+):
+    def run():
+        b = convert_hold(db, current.id, hold_id)
+        return BookingRead.model_validate(b).model_dump(mode="json")
+    return idempotent(current.id, idempotency_key, ["POST /holds/book", hold_id], 201, run)
+
+@router.delete("/{hold_id}")
+def drop_hold(hold_id: str, current=Depends(get_current_user_bearer)):
+    release_hold(user_hold(current.id, hold_id))
+    return {"ok": True}
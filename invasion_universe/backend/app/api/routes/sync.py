@@ -0,0 +1,17 @@
+from __future__ import annotations
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.api.deps import get_current_user_bearer, get_read_db
+from app.services.sync import changes_since
+from app.utils.fastjson import FastJSONResponse
+
+router = APIRouter(tags=["sync"])
+
+@router.get("/sync", response_class=FastJSONResponse)
+def sync(
+    since: int = Query(default=0, ge=0),
+    current=Depends(get_current_user_bearer),
+    db: Session = Depends(get_read_db),
+):
+    # since=0 — полный снимок; дальше клиент присылает cursor из прошлого ответа
+    return FastJSONResponse(changes_since(db, current.id, since))
@@ -0,0 +1,25 @@
+from __future__ import annotations
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from app.db import get_db
+from app.api.deps import get_current_user_bearer
+from app.models.waitlist import WaitlistEntry
+from app.schemas.waitlist import WaitlistCreate, WaitlistRead
+from app.services.waitlist import join_waitlist, leave_waitlist
+
+router = APIRouter(prefix="/waitlist", tags=["waitlist"])
+
+@router.post("", response_model=WaitlistRead, status_code=201)
+def join(data: WaitlistCreate, current=Depends(get_current_user_bearer), db: Session = Depends(get_db)):
+    return join_waitlist(db, current.id, data)
+
+@router.get("/me", response_model=list[WaitlistRead])
+def my_waitlist(current=Depends(get_current_user_bearer), db: Session = Depends(get_db)):
+    return list(db.scalars(
+        select(WaitlistEntry).where(WaitlistEntry.user_id == current.id).order_by(WaitlistEntry.start_time.desc())
+    ).all())
+
+@router.delete("/{entry_id}", response_model=WaitlistRead)
+def leave(entry_id: int, current=Depends(get_current_user_bearer), db: Session = Depends(get_db)):
+    return leave_waitlist(db, current.id, entry_id)
@@ -10,12 +10,14 @@ from app.models.user import User
 from app.schemas.zone import ZoneCreate, ZoneRead
 from app.schemas.seat import SeatCreate, SeatRead
 from app.utils.errors import err
+from app.utils.fastjson import FastJSONResponse
+from app.services.catalog import get_catalog, invalidate_catalog
 
 router = APIRouter(prefix="/zones", tags=["zones"])
 
-@router.get("", response_model=list[ZoneRead])
-def list_zones(db: Session = Depends(get_db)):
-    return list(db.scalars(select(Zone).where(Zone.is_active == True).order_by(Zone.id)).all())  # noqa
+@router.get("", response_model=list[ZoneRead], response_class=FastJSONResponse)
+def list_zones():
+    return FastJSONResponse([{"id": z.id, "name": z.name, "code": z.code} for z in get_catalog().active_zones()])
 
 @router.post("", response_model=ZoneRead, status_code=201)
 def create_zone(data: ZoneCreate, db: Session = Depends(get_db), _: User = Depends(require_admin)):
@@ -23,11 +25,15 @@ def create_zone(data: ZoneCreate, db: Session = Depends(get_db), _: User = Depen
         raise err("ZONE_CODE_EXISTS", 409)
     z = Zone(name=data.name, code=data.code, is_active=True)
     db.add(z); db.commit(); db.refresh(z)
+    invalidate_catalog()
     return z
 
-@router.get("/{zone_id}/seats", response_model=list[SeatRead])
-def list_seats(zone_id: int, db: Session = Depends(get_db)):
-    return list(db.scalars(select(Seat).where(Seat.zone_id == zone_id, Seat.is_active == True).order_by(Seat.id)).all())  # noqa
+@router.get("/{zone_id}/seats", response_model=list[SeatRead], response_class=FastJSONResponse)
+def list_seats(zone_id: int):
+    return FastJSONResponse([
+        {"id": s.id, "label": s.label, "seat_type": s.seat_type, "hourly_price_cents": s.hourly_price_cents}
+        for s in get_catalog().zone_seats(zone_id)
+    ])
 
 @router.post("/{zone_id}/seats", response_model=SeatRead, status_code=201)
 def create_seat(zone_id: int, data: SeatCreate, db: Session = Depends(get_db), _: User = Depends(require_admin)):
@@ -37,34 +43,20 @@ def create_seat(zone_id: int, data: SeatCreate, db: Session = Depends(get_db), _
     price_cents = (data.hourly_price_rub or 300) * 100
     s = Seat(zone_id=zone_id, label=data.label, seat_type=data.seat_type, hourly_price_cents=price_cents, is_active=True)
     db.add(s); db.commit(); db.refresh(s)
+    invalidate_catalog()
     return s
 
 # ===== Layout grouped by row letters (A..Z) =====
-import re
-ROW_RE = re.compile(r"^([A-Za-z]+)(\d+)$")
+def layout_rows(zone_id: int) -> list[dict]:
+    # ряды по алфавиту, внутри — по номеру места (сетка предвычислена в каталоге)
+    return [
+        {"row": row, "seats": [
+            {"id": s.id, "label": s.label, "col": col, "seat_type": s.seat_type, "hourly_price_cents": s.hourly_price_cents}
+            for col, s in seats
+        ]}
+        for row, seats in get_catalog().zone_rows(zone_id)
+    ]
 
 @router.get("/{zone_id}/layout")
-def zone_layout(zone_id: int, db: Session = Depends(get_db)):
-    seats = list(db.scalars(select(Seat).where(Seat.zone_id == zone_id, Seat.is_active == True)).all())  # noqa
-    rows: dict[str, list[dict]] = {}
-
-    for s in seats:
-        m = ROW_RE.match(s.label)
-        row = m.group(1).upper() if m else "?"
-        col = int(m.group(2)) if (m and m.group(2).isdigit()) else 0
-        rows.setdefault(row, []).append({
-            "id": s.id,
-            "label": s.label,
-            "col": col,
-            "seat_type": s.seat_type,
-            "hourly_price_cents": s.hourly_price_cents
-        })
-
-    # сортируем ряды по алфавиту, а внутри — по номеру места
-    result = []
-    for row_letter in sorted(rows.keys()):
-        result.append({
-            "row": row_letter,
-            "seats": sorted(rows[row_letter], key=lambda x: x["col"])
-        })
-    return {"zone_id": zone_id, "rows": result}
+def zone_layout(zone_id: int):
+    return {"zone_id": zone_id, "rows": layout_rows(zone_id)}
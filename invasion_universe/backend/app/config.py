@@ -5,10 +5,71 @@ class Settings(BaseSettings):
     APP_NAME: str = "Invasion Universe API"
     ENV: str = "dev"
     DATABASE_URL: str
+    # read-реплика: пусто — всё читается из primary
+    DATABASE_REPLICA_URL: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_SECONDS: float = 2.0
+    REPLICA_PIN_SECONDS: int = 10
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRES_MIN: int = 60
     CORS_ORIGINS: str = ""
+    # каталог зон/мест в памяти: перечитывается по pub/sub, а это — страховочный TTL
+    CATALOG_MAX_AGE_SECONDS: float = 300.0
+    # админские рассылки: размер выборки токенов из БД, токенов на запрос FCM, параллельных запросов
+    BROADCAST_CHUNK_SIZE: int = 5000
+    BROADCAST_BATCH_SIZE: int = 500
+    BROADCAST_CONCURRENCY: int = 8
+    # напоминания о начале брони: за сколько минут (через запятую), период тика, размер пачки
+    REMINDER_OFFSETS_MINUTES: str = "60,15"
+    REMINDER_TICK_SECONDS: float = 5.0
+    REMINDER_BATCH_SIZE: int = 500
+    REMINDER_WORKER_ENABLED: bool = True
+    REMINDER_LEASE_SECONDS: int = 120  # забранное, но не подтверждённое за это время вернётся в очередь
+    # SQLite-профиль (DATABASE_URL=sqlite:///...): ожидание блокировки файла, fsync, кэш, очередь записей
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_MB: int = 64
+    SQLITE_MMAP_MB: int = 256
+    SQLITE_WRITE_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    # admission control: группа=одновременно:очередь:таймаут_очереди_сек (на воркер);
+    # выключен, пока лимиты не подобраны нагрузочным прогоном под свой пул БД
+    ADMISSION_ENABLED: bool = False
+    ADMISSION_GROUPS: str = "writes=6:50:2,reads=6:100:1,auth=3:30:2,admin=2:10:5"
+    # запись трафика для bench/replay.py: каталог, доля пользователей, лимит тела, ротация файлов
+    CAPTURE_ENABLED: bool = False
+    CAPTURE_DIR: str = "/tmp/iu-capture"
+    CAPTURE_SAMPLE_RATE: float = 1.0
+    CAPTURE_MAX_BODY_BYTES: int = 16384
+    CAPTURE_ROTATE_SECONDS: int = 3600
+    CAPTURE_ROTATE_MB: int = 64
+    CAPTURE_QUEUE_MAX: int = 10000
+    # самописец медленных запросов: порог, размер буфера, период снятия стеков, лимиты на запись
+    FLIGHT_RECORDER_ENABLED: bool = True
+    FLIGHT_RECORDER_THRESHOLD_MS: float = 500.0
+    FLIGHT_RECORDER_SIZE: int = 200
+    FLIGHT_RECORDER_SAMPLE_MS: float = 20.0
+    FLIGHT_RECORDER_MAX_SQL: int = 50
+    FLIGHT_RECORDER_MAX_SAMPLES: int = 100
+    FLIGHT_RECORDER_DUMP_DIR: str = "/tmp"
+    # single-flight доступности: склейка между воркерами через Redis (аренда/общий результат), ожидание
+    SINGLEFLIGHT_REDIS: bool = False
+    SINGLEFLIGHT_LEASE_MS: int = 2000
+    SINGLEFLIGHT_RESULT_TTL_MS: int = 500
+    SINGLEFLIGHT_WAIT_SECONDS: float = 5.0
+    SINGLEFLIGHT_POLL_SECONDS: float = 0.01
+    # удержание места на время оплаты (только Redis): время жизни и лимит на пользователя
+    HOLD_TTL_SECONDS: int = 300
+    HOLD_MAX_PER_USER: int = 3
+    # динамические цены: часы и дни недели в правилах — по местному времени клуба (UTC+N)
+    PRICING_UTC_OFFSET_HOURS: int = 0
+    # /sync: максимум изменений каждого типа за один ответ
+    SYNC_PAGE_SIZE: int = 500
+    # Idempotency-Key: сколько хранить ответ, TTL маркера «в работе», ожидание дубликатов
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_SECONDS: int = 30
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    IDEMPOTENCY_POLL_SECONDS: float = 0.05
 
     @property
     def cors_origins_list(self) -> list[str]:
@@ -16,4 +77,23 @@ class Settings(BaseSettings):
             return []
         return [o.strip() for o in self.CORS_ORIGINS.split(",") if o.strip()]
 
+    @property
+    def reminder_offsets(self) -> list[int]:
+        return [int(x) for x in self.REMINDER_OFFSETS_MINUTES.split(",") if x.strip()]
+
+    @property
+    def is_sqlite(self) -> bool:
+        return self.DATABASE_URL.startswith("sqlite")
+
+    @property
+    def admission_groups(self) -> dict[str, tuple[int, int, float]]:
+        out = {}
+        for item in self.ADMISSION_GROUPS.split(","):
+            if not item.strip():
+                continue
+            name, spec = item.split("=", 1)
+            limit, queue, timeout = spec.split(":")
+            out[name.strip()] = (int(limit), int(queue), float(timeout))
+        return out
+
 settings = Settings()
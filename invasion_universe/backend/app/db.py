@@ -1,14 +1,85 @@
 from __future__ import annotations
-from sqlalchemy import create_engine
+import logging, threading, time
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, future=True)
+log = logging.getLogger("db")
+
+engine = create_engine(
+    settings.DATABASE_URL, pool_pre_ping=True, future=True,
+    connect_args={"check_same_thread": False} if settings.is_sqlite else {},
+)
+if settings.is_sqlite:
+    from app.utils.sqlite_profile import configure_sqlite
+    configure_sqlite(engine)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+# Реплика для read-only эндпоинтов (необязательна: без DATABASE_REPLICA_URL всё идёт в primary)
+replica_engine = (
+    create_engine(settings.DATABASE_REPLICA_URL, pool_pre_ping=True, future=True)
+    if settings.DATABASE_REPLICA_URL else None
+)
+ReplicaSessionLocal = (
+    sessionmaker(bind=replica_engine, autoflush=False, autocommit=False, future=True)
+    if replica_engine is not None else SessionLocal
+)
+
+if settings.FLIGHT_RECORDER_ENABLED:
+    from app.utils.flight_recorder import instrument_engine
+    instrument_engine(engine)
+    if replica_engine is not None:
+        instrument_engine(replica_engine)
+
+def dispose_engines_after_fork() -> None:
+    # соединения пула, открытые в master до fork, закрываются только в master:
+    # воркер забывает их (close=False) и открывает свои
+    engine.dispose(close=False)
+    if replica_engine is not None:
+        replica_engine.dispose(close=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+# ===== Проверка отставания реплики =====
+# 0, если реплика догнала WAL; NULL вне режима восстановления (обычная БД, напр. вторая локальная)
+_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+_lag_lock = threading.Lock()
+_lag_state = {"checked_at": float("-inf"), "ok": False}
+
+def _replica_lag_seconds() -> float:
+    if replica_engine.dialect.name != "postgresql":
+        return 0.0
+    with replica_engine.connect() as conn:
+        lag = conn.execute(_LAG_SQL).scalar()
+    return float(lag or 0.0)
+
+def replica_ok() -> bool:
+    """Можно ли читать с реплики: она настроена, доступна и отстаёт не больше REPLICA_MAX_LAG_SECONDS.
+    Результат кэшируется на REPLICA_LAG_CHECK_SECONDS, чтобы не делать запрос на каждый вызов."""
+    if replica_engine is None:
+        return False
+    now = time.monotonic()
+    if now - _lag_state["checked_at"] < settings.REPLICA_LAG_CHECK_SECONDS:
+        return _lag_state["ok"]
+    with _lag_lock:
+        if now - _lag_state["checked_at"] < settings.REPLICA_LAG_CHECK_SECONDS:
+            return _lag_state["ok"]
+        try:
+            lag = _replica_lag_seconds()
+            ok = lag <= settings.REPLICA_MAX_LAG_SECONDS
+            if not ok:
+                log.warning("replica lag %.1fs > %.1fs, reading from primary", lag, settings.REPLICA_MAX_LAG_SECONDS)
+        except Exception as e:
+            log.warning("replica lag check failed, reading from primary: %s", e)
+            ok = False
+        _lag_state.update(checked_at=time.monotonic(), ok=ok)
+        return ok
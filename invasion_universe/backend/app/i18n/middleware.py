@@ -1,25 +1,43 @@
 from __future__ import annotations
 import re
 from contextvars import ContextVar
-from fastapi import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 current_locale: ContextVar[str] = ContextVar("current_locale", default="ru")
 
 _lang_re = re.compile(r"^[a-zA-Z-]+$")
 
-def pick_locale(request: Request) -> str:
-    hdr = request.headers.get("accept-language", "").split(",")[0].strip().lower()
+def pick_locale(accept_language: str) -> str:
+    hdr = accept_language.split(",")[0].strip().lower()
     if hdr and _lang_re.match(hdr):
         primary = hdr.split("-", 1)[0]
         if primary in ("ru", "en"):
             return primary
     return "ru"
 
-async def locale_middleware(request: Request, call_next):
-    loc = pick_locale(request)
-    token = current_locale.set(loc)
-    try:
-        resp = await call_next(request)
-    finally:
-        current_locale.reset(token)
-    return resp
+def scope_header(scope: Scope, name: bytes) -> str:
+    # заголовки в scope — список (lower-case bytes, bytes); без построения Headers/Request
+    for k, v in scope.get("headers") or ():
+        if k == name:
+            return v.decode("latin-1")
+    return ""
+
+class LocaleMiddleware:
+    """Чистый ASGI: выбирает локаль из accept-language и кладёт в current_locale.
+
+    В отличие от app.middleware('http') (BaseHTTPMiddleware) не создаёт Request,
+    отдельную задачу и поток для тела ответа — стриминг проходит как есть.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        token = current_locale.set(pick_locale(scope_header(scope, b"accept-language")))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_locale.reset(token)
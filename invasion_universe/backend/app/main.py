@@ -1,18 +1,68 @@
 from __future__ import annotations
-from fastapi import FastAPI
+import asyncio, logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import OperationalError
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.api.routes.health import router as health_router
 from app.api.routes.auth import router as auth_router
-from app.i18n.middleware import locale_middleware
+from app.i18n.middleware import LocaleMiddleware
 from app.api.routes.zones import router as zones_router
 from app.api.routes.booking import router as booking_router
 from app.api.routes.admin import router as admin_router
 from app.api.routes.devices import router as devices_router
+from app.api.routes.sync import router as sync_router
+from app.api.routes.waitlist import router as waitlist_router
+from app.api.routes.holds import router as holds_router
+from app.api.routes.bootstrap import router as bootstrap_router
+from app.services.catalog import get_catalog, start_catalog_listener, stop_catalog_listener
+from app.services.reminders import reminder_worker
+from app.utils.admission import AdmissionMiddleware
+from app.utils.capture import TrafficCaptureMiddleware, stop_capture
+from app.utils.errors import err
+from app.utils.locks import redis_url
+from app.utils.flight_recorder import FlightRecorderMiddleware, start_sampler, stop_sampler
 
-app = FastAPI(title=settings.APP_NAME)
+log = logging.getLogger("app")
 
-app.middleware('http')(locale_middleware)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # выполняется в каждом воркере (после fork при preload_app)
+    use_redis = bool(redis_url())
+    if use_redis:
+        start_catalog_listener()
+    try:
+        get_catalog()
+    except Exception as e:
+        log.warning("catalog warm-up failed, will load on first request: %s", e)
+    if settings.FLIGHT_RECORDER_ENABLED:
+        start_sampler()
+    stop_reminders = asyncio.Event()
+    reminders = asyncio.create_task(reminder_worker(stop_reminders)) if settings.REMINDER_WORKER_ENABLED and use_redis else None
+    yield
+    stop_catalog_listener()
+    stop_sampler()
+    stop_capture()
+    if reminders:
+        stop_reminders.set()
+        await reminders
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
+
+@app.exception_handler(OperationalError)
+async def db_operational_error(request: Request, exc: OperationalError):
+    # SQLite: чужой воркер держит запись дольше busy_timeout — клиенту «повторите», а не 500
+    if "database is locked" not in str(exc.orig):
+        raise exc
+    e = err("DB_BUSY", 503)
+    return JSONResponse({"detail": e.detail}, status_code=503, headers={"Retry-After": "1"})
+
+# самый внутренний: отказ 503 проходит через CORS, а ожидание в очереди видно самописцу
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
+app.add_middleware(LocaleMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,12 +72,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.CAPTURE_ENABLED:
+    app.add_middleware(TrafficCaptureMiddleware, router_app=app)
+
+# последним — самым внешним, чтобы время запроса включало все остальные middleware
+if settings.FLIGHT_RECORDER_ENABLED:
+    app.add_middleware(FlightRecorderMiddleware, router_app=app)
+
 app.include_router(health_router)
 app.include_router(auth_router)
 app.include_router(zones_router)
 app.include_router(booking_router)
 app.include_router(admin_router)
 app.include_router(devices_router)
+app.include_router(sync_router)
+app.include_router(waitlist_router)
+app.include_router(holds_router)
+app.include_router(bootstrap_router)
 
 @app.get("/")
 def root():
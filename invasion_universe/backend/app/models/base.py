@@ -1,5 +1,32 @@
 from __future__ import annotations
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 from sqlalchemy.orm import DeclarativeBase
 
 class Base(DeclarativeBase):
     pass
+
+# Значения колонок журнала изменений (/sync, app/services/sync.py) при INSERT/UPDATE.
+# Postgres — номер из sequence и id транзакции прямо в пишущем запросе; в остальных
+# диалектах NULL, номер проставляется при коммите из счётчика change_seq_counter.
+class NextChangeSeq(FunctionElement):
+    type = BigInteger()
+    inherit_cache = True
+
+class CurrentChangeXid(FunctionElement):
+    type = BigInteger()
+    inherit_cache = True
+
+@compiles(NextChangeSeq)
+@compiles(CurrentChangeXid)
+def _null(element, compiler, **kw) -> str:
+    return "NULL"
+
+@compiles(NextChangeSeq, "postgresql")
+def _pg_next_change_seq(element, compiler, **kw) -> str:
+    return "nextval('change_seq')"
+
+@compiles(CurrentChangeXid, "postgresql")
+def _pg_current_xid(element, compiler, **kw) -> str:
+    return "pg_current_xact_id()::text::bigint"
@@ -1,11 +1,15 @@
 from __future__ import annotations
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, DateTime, ForeignKey, Integer
+from sqlalchemy import String, DateTime, ForeignKey, Integer, BigInteger, Index
 from datetime import datetime
-from .base import Base
+from .base import Base, NextChangeSeq, CurrentChangeXid
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        Index("ix_bookings_user_change_seq", "user_id", "change_seq"),
+        Index("ix_bookings_user_change_xid", "user_id", "change_xid"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(index=True)
     seat_id: Mapped[int] = mapped_column(ForeignKey("seats.id", ondelete="RESTRICT"), index=True)
@@ -15,5 +19,8 @@ class Booking(Base):
     price_cents: Mapped[int] = mapped_column(Integer, default=0)
     penalty_cents: Mapped[int] = mapped_column(Integer, default=0)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    # номер последнего изменения и id транзакции для /sync (app/services/sync.py)
+    change_seq: Mapped[int | None] = mapped_column(BigInteger, index=True, nullable=True, default=NextChangeSeq(), onupdate=NextChangeSeq())
+    change_xid: Mapped[int | None] = mapped_column(BigInteger, index=True, nullable=True, default=CurrentChangeXid(), onupdate=CurrentChangeXid())
 
     seat: Mapped["Seat"] = relationship()
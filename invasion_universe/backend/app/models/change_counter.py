@@ -0,0 +1,10 @@
+from __future__ import annotations
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import BigInteger
+from .base import Base
+
+class ChangeCounter(Base):
+    # одна строка (id=1): последний выданный change_seq там, где нет sequence (SQLite)
+    __tablename__ = "change_seq_counter"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, default=0)
@@ -0,0 +1,15 @@
+from __future__ import annotations
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Boolean, ForeignKey, Integer
+from .base import Base
+
+class PricingRule(Base):
+    __tablename__ = "pricing_rules"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    zone_id: Mapped[int | None] = mapped_column(ForeignKey("zones.id", ondelete="CASCADE"), nullable=True)  # NULL — все зоны
+    seat_type: Mapped[str | None] = mapped_column(String(32), nullable=True)  # NULL — любой тип
+    weekdays: Mapped[int] = mapped_column(Integer, default=127)  # бит 0 = понедельник ... бит 6 = воскресенье
+    hour_from: Mapped[int] = mapped_column(Integer, default=0)  # [hour_from, hour_to), местное время клуба
+    hour_to: Mapped[int] = mapped_column(Integer, default=24)
+    multiplier_pct: Mapped[int] = mapped_column(Integer, default=100)  # 150 = +50% к базовой цене места
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
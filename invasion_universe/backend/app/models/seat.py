@@ -1,7 +1,7 @@
 from __future__ import annotations
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Boolean, ForeignKey, Integer
-from .base import Base
+from sqlalchemy import String, Boolean, ForeignKey, Integer, BigInteger
+from .base import Base, NextChangeSeq, CurrentChangeXid
 
 class Seat(Base):
     __tablename__ = "seats"
@@ -11,5 +11,8 @@ class Seat(Base):
     seat_type: Mapped[str] = mapped_column(String(32), default="standard")  # standard|vip
     hourly_price_cents: Mapped[int] = mapped_column(Integer, default=30000)  # 300 руб = 30000 коп.
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # для /sync, см. app/services/sync.py
+    change_seq: Mapped[int | None] = mapped_column(BigInteger, index=True, nullable=True, default=NextChangeSeq(), onupdate=NextChangeSeq())
+    change_xid: Mapped[int | None] = mapped_column(BigInteger, index=True, nullable=True, default=CurrentChangeXid(), onupdate=CurrentChangeXid())
 
     zone: Mapped["Zone"] = relationship(back_populates="seats")
@@ -0,0 +1,24 @@
+from __future__ import annotations
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, DateTime, ForeignKey, Boolean, Index, text
+from datetime import datetime, timezone
+from .base import Base
+
+class WaitlistEntry(Base):
+    __tablename__ = "waitlist"
+    __table_args__ = (
+        # поиск ждущих на освободившееся место/зону и интервал — по этим индексам
+        Index("ix_waitlist_seat_start", "seat_id", "start_time", postgresql_where=text("status = 'waiting'")),
+        Index("ix_waitlist_zone_start", "zone_id", "start_time", postgresql_where=text("status = 'waiting'")),
+    )
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(index=True)
+    seat_id: Mapped[int | None] = mapped_column(ForeignKey("seats.id", ondelete="CASCADE"), nullable=True)  # конкретное место
+    zone_id: Mapped[int | None] = mapped_column(ForeignKey("zones.id", ondelete="CASCADE"), nullable=True)  # или любое в зоне
+    seat_type: Mapped[str | None] = mapped_column(String(32), nullable=True)  # фильтр для зоны
+    start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    end_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    auto_book: Mapped[bool] = mapped_column(Boolean, default=False)  # сразу создать бронь (pending), а не только уведомить
+    status: Mapped[str] = mapped_column(String(16), default="waiting")  # waiting|notified|booked|cancelled
+    booking_id: Mapped[int | None] = mapped_column(nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Boolean
-from .base import Base
+from sqlalchemy import String, Boolean, BigInteger
+from .base import Base, NextChangeSeq, CurrentChangeXid
 
 class Zone(Base):
     __tablename__ = "zones"
@@ -9,5 +9,8 @@ class Zone(Base):
     name: Mapped[str] = mapped_column(String(120))
     code: Mapped[str] = mapped_column(String(64), unique=True, index=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # для /sync, см. app/services/sync.py
+    change_seq: Mapped[int | None] = mapped_column(BigInteger, index=True, nullable=True, default=NextChangeSeq(), onupdate=NextChangeSeq())
+    change_xid: Mapped[int | None] = mapped_column(BigInteger, index=True, nullable=True, default=CurrentChangeXid(), onupdate=CurrentChangeXid())
 
     seats: Mapped[list["Seat"]] = relationship(back_populates="zone", cascade="all, delete-orphan")
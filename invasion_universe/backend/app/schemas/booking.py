@@ -18,10 +18,24 @@ class BookingRead(BaseModel):
     class Config:
         from_attributes = True
 
+class GroupBookingCreate(BaseModel):
+    zone_id: int
+    size: int = Field(ge=2, le=12, description="Сколько мест рядом")
+    start_time: datetime
+    hours: int = Field(ge=1, le=24)
+    seat_type: str | None = Field(default=None, pattern="^(standard|vip)$")
+
+class GroupBookingRead(BaseModel):
+    same_row: bool = Field(description="False — блок разбит на два соседних ряда")
+    labels: list[str]
+    price_cents: int
+    bookings: list[BookingRead]
+
 class AvailabilitySlot(BaseModel):
     start_time: datetime
     end_time: datetime
     is_free: bool
+    price_cents: int
 
 class SeatAvailability(BaseModel):
     seat_id: int
@@ -33,3 +47,48 @@ class AvailabilityResponse(BaseModel):
     ZoneId: int | None = None
     SeatId: int | None = None
     items: list[SeatAvailability]
+
+class SeatAvailabilityCompact(BaseModel):
+    seat_id: int
+    label: str
+    free: int = Field(description="Битовая маска свободных слотов: бит i = слот i от day_start свободен")
+    tier: str = Field(description="Ключ ценового ряда в price_tiers")
+
+class AvailabilityCompactResponse(BaseModel):
+    date: date
+    day_start: datetime
+    slot_minutes: int = 60
+    slots: int = 24
+    zone_id: int | None = None
+    seat_id: int | None = None
+    price_tiers: dict[str, list[int]] = Field(
+        description="Цена слота i с учётом правил (пиковые часы, выходные) по ключу «зона:тип:базовая цена»"
+    )
+    items: list[SeatAvailabilityCompact]
+
+class FreeWindow(BaseModel):
+    seat_id: int
+    label: str
+    zone_id: int
+    seat_type: str
+    start_time: datetime
+    end_time: datetime
+    price_cents: int
+
+class FreeWindowsResponse(BaseModel):
+    hours: int
+    items: list[FreeWindow]
+
+class QuoteItem(BaseModel):
+    seat_id: int
+    start_time: datetime
+    hours: int = Field(ge=1, le=24)
+
+class QuoteRequest(BaseModel):
+    items: list[QuoteItem] = Field(min_length=1, max_length=500)
+
+class Quote(QuoteItem):
+    price_cents: int | None = Field(description="None — место не найдено или неактивно")
+
+class QuoteResponse(BaseModel):
+    items: list[Quote]
@@ -0,0 +1,19 @@
+from __future__ import annotations
+from pydantic import BaseModel, Field
+from app.schemas.booking import AvailabilityCompactResponse, BookingRead
+from app.schemas.device import DeviceRead
+from app.schemas.user import UserRead
+from app.schemas.zone import ZoneRead
+
+class ZoneLayout(BaseModel):
+    zone_id: int
+    rows: list[dict]
+
+class BootstrapResponse(BaseModel):
+    user: UserRead
+    zones: list[ZoneRead]
+    zone_id: int | None = Field(description="Зона, для которой отданы layout и availability (по умолчанию — первая)")
+    layout: ZoneLayout | None = None
+    availability: AvailabilityCompactResponse | None = None
+    bookings: list[BookingRead]
+    devices: list[DeviceRead]
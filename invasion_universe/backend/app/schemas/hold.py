@@ -0,0 +1,16 @@
+from __future__ import annotations
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+class HoldCreate(BaseModel):
+    seat_id: int
+    start_time: datetime
+    hours: int = Field(ge=1, le=24)
+
+class HoldRead(BaseModel):
+    id: str
+    seat_id: int
+    start_time: datetime
+    end_time: datetime
+    hours: int
+    expires_at: datetime
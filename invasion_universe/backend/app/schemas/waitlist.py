@@ -0,0 +1,24 @@
+from __future__ import annotations
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+class WaitlistCreate(BaseModel):
+    seat_id: int | None = None
+    zone_id: int | None = None
+    seat_type: str | None = Field(default=None, pattern="^(standard|vip)$")
+    start_time: datetime
+    hours: int = Field(ge=1, le=24)
+    auto_book: bool = False
+
+class WaitlistRead(BaseModel):
+    id: int
+    seat_id: int | None
+    zone_id: int | None
+    seat_type: str | None
+    start_time: datetime
+    end_time: datetime
+    auto_book: bool
+    status: str
+    booking_id: int | None
+    class Config:
+        from_attributes = True
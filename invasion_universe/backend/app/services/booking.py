@@ -1,13 +1,26 @@
 from __future__ import annotations
+import heapq, logging, math
+from bisect import bisect_left
+from itertools import islice
 from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import select, and_, or_
 from app.models.booking import Booking
+from app.models.device import Device
 from app.models.seat import Seat
 from app.utils.errors import err
 from app.utils.penalty import compute_penalty_cents
 from app.utils.locks import acquire_lock, release_lock, seat_lock_key
+from app.utils.replica import mark_recent_write
+from app.services.catalog import get_catalog, row_index, SeatEntry
+from app.services.reminders import schedule_reminders, unschedule_reminders
+from app.services.waitlist import match_waitlist_safe
+from app.services.holds import seat_holds
+from app.services.notify import push_in_background
+from app.utils.sqlite_profile import begin_write
+
+log = logging.getLogger("booking")
 
 BOOKING_ACTIVE_STATUSES = ("pending", "paid", "completed")
 
@@ -20,35 +33,48 @@ def _validate_alignment(start: datetime):
     if any([start.minute, start.second, start.microsecond]):
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="start_time must be aligned to full hour")
 
-def check_conflict(db: Session, seat_id: int, start: datetime, end: datetime) -> bool:
+def check_conflict(
+    db: Session, seat_id: int, start: datetime, end: datetime, holds: bool = True, exclude_hold: str | None = None,
+) -> bool:
     # Конфликт, если есть брони этого места с активным статусом, пересекающие интервал
     stmt = select(Booking.id).where(
         Booking.seat_id == seat_id,
         Booking.status.in_(BOOKING_ACTIVE_STATUSES),
         ~or_(Booking.end_time <= start, Booking.start_time >= end)
     ).limit(1)
-    return db.scalar(stmt) is not None
+    if db.scalar(stmt) is not None:
+        return True
+    # ...или чужое живое удержание (Redis)
+    return holds and bool(seat_holds([seat_id], start, end, exclude_hold=exclude_hold))
 
-def create_booking(db: Session, user_id: int, seat_id: int, start: datetime, hours: int) -> Booking:
+def validate_slot(seat_id: int, start: datetime, hours: int) -> tuple[SeatEntry, datetime]:
     if start.tzinfo is None:
         raise err("START_ALIGN", 422)
     _validate_alignment(start)
     end = start + timedelta(hours=hours)
     if end <= start:
         raise err("HOURS_MIN", 422)
+    seat = get_catalog().seat(seat_id)
+    if not seat or not seat.is_active:
+        raise err("SEAT_NOT_FOUND", 404)
+    return seat, end
+
+def create_booking(
+    db: Session, user_id: int, seat_id: int, start: datetime, hours: int, hold_id: str | None = None,
+) -> Booking:
+    seat, end = validate_slot(seat_id, start, hours)
 
     lock_key = seat_lock_key(seat_id, start.isoformat(), end.isoformat())
     if not acquire_lock(lock_key, ttl_seconds=300):
         raise err("TEMP_LOCKED", 409)
 
     try:
-        seat = db.get(Seat, seat_id)
-        if not seat or not seat.is_active:
-            raise err("SEAT_NOT_FOUND", 404)
-        if check_conflict(db, seat_id, start, end):
+        begin_write(db)  # SQLite: проверка и вставка — под очередью записей процесса
+        # hold_id — бронь из своего удержания: оно само конфликтом не считается
+        if check_conflict(db, seat_id, start, end, exclude_hold=hold_id):
             raise err("SLOT_CONFLICT", 409)
 
-        price_cents = seat.hourly_price_cents * hours
+        price_cents = get_catalog().price_cents(seat, start, hours)
         booking = Booking(
             user_id=user_id, seat_id=seat_id,
             start_time=start, end_time=end,
@@ -57,27 +83,25 @@ def create_booking(db: Session, user_id: int, seat_id: int, start: datetime, hou
         db.add(booking)
         db.commit()
         db.refresh(booking)
+        mark_recent_write(user_id)
+        schedule_reminders(booking.id, start)
         
-        # уведомление о создании (fire-and-forget)
-        try:
-            from app.services.notify import send_push_fcm
-            from sqlalchemy import select
-            from app.models.device import Device
-            tokens = db.scalars(select(Device.token).where(Device.user_id == user_id)).all()
-            for t in tokens:
-                # не await — это синхронный код; можно игнорировать
-                import asyncio
-                asyncio.create_task(send_push_fcm(
-                    t, "Бронь создана", f"Место #{seat_id}, старт {start.isoformat()}",
-                    {"type": "booking_created", "booking_id": str(booking.id)}
-                ))
-        except Exception:
-            pass
+        # уведомление о создании: пуш в фоне, ответ его не ждёт
+        _notify_user(db, user_id, "Бронь создана", f"Место #{seat_id}, старт {start.isoformat()}",
+                     {"type": "booking_created", "booking_id": str(booking.id)})
         
         return booking
     finally:
         release_lock(lock_key)
 
+def _notify_user(db: Session, user_id: int, title: str, body: str, data: dict) -> None:
+    # синхронный код в потоке пула: пуш уходит задачей в event loop приложения (notify.push_in_background)
+    try:
+        tokens = list(db.scalars(select(Device.token).where(Device.user_id == user_id)).all())
+        push_in_background(tokens, title, body, data)
+    except Exception:
+        log.exception("push to user %s not scheduled", user_id)
+
 def cancel_booking(db: Session, user_id: int, booking_id: int) -> Booking:
     booking = db.get(Booking, booking_id)
     if not booking or booking.user_id != user_id:
@@ -90,65 +114,282 @@ def cancel_booking(db: Session, user_id: int, booking_id: int) -> Booking:
     db.add(booking)
     db.commit()
     db.refresh(booking)
-    
-    try:
-        from app.services.notify import send_push_fcm
-        from sqlalchemy import select
-        from app.models.device import Device
-        tokens = db.scalars(select(Device.token).where(Device.user_id == user_id)).all()
-        import asyncio
-        for t in tokens:
-            asyncio.create_task(send_push_fcm(
-                t, "Бронь отменена", f"Штраф: {penalty/100:.0f} ₽",
-                {"type": "booking_cancelled", "booking_id": str(booking.id)}
-            ))
-    except Exception:
-        pass
+    mark_recent_write(user_id)
+    unschedule_reminders(booking.id)
+    match_waitlist_safe(db, booking.seat_id, booking.start_time, booking.end_time)
+    _notify_user(db, user_id, "Бронь отменена", f"Штраф: {penalty/100:.0f} ₽",
+                 {"type": "booking_cancelled", "booking_id": str(booking.id)})
     
     return booking
 
-def seat_availability(db: Session, date_utc: datetime, zone_id: int | None = None, seat_id: int | None = None):
-    # строим 24 одночасовых слота в пределах даты (UTC)
-    day_start = date_utc.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
-    day_end = day_start + timedelta(days=1)
+SLOTS_PER_DAY = 24
+FULL_DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+
+def day_start_utc(date_utc: datetime) -> datetime:
+    return date_utc.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
 
-    # выбор мест
-    from app.models.zone import Zone
-    q = select(Seat).join(Zone).where(Seat.is_active == True, Zone.is_active == True)  # noqa
-    if zone_id:
-        q = q.where(Seat.zone_id == zone_id)
-    if seat_id:
-        q = q.where(Seat.id == seat_id)
-    seats = db.scalars(q).all()
-
-    # вытягиваем брони по всем выбранным местам за день
-    bq = select(Booking).where(
-        Booking.seat_id.in_([s.id for s in seats] or [0]),
+def busy_mask(start: datetime, end: datetime, day_start: datetime) -> int:
+    # биты часовых слотов суток, пересекающихся с [start, end): бит i — час i от day_start
+    lo = max(0, math.floor((start - day_start).total_seconds() / 3600))
+    hi = min(SLOTS_PER_DAY, math.ceil((end - day_start).total_seconds() / 3600))
+    if hi <= lo:
+        return 0
+    return ((1 << hi) - 1) ^ ((1 << lo) - 1)
+
+def availability_seats(
+    db: Session, zone_id: int | None = None, seat_id: int | None = None, seat_type: str | None = None
+) -> list[SeatEntry]:
+    # активные места активных зон — из каталога в памяти, без запроса в БД
+    return get_catalog().bookable_seats(zone_id=zone_id, seat_id=seat_id, seat_type=seat_type)
+
+def seat_free_masks(db: Session, day_start: datetime, seat_ids: list[int]) -> dict[int, int]:
+    """Маска свободных часов на сутки для каждого места (бит i = час i свободен)."""
+    day_end = day_start + timedelta(days=1)
+    masks = {sid: FULL_DAY_MASK for sid in seat_ids}
+    # только нужные колонки, без ORM-объектов броней
+    bq = select(Booking.seat_id, Booking.start_time, Booking.end_time).where(
+        Booking.seat_id.in_(seat_ids or [0]),
         ~or_(Booking.end_time <= day_start, Booking.start_time >= day_end),
         Booking.status.in_(BOOKING_ACTIVE_STATUSES)
     )
-    bookings = db.scalars(bq).all()
-    bookings_by_seat: dict[int, list[Booking]] = {}
-    for b in bookings:
-        bookings_by_seat.setdefault(b.seat_id, []).append(b)
+    for sid, start, end in db.execute(bq):
+        masks[sid] &= ~busy_mask(start, end, day_start)
+    # удержания на время оплаты тоже занимают слоты
+    for sid, spans in seat_holds(seat_ids, day_start, day_end).items():
+        for start, end in spans:
+            masks[sid] &= ~busy_mask(start, end, day_start)
+    return masks
+
+def seat_availability(db: Session, date_utc: datetime, zone_id: int | None = None, seat_id: int | None = None):
+    # строим 24 одночасовых слота в пределах даты (UTC)
+    day_start = day_start_utc(date_utc)
+    seats = availability_seats(db, zone_id=zone_id, seat_id=seat_id)
+    masks = seat_free_masks(db, day_start, [s.id for s in seats])
+    catalog = get_catalog()
 
+    bounds = [day_start + timedelta(hours=i) for i in range(SLOTS_PER_DAY + 1)]
     items = []
     for s in seats:
-        slots = []
-        t = day_start
-        while t < day_end:
-            t2 = t + timedelta(hours=1)
-            # пересечение с любой бронью?
-            conflict = False
-            for b in bookings_by_seat.get(s.id, []):
-                if not (b.end_time <= t or b.start_time >= t2):
-                    conflict = True
-                    break
-            slots.append({
-                "start_time": t.isoformat(),
-                "end_time": t2.isoformat(),
-                "is_free": not conflict
-            })
-            t = t2
+        mask = masks[s.id]
+        prices = catalog.hourly_prices(s, day_start, SLOTS_PER_DAY)
+        # datetime, а не isoformat(): сериализует FastJSONResponse, без повторного парсинга
+        slots = [
+            {"start_time": bounds[i], "end_time": bounds[i + 1], "is_free": bool(mask >> i & 1), "price_cents": prices[i]}
+            for i in range(SLOTS_PER_DAY)
+        ]
         items.append({"seat_id": s.id, "label": s.label, "slots": slots})
     return items
+
+def seat_availability_compact(db: Session, date_utc: datetime, zone_id: int | None = None, seat_id: int | None = None):
+    # v2: вместо 24 слотов на место — одно число-маска свободных часов и ключ ценового ряда;
+    # сами цены по часам — один вектор на (зона, тип места, базовая цена) на весь ответ
+    day_start = day_start_utc(date_utc)
+    seats = availability_seats(db, zone_id=zone_id, seat_id=seat_id)
+    masks = seat_free_masks(db, day_start, [s.id for s in seats])
+    catalog = get_catalog()
+    tiers: dict[str, list[int]] = {}
+    items = []
+    for s in seats:
+        tier = f"{s.zone_id}:{s.seat_type}:{s.hourly_price_cents}"
+        if tier not in tiers:
+            tiers[tier] = catalog.hourly_prices(s, day_start, SLOTS_PER_DAY)
+        items.append({"seat_id": s.id, "label": s.label, "free": masks[s.id], "tier": tier})
+    return day_start, tiers, items
+
+def _gap_windows(seat_id: int, gap_start: datetime, gap_end: datetime, hours: int, start_before: datetime):
+    # окна длиной hours, начинающиеся на целый час внутри свободного промежутка
+    dur = timedelta(hours=hours)
+    t = _ceil_to_hour(gap_start)
+    while t < start_before and t + dur <= gap_end:
+        yield t, seat_id
+        t += timedelta(hours=1)
+
+def _seat_windows(seat_id: int, intervals: list[tuple[datetime, datetime]], t0: datetime, t1: datetime, hours: int):
+    # intervals отсортированы по началу; идём по промежуткам между бронями
+    cur = t0
+    horizon_end = t1 + timedelta(hours=hours)
+    for start, end in intervals:
+        if start > cur:
+            yield from _gap_windows(seat_id, cur, start, hours, t1)
+        cur = max(cur, end)
+        if cur >= t1:
+            return
+    yield from _gap_windows(seat_id, cur, horizon_end, hours, t1)
+
+def find_free_windows(
+    db: Session, start_from: datetime, horizon: timedelta, hours: int, limit: int,
+    zone_id: int | None = None, seat_type: str | None = None,
+) -> list[dict]:
+    """Ближайшие limit окон (место, начало) длиной hours в пределах горизонта.
+
+    Брони всех мест берутся одним запросом (только seat_id/start/end, по возрастанию),
+    по каждому месту — ленивый генератор окон в промежутках между бронями,
+    heapq.merge сливает их по времени и останавливается на limit результатах.
+    """
+    t0 = _ceil_to_hour(start_from)
+    t1 = t0 + horizon
+    seats = {s.id: s for s in availability_seats(db, zone_id=zone_id, seat_type=seat_type)}
+    if not seats:
+        return []
+
+    bq = select(Booking.seat_id, Booking.start_time, Booking.end_time).where(
+        Booking.seat_id.in_(list(seats)),
+        Booking.status.in_(BOOKING_ACTIVE_STATUSES),
+        Booking.end_time > t0,
+        Booking.start_time < t1 + timedelta(hours=hours),
+    ).order_by(Booking.seat_id, Booking.start_time)
+    by_seat: dict[int, list[tuple[datetime, datetime]]] = {sid: [] for sid in seats}
+    for sid, start, end in db.execute(bq):
+        by_seat[sid].append((start, end))
+    for sid, spans in seat_holds(list(seats), t0, t1 + timedelta(hours=hours)).items():
+        by_seat[sid] = sorted(by_seat[sid] + spans)
+
+    gens = [_seat_windows(sid, by_seat[sid], t0, t1, hours) for sid in seats]
+    catalog = get_catalog()
+    items = []
+    for start, sid in islice(heapq.merge(*gens), limit):
+        s = seats[sid]
+        items.append({
+            "seat_id": sid, "label": s.label, "zone_id": s.zone_id, "seat_type": s.seat_type,
+            "start_time": start, "end_time": start + timedelta(hours=hours),
+            "price_cents": catalog.price_cents(s, start, hours),
+        })
+    return items
+
+def quote_prices(items: list[tuple[int, datetime, int]]) -> list[int | None]:
+    """Цены для пачки (seat_id, start, hours); None — место не найдено или неактивно."""
+    catalog = get_catalog()
+    out: list[int | None] = []
+    for seat_id, start, hours in items:
+        s = catalog.seat(seat_id)
+        out.append(catalog.price_cents(s, start, hours) if s and s.is_active else None)
+    return out
+
+# ===== Групповая бронь: соседние места по рядам из меток =====
+GROUP_ATTEMPTS = 3
+
+def _busy_seat_ids(db: Session, seat_ids: list[int], start: datetime, end: datetime) -> set[int]:
+    # занятость всех мест сразу: один запрос броней + один pipeline удержаний
+    busy = set(db.scalars(select(Booking.seat_id).where(
+        Booking.seat_id.in_(seat_ids or [0]),
+        Booking.status.in_(BOOKING_ACTIVE_STATUSES),
+        ~or_(Booking.end_time <= start, Booking.start_time >= end)
+    ).distinct()))
+    busy.update(seat_holds(seat_ids, start, end))
+    return busy
+
+def _free_runs(seats: list[tuple[int, SeatEntry]], busy: set[int], seat_type: str | None) -> list[list[tuple[int, SeatEntry]]]:
+    # отрезки ряда из свободных мест с номерами подряд
+    runs: list[list[tuple[int, SeatEntry]]] = []
+    cur: list[tuple[int, SeatEntry]] = []
+    for col, s in seats:
+        if s.id in busy or (seat_type and s.seat_type != seat_type):
+            cur = []
+            continue
+        if not cur or col != cur[-1][0] + 1:
+            cur = []
+            runs.append(cur)
+        cur.append((col, s))
+    return runs
+
+def _windows(runs: list[list[tuple[int, SeatEntry]]], k: int) -> list[tuple[int, list[tuple[int, SeatEntry]], int]]:
+    # все окна из k мест подряд: (удвоенный центр окна, отрезок, начало в отрезке), по возрастанию номеров
+    return [(run[j][0] + run[j + k - 1][0], run, j) for run in runs for j in range(len(run) - k + 1)]
+
+def find_group_block(
+    rows: list[tuple[str, list[tuple[int, SeatEntry]]]], busy: set[int], size: int, seat_type: str | None = None,
+) -> tuple[list[SeatEntry], bool] | None:
+    """Лучший блок из size свободных мест рядом; (места, в одном ряду ли) или None.
+
+    Сначала один ряд: самый короткий подходящий отрезок свободных мест (крупные остаются
+    другим группам), затем ряд и номер. Иначе — две части (size/2 с округлением в обе стороны)
+    в соседних рядах с ближайшими центрами. Соседние ряды — соседние буквы (row_index), а не
+    соседние в списке: ряд без активных мест разрывает соседство. Проход по местам линейный,
+    пара ищется bisect.
+    """
+    free = [(row_index(row), _free_runs(seats, busy, seat_type)) for row, seats in rows if row != "?"]
+    best = None
+    for i, runs in free:
+        for run in runs:
+            if len(run) >= size:
+                key = (len(run) - size, i, run[0][0])
+                if best is None or key < best[0]:
+                    best = (key, run[:size])
+    if best is not None:
+        return [s for _, s in best[1]], True
+
+    half = (size + 1) // 2
+    best = None
+    for (i, upper), (k, lower_runs) in zip(free, free[1:]):
+        if k != i + 1:
+            continue
+        for a, b in {(half, size - half), (size - half, half)}:
+            lower = _windows(lower_runs, b)
+            if not lower:
+                continue
+            centers = [w[0] for w in lower]
+            for center, run, j in _windows(upper, a):
+                p = bisect_left(centers, center)
+                for q in (p - 1, p):
+                    if 0 <= q < len(lower):
+                        key = (abs(centers[q] - center), i, center)
+                        if best is None or key < best[0]:
+                            best = (key, run[j:j + a], lower[q][1][lower[q][2]:lower[q][2] + b])
+    if best is None:
+        return None
+    return [s for _, s in best[1] + best[2]], False
+
+def create_group_booking(
+    db: Session, user_id: int, zone_id: int, size: int, start: datetime, hours: int, seat_type: str | None = None,
+) -> tuple[list[Booking], bool]:
+    """Подбирает блок соседних мест (find_group_block) и бронирует его одной транзакцией:
+    все брони или ни одной. Если место блока заняли между поиском и блокировкой — поиск заново."""
+    if start.tzinfo is None:
+        raise err("START_ALIGN", 422)
+    _validate_alignment(start)
+    end = start + timedelta(hours=hours)
+    catalog = get_catalog()
+    zone = catalog.zones.get(zone_id)
+    if not zone or not zone.is_active:
+        raise err("ZONE_NOT_FOUND", 404)
+    rows = catalog.zone_rows(zone_id)
+    seat_ids = [s.id for _, seats in rows for _, s in seats]
+    locked: set[int] = set()  # чужие блокировки: на следующей попытке эти места не предлагаем
+
+    for _ in range(GROUP_ATTEMPTS):
+        found = find_group_block(rows, _busy_seat_ids(db, seat_ids, start, end) | locked, size, seat_type)
+        if found is None:
+            raise err("GROUP_NO_BLOCK", 409)
+        block, same_row = found
+        taken: list[str] = []
+        try:
+            for s in block:
+                key = seat_lock_key(s.id, start.isoformat(), end.isoformat())
+                if not acquire_lock(key, ttl_seconds=300):
+                    locked.add(s.id)
+                    break
+                taken.append(key)
+            else:
+                begin_write(db)
+                if _busy_seat_ids(db, [s.id for s in block], start, end):
+                    db.rollback()
+                    continue
+                bookings = [
+                    Booking(
+                        user_id=user_id, seat_id=s.id, start_time=start, end_time=end,
+                        status="pending", price_cents=catalog.price_cents(s, start, hours), penalty_cents=0,
+                    )
+                    for s in block
+                ]
+                db.add_all(bookings)
+                db.commit()
+                for b in bookings:
+                    db.refresh(b)
+                mark_recent_write(user_id)
+                for b in bookings:
+                    schedule_reminders(b.id, start)
+                return bookings, same_row
+        finally:
+            for key in taken:
+                release_lock(key)
+    raise err("TEMP_LOCKED", 409)
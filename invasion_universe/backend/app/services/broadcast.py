@@ -0,0 +1,144 @@
+from __future__ import annotations
+import asyncio, logging, threading, time, uuid
+from datetime import datetime, date, timedelta, timezone
+from sqlalchemy import select
+from app.config import settings
+from app.db import SessionLocal
+from app.models.booking import Booking
+from app.models.device import Device
+from app.models.seat import Seat
+from app.services.devices import report_invalid_tokens, flush_invalid_tokens, PRUNE_BATCH_SIZE
+from app.services.notify import send_push_fcm_multicast, FCM_MAX_TOKENS_PER_REQUEST
+from app.utils.locks import get_redis
+
+log = logging.getLogger("broadcast")
+
+# Прогресс рассылки — Redis-хэш broadcast:{id}, чтобы его видел любой воркер;
+# без Redis — словарь в памяти воркера, который ведёт рассылку. Клиент Redis синхронный:
+# из корутин _set/_incr вызываются через asyncio.to_thread, как в reminders.py.
+PROGRESS_TTL_SECONDS = 7 * 24 * 3600
+_local_progress: dict[str, dict] = {}
+_local_lock = threading.Lock()  # _set/_incr идут из потоков to_thread
+_tasks: set[asyncio.Task] = set()  # держим ссылки, иначе фоновые задачи может собрать GC
+
+def _progress_key(campaign_id: str) -> str:
+    return f"broadcast:{campaign_id}"
+
+def _set(campaign_id: str, **fields) -> None:
+    with _local_lock:
+        _local_progress.setdefault(campaign_id, {}).update(fields)
+    try:
+        r = get_redis()
+        r.hset(_progress_key(campaign_id), mapping={k: str(v) for k, v in fields.items()})
+        r.expire(_progress_key(campaign_id), PROGRESS_TTL_SECONDS)
+    except Exception:
+        pass
+
+def _incr(campaign_id: str, **deltas: int) -> None:
+    with _local_lock:
+        p = _local_progress.setdefault(campaign_id, {})
+        for k, v in deltas.items():
+            p[k] = int(p.get(k, 0)) + v
+    try:
+        pipe = get_redis().pipeline()
+        for k, v in deltas.items():
+            pipe.hincrby(_progress_key(campaign_id), k, v)
+        pipe.execute()
+    except Exception:
+        pass
+
+def get_progress(campaign_id: str) -> dict | None:
+    try:
+        raw = get_redis().hgetall(_progress_key(campaign_id))
+    except Exception:
+        raw = None
+    p = raw or _local_progress.get(campaign_id)
+    if not p:
+        return None
+    out = {"id": campaign_id}
+    for k, v in p.items():
+        out[k] = int(v) if k in ("total", "sent", "failed", "invalid") else v
+    return out
+
+def _audience_chunk(
+    after_id: int, limit: int, zone_id: int | None, date_from: date | None, date_to: date | None, statuses: list[str]
+) -> list[tuple[int, str]]:
+    # keyset-пагинация по devices.id: короткие запросы вместо одного долгого курсора
+    users = select(Booking.user_id).where(Booking.status.in_(statuses))
+    if zone_id:
+        users = users.join(Seat, Seat.id == Booking.seat_id).where(Seat.zone_id == zone_id)
+    if date_from:
+        users = users.where(Booking.start_time >= datetime(date_from.year, date_from.month, date_from.day, tzinfo=timezone.utc))
+    if date_to:
+        end = datetime(date_to.year, date_to.month, date_to.day, tzinfo=timezone.utc) + timedelta(days=1)
+        users = users.where(Booking.start_time < end)
+    q = (
+        select(Device.id, Device.token)
+        .where(Device.user_id.in_(users), Device.id > after_id)
+        .order_by(Device.id)
+        .limit(limit)
+    )
+    with SessionLocal() as db:
+        return [(r.id, r.token) for r in db.execute(q)]
+
+async def _run(campaign_id: str, title: str, body: str, data: dict, audience: dict) -> None:
+    import httpx
+    await asyncio.to_thread(_set, campaign_id, status="running", started_at=datetime.now(timezone.utc).isoformat())
+    t0 = time.monotonic()
+    batch_size = min(settings.BROADCAST_BATCH_SIZE, FCM_MAX_TOKENS_PER_REQUEST)
+    sem = asyncio.Semaphore(settings.BROADCAST_CONCURRENCY)
+    pending: set[asyncio.Task] = set()
+
+    async def send(client: httpx.AsyncClient, tokens: list[str]) -> None:
+        try:
+            ok, failed, invalid = await send_push_fcm_multicast(client, tokens, title, body, data)
+            await asyncio.to_thread(_incr, campaign_id, sent=ok, failed=failed, invalid=len(invalid))
+            report_invalid_tokens(invalid)
+        finally:
+            sem.release()
+
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            after_id = 0
+            while True:
+                # запрос к БД — в потоке, чтобы не блокировать event loop
+                chunk = await asyncio.to_thread(_audience_chunk, after_id, settings.BROADCAST_CHUNK_SIZE, **audience)
+                if not chunk:
+                    break
+                after_id = chunk[-1][0]
+                # мёртвые токены прошлых пачек удаляем по ходу, пачками (keyset по id не сбивается)
+                await asyncio.to_thread(flush_invalid_tokens, PRUNE_BATCH_SIZE)
+                await asyncio.to_thread(_incr, campaign_id, total=len(chunk))
+                tokens = [t for _, t in chunk]
+                for i in range(0, len(tokens), batch_size):
+                    await sem.acquire()  # не больше BROADCAST_CONCURRENCY запросов к FCM одновременно
+                    task = asyncio.create_task(send(client, tokens[i:i + batch_size]))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        await asyncio.to_thread(flush_invalid_tokens)
+        await asyncio.to_thread(
+            _set, campaign_id, status="done", finished_at=datetime.now(timezone.utc).isoformat(),
+            duration_ms=int((time.monotonic() - t0) * 1000),
+        )
+    except Exception as e:
+        log.exception("broadcast %s failed", campaign_id)
+        await asyncio.to_thread(_set, campaign_id, status="failed", error=str(e)[:500])
+
+async def start_broadcast(
+    title: str, body: str, data: dict | None = None, *,
+    zone_id: int | None = None, date_from: date | None = None, date_to: date | None = None,
+    statuses: list[str] | None = None,
+) -> str:
+    """Запускает рассылку фоновой задачей в текущем event loop и возвращает её id, не дожидаясь отправки."""
+    campaign_id = uuid.uuid4().hex[:16]
+    await asyncio.to_thread(_set, campaign_id, status="queued", total=0, sent=0, failed=0, invalid=0, title=title)
+    audience = {
+        "zone_id": zone_id, "date_from": date_from, "date_to": date_to,
+        "statuses": statuses or ["pending", "paid"],
+    }
+    task = asyncio.create_task(_run(campaign_id, title, body, data or {}, audience))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return campaign_id
@@ -0,0 +1,223 @@
+from __future__ import annotations
+import itertools, logging, os, re, threading, time
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import select
+from app.config import settings
+from app.db import SessionLocal
+from app.models.seat import Seat
+from app.models.zone import Zone
+from app.models.pricing_rule import PricingRule
+from app.services.pricing import PriceBook, PricingRuleEntry
+from app.utils.locks import get_redis, redis_url
+
+# Каталог зон, мест и правил цен в памяти воркера: маленький и почти не меняется, а читается
+# почти каждым запросом. Изменения (админские эндпоинты) вызывают invalidate_catalog():
+# локально каталог помечается устаревшим, остальным воркерам уходит сообщение в Redis pub/sub.
+
+log = logging.getLogger("catalog")
+
+CHANNEL = "catalog:invalidate"
+ROW_RE = re.compile(r"^([A-Za-z]+)(\d+)$")
+
+def parse_label(label: str) -> tuple[str, int]:
+    # "b12" -> ("B", 12); метка не по схеме ряд+номер -> ("?", 0)
+    m = ROW_RE.match(label or "")
+    return (m.group(1).upper(), int(m.group(2))) if m else ("?", 0)
+
+def row_index(row: str) -> int:
+    # порядковый номер ряда: A=0 … Z=25, AA=26, AB=27 …; соседние ряды — соседние номера.
+    # Сравнение по номеру = сначала по длине, потом по буквам (Z раньше AA). "?" -> -1
+    if row == "?":
+        return -1
+    n = 0
+    for ch in row:
+        n = n * 26 + ord(ch) - 64
+    return n - 1
+
+@dataclass(frozen=True, slots=True)
+class ZoneEntry:
+    id: int
+    name: str
+    code: str
+    is_active: bool
+
+@dataclass(frozen=True, slots=True)
+class SeatEntry:
+    id: int
+    zone_id: int
+    label: str
+    seat_type: str
+    hourly_price_cents: int
+    is_active: bool
+
+class Catalog:
+    def __init__(
+        self, zones: dict[int, ZoneEntry], seats: dict[int, SeatEntry], generation: int,
+        rules: list[PricingRuleEntry] | None = None,
+    ):
+        self.zones = zones
+        self.seats = seats
+        self.generation = generation
+        self.loaded_at = time.monotonic()
+        self.seats_by_zone: dict[int, list[SeatEntry]] = {}
+        for s in sorted(seats.values(), key=lambda s: s.id):
+            self.seats_by_zone.setdefault(s.zone_id, []).append(s)
+        self._rows: dict[int, list[tuple[str, list[tuple[int, SeatEntry]]]]] = {}
+        self.rules = rules or []
+        self.prices = PriceBook(self.rules, {(s.zone_id, s.seat_type) for s in seats.values()})
+
+    def price_cents(self, seat: SeatEntry, start: datetime, hours: int) -> int:
+        return self.prices.price_cents(seat.zone_id, seat.seat_type, seat.hourly_price_cents, start, hours)
+
+    def hourly_prices(self, seat: SeatEntry, start: datetime, hours: int) -> list[int]:
+        return self.prices.hourly_prices(seat.zone_id, seat.seat_type, seat.hourly_price_cents, start, hours)
+
+    def active_zones(self) -> list[ZoneEntry]:
+        return sorted((z for z in self.zones.values() if z.is_active), key=lambda z: z.id)
+
+    def seat(self, seat_id: int) -> SeatEntry | None:
+        return self.seats.get(seat_id)
+
+    def zone_seats(self, zone_id: int) -> list[SeatEntry]:
+        # активные места зоны по id
+        return [s for s in self.seats_by_zone.get(zone_id, ()) if s.is_active]
+
+    def zone_rows(self, zone_id: int) -> list[tuple[str, list[tuple[int, SeatEntry]]]]:
+        """Активные места зоны по рядам из меток: [(ряд, [(номер, место), ...]), ...],
+        ряды по row_index (метки не по схеме — в конце), места по номеру. Строится один раз на снимок каталога."""
+        rows = self._rows.get(zone_id)
+        if rows is None:
+            by_row: dict[str, list[tuple[int, SeatEntry]]] = {}
+            for s in self.zone_seats(zone_id):
+                row, col = parse_label(s.label)
+                by_row.setdefault(row, []).append((col, s))
+            rows = self._rows[zone_id] = [
+                (row, sorted(seats, key=lambda x: (x[0], x[1].id)))
+                for row, seats in sorted(by_row.items(), key=lambda x: (x[0] == "?", row_index(x[0])))
+            ]
+        return rows
+
+    def bookable_seats(
+        self, zone_id: int | None = None, seat_id: int | None = None, seat_type: str | None = None
+    ) -> list[SeatEntry]:
+        # активные места в активных зонах (как select(Seat).join(Zone) в seat_availability)
+        if seat_id:
+            s = self.seats.get(seat_id)
+            candidates = [s] if s else []
+        elif zone_id:
+            candidates = self.seats_by_zone.get(zone_id, [])
+        else:
+            candidates = sorted(self.seats.values(), key=lambda s: s.id)
+        out = []
+        for s in candidates:
+            z = self.zones.get(s.zone_id)
+            if not s.is_active or not z or not z.is_active:
+                continue
+            if zone_id and s.zone_id != zone_id:
+                continue
+            if seat_type and s.seat_type != seat_type:
+                continue
+            out.append(s)
+        return out
+
+_generations = itertools.count(1)
+_generation = next(_generations)
+_current: Catalog | None = None
+_load_lock = threading.Lock()
+
+def _fresh(cat: Catalog | None) -> bool:
+    return (
+        cat is not None
+        and cat.generation == _generation
+        and time.monotonic() - cat.loaded_at < settings.CATALOG_MAX_AGE_SECONDS
+    )
+
+def _load(generation: int) -> Catalog:
+    with SessionLocal() as db:
+        zones = {
+            r.id: ZoneEntry(r.id, r.name, r.code, r.is_active)
+            for r in db.execute(select(Zone.id, Zone.name, Zone.code, Zone.is_active))
+        }
+        seats = {
+            r.id: SeatEntry(r.id, r.zone_id, r.label, r.seat_type, r.hourly_price_cents, r.is_active)
+            for r in db.execute(select(
+                Seat.id, Seat.zone_id, Seat.label, Seat.seat_type, Seat.hourly_price_cents, Seat.is_active
+            ))
+        }
+        rules = [
+            PricingRuleEntry(r.id, r.zone_id, r.seat_type, r.weekdays, r.hour_from, r.hour_to, r.multiplier_pct)
+            for r in db.execute(select(
+                PricingRule.id, PricingRule.zone_id, PricingRule.seat_type, PricingRule.weekdays,
+                PricingRule.hour_from, PricingRule.hour_to, PricingRule.multiplier_pct,
+            ).where(PricingRule.is_active.is_(True)).order_by(PricingRule.id))
+        ]
+    return Catalog(zones, seats, generation, rules)
+
+def get_catalog() -> Catalog:
+    """Текущий снимок каталога; перечитывается из БД, только если его пометили устаревшим
+    (или он старше CATALOG_MAX_AGE_SECONDS — страховка на случай потерянного сообщения)."""
+    global _current
+    cat = _current
+    if _fresh(cat):
+        return cat
+    with _load_lock:
+        cat = _current
+        if _fresh(cat):
+            return cat
+        # поколение фиксируем до чтения: инвалидация во время загрузки не потеряется
+        cat = _load(_generation)
+        _current = cat
+        return cat
+
+def mark_stale() -> None:
+    global _generation
+    _generation = next(_generations)
+
+def invalidate_catalog() -> None:
+    """Вызывать после commit любых изменений зон/мест/правил цен."""
+    mark_stale()
+    if not redis_url():
+        return  # без Redis других воркеров не уведомить — у них страховочный CATALOG_MAX_AGE_SECONDS
+    try:
+        get_redis().publish(CHANNEL, str(os.getpid()))
+    except Exception as e:
+        log.warning("catalog invalidation not published: %s", e)
+
+# ===== Подписка на инвалидацию из других воркеров =====
+_stop = threading.Event()
+_listener: threading.Thread | None = None
+
+def _listen() -> None:
+    backoff = 1.0
+    while not _stop.is_set():
+        ps = None
+        try:
+            ps = get_redis().pubsub(ignore_subscribe_messages=True)
+            ps.subscribe(CHANNEL)
+            mark_stale()  # пока не были подписаны, могли пропустить сообщения
+            backoff = 1.0
+            while not _stop.is_set():
+                if ps.get_message(timeout=1.0):
+                    mark_stale()
+        except Exception as e:
+            log.warning("catalog listener: %s, retry in %.0fs", e, backoff)
+            _stop.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+        finally:
+            if ps is not None:
+                try:
+                    ps.close()
+                except Exception:
+                    pass
+
+def start_catalog_listener() -> None:
+    global _listener
+    if _listener is not None and _listener.is_alive():
+        return
+    _stop.clear()
+    _listener = threading.Thread(target=_listen, name="catalog-listener", daemon=True)
+    _listener.start()
+
+def stop_catalog_listener() -> None:
+    _stop.set()
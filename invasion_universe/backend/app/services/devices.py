@@ -0,0 +1,129 @@
+from __future__ import annotations
+import logging, threading
+from datetime import datetime, timezone
+from sqlalchemy import select, func, delete, literal
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.db import SessionLocal
+from app.models.device import Device
+from app.schemas.device import DeviceRegister
+from app.utils.errors import err
+
+log = logging.getLogger("devices")
+
+MAX_DEVICES_PER_USER = 10
+PRUNE_BATCH_SIZE = 500
+
+def _insert(dialect: str):
+    # INSERT ... ON CONFLICT есть в диалектах postgresql и sqlite; для остальных — None
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+def _upsert_portable(db: Session, user_id: int, payload: DeviceRegister) -> dict:
+    # SELECT, затем UPDATE или INSERT; гонку двух регистраций одного токена решает
+    # уникальный индекс: проигравший получает IntegrityError и повторяет как UPDATE
+    now = datetime.now(timezone.utc)
+    for _ in range(2):
+        others = db.scalar(
+            select(func.count()).select_from(Device).where(Device.user_id == user_id, Device.token != payload.token)
+        )
+        if others >= MAX_DEVICES_PER_USER:
+            db.rollback()
+            raise err("TOO_MANY_DEVICES", 429, limit=MAX_DEVICES_PER_USER)
+        d = db.scalar(select(Device).where(Device.token == payload.token).with_for_update())
+        if d is None:
+            d = Device(
+                user_id=user_id, platform=payload.platform, token=payload.token, locale=payload.locale,
+                app_version=payload.app_version, created_at=now, last_seen_at=now, badge=0,
+            )
+            db.add(d)
+        else:
+            d.user_id, d.platform, d.locale = user_id, payload.platform, payload.locale
+            d.app_version, d.last_seen_at = payload.app_version, now
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            continue
+        return {"id": d.id, "platform": d.platform, "token": d.token, "locale": d.locale, "app_version": d.app_version}
+    raise err("TEMP_LOCKED", 409)
+
+def upsert_device(db: Session, user_id: int, payload: DeviceRegister) -> dict:
+    """Регистрация/обновление устройства одним INSERT ... SELECT ... ON CONFLICT (token) DO UPDATE.
+
+    Лимит MAX_DEVICES_PER_USER проверяется в том же запросе (WHERE у SELECT): если у
+    пользователя уже столько других устройств, строка не вставляется и RETURNING пуст.
+    Повторная регистрация уже известного токена лимит не трогает.
+    """
+    insert = _insert(db.get_bind().dialect.name)
+    if insert is None:
+        return _upsert_portable(db, user_id, payload)
+    now = datetime.now(timezone.utc)
+    others = (
+        select(func.count()).select_from(Device)
+        .where(Device.user_id == user_id, Device.token != payload.token)
+        .scalar_subquery()
+    )
+    row = select(
+        literal(user_id), literal(payload.platform), literal(payload.token), literal(payload.locale),
+        literal(payload.app_version), literal(now), literal(now), literal(0),
+    ).where(others < MAX_DEVICES_PER_USER)
+    stmt = insert(Device).from_select(
+        ["user_id", "platform", "token", "locale", "app_version", "created_at", "last_seen_at", "badge"], row
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Device.token],
+        set_={
+            "user_id": stmt.excluded.user_id,
+            "platform": stmt.excluded.platform,
+            "locale": stmt.excluded.locale,
+            "app_version": stmt.excluded.app_version,
+            "last_seen_at": stmt.excluded.last_seen_at,
+        },
+    ).returning(Device.id, Device.platform, Device.token, Device.locale, Device.app_version)
+    d = db.execute(stmt).mappings().first()
+    db.commit()
+    if d is None:
+        raise err("TOO_MANY_DEVICES", 429, limit=MAX_DEVICES_PER_USER)
+    return dict(d)
+
+# ===== Удаление мёртвых токенов =====
+# FCM отвечает NotRegistered/InvalidRegistration — такие токены копим и удаляем пачками,
+# чтобы следующие рассылки их уже не трогали.
+_invalid: set[str] = set()
+_invalid_lock = threading.Lock()
+
+def delete_device_tokens(tokens: list[str]) -> int:
+    deleted = 0
+    with SessionLocal() as db:
+        for i in range(0, len(tokens), PRUNE_BATCH_SIZE):
+            deleted += db.execute(delete(Device).where(Device.token.in_(tokens[i:i + PRUNE_BATCH_SIZE]))).rowcount or 0
+        db.commit()
+    return deleted
+
+def report_invalid_tokens(tokens: list[str]) -> None:
+    if not tokens:
+        return
+    with _invalid_lock:
+        _invalid.update(tokens)
+
+def flush_invalid_tokens(min_batch: int = 1) -> int:
+    """Удаляет накопленные невалидные токены, если их набралось не меньше min_batch."""
+    with _invalid_lock:
+        if len(_invalid) < min_batch:
+            return 0
+        tokens = list(_invalid)
+        _invalid.clear()
+    try:
+        n = delete_device_tokens(tokens)
+        log.info("pruned %d dead device tokens", n)
+        return n
+    except Exception as e:
+        log.warning("device token pruning failed: %s", e)
+        report_invalid_tokens(tokens)  # попробуем в следующий раз
+        return 0
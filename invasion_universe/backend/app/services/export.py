@@ -0,0 +1,176 @@
+"""Выгрузка истории броней в Parquet для офлайн-аналитики.
+
+Запуск (из backend/ или в контейнере; нужен pyarrow — pip install -r requirements-export.txt):
+    python -m app.services.export --out /data/analytics [--full] [--chunk 20000]
+
+Брони с атрибутами места и зоны (и роль/локаль пользователя, без email) пишутся в
+    <out>/bookings/date=YYYY-MM-DD/part-<run>-<n>.parquet
+по дате начала брони (UTC). Читается с реплики, если она задана, серверным курсором порциями
+по --chunk строк. Повторный запуск выгружает только строки, изменённые после прошлого: курсор —
+тот же, что у /sync (cursor_key/visible_top в app/services/sync.py: change_xid в Postgres,
+change_seq в SQLite), он сохраняется в <out>/bookings/_state.json после успешной записи всех
+файлов. Изменённая бронь (смена статуса) приходит новой версией строки — при анализе берите
+по id строку с максимальным change_seq.
+"""
+from __future__ import annotations
+import argparse, json, os, sys, time
+from datetime import datetime, timezone
+from sqlalchemy import select
+from app.db import ReplicaSessionLocal
+from app.models.booking import Booking
+from app.models.seat import Seat
+from app.models.user import User
+from app.models.zone import Zone
+from app.services.sync import cursor_key, visible_top
+
+DEFAULT_CHUNK = 20000
+STATE_FILE = "_state.json"
+
+COLUMNS = (
+    ("booking_id", Booking.id), ("change_seq", Booking.change_seq), ("user_id", Booking.user_id),
+    ("user_role", User.role), ("user_locale", User.locale),
+    ("seat_id", Booking.seat_id), ("seat_label", Seat.label), ("seat_type", Seat.seat_type),
+    ("zone_id", Seat.zone_id), ("zone_code", Zone.code), ("zone_name", Zone.name),
+    ("start_time", Booking.start_time), ("end_time", Booking.end_time), ("status", Booking.status),
+    ("price_cents", Booking.price_cents), ("penalty_cents", Booking.penalty_cents),
+    ("created_at", Booking.created_at),
+)
+
+def _arrow_schema(pa):
+    ts = pa.timestamp("us", tz="UTC")
+    types = {
+        "booking_id": pa.int64(), "change_seq": pa.int64(), "user_id": pa.int64(), "seat_id": pa.int64(),
+        "zone_id": pa.int64(), "price_cents": pa.int64(), "penalty_cents": pa.int64(),
+        "start_time": ts, "end_time": ts, "created_at": ts,
+    }
+    return pa.schema([(name, types.get(name, pa.string())) for name, _ in COLUMNS])
+
+def _utc(v: datetime | None) -> datetime | None:
+    # SQLite отдаёт naive — в базе всё в UTC
+    if v is not None and v.tzinfo is None:
+        return v.replace(tzinfo=timezone.utc)
+    return v
+
+def _load_state(root: str) -> dict:
+    try:
+        with open(os.path.join(root, STATE_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def _save_state(root: str, state: dict) -> None:
+    path = os.path.join(root, STATE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+class _PartitionWriter:
+    """Один открытый файл за раз: строки идут по start_time, дата меняется монотонно.
+    Пишется в скрытый .part-*, переименовывается при закрытии — ридеры не видят недописанное."""
+
+    def __init__(self, pq, schema, root: str, run: str) -> None:
+        self.pq, self.schema, self.root, self.run = pq, schema, root, run
+        self.day: str | None = None
+        self.writer = None
+        self.tmp = self.final = ""
+        self.files: list[str] = []
+
+    def write(self, day: str, table) -> None:
+        if day != self.day:
+            self.close()
+            d = os.path.join(self.root, f"date={day}")
+            os.makedirs(d, exist_ok=True)
+            n = sum(1 for f in os.listdir(d) if f.startswith(f"part-{self.run}-"))
+            self.final = os.path.join(d, f"part-{self.run}-{n}.parquet")
+            self.tmp = os.path.join(d, f".part-{self.run}-{n}.parquet")
+            self.writer = self.pq.ParquetWriter(self.tmp, self.schema, compression="zstd")
+            self.day = day
+        self.writer.write_table(table)
+
+    def abort(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            os.remove(self.tmp)
+            self.writer = None
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.tmp, self.final)
+            self.files.append(self.final)
+            self.writer = None
+            self.day = None
+
+def export_bookings(out: str, full: bool = False, chunk: int = DEFAULT_CHUNK) -> dict:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("pyarrow не установлен: pip install -r requirements-export.txt") from e
+    root = os.path.join(out, "bookings")
+    os.makedirs(root, exist_ok=True)
+    state = {} if full else _load_state(root)
+    schema = _arrow_schema(pa)
+    names = [name for name, _ in COLUMNS]
+    run = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    writer = _PartitionWriter(pq, schema, root, run)
+    rows = 0
+    t0 = time.perf_counter()
+    with ReplicaSessionLocal() as db:
+        dialect = db.get_bind().dialect.name
+        # -1: строки Postgres до появления change_xid помечены нулём
+        since = state.get("cursor", -1 if dialect == "postgresql" else state.get("change_seq", 0))
+        key = cursor_key(Booking, dialect)
+        # верхняя граница фиксируется до чтения: закоммиченное позже уйдёт в следующий запуск
+        top = visible_top(db)
+        q = (
+            select(*(col.label(name) for name, col in COLUMNS))
+            .join(Seat, Seat.id == Booking.seat_id)
+            .join(Zone, Zone.id == Seat.zone_id)
+            .outerjoin(User, User.id == Booking.user_id)
+            .where(key > since, key <= top)
+            .order_by(Booking.start_time, Booking.id)
+            .execution_options(stream_results=True, yield_per=chunk)
+        )
+        try:
+            for part in db.execute(q).partitions():
+                # внутри порции дата тоже меняется монотонно — режем на отрезки по дню
+                i = 0
+                while i < len(part):
+                    day = _utc(part[i].start_time).date().isoformat()
+                    j = i
+                    while j < len(part) and _utc(part[j].start_time).date().isoformat() == day:
+                        j += 1
+                    cols = {name: [] for name in names}
+                    for r in part[i:j]:
+                        for name, v in zip(names, r):
+                            cols[name].append(_utc(v) if isinstance(v, datetime) else v)
+                    writer.write(day, pa.table(cols, schema=schema))
+                    rows += j - i
+                    i = j
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+    result = {
+        "cursor": max(top, since), "previous_cursor": since, "rows": rows,
+        "files": len(writer.files), "exported_at": datetime.now(timezone.utc).isoformat(),
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+    _save_state(root, result)
+    return result
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Bookings -> Parquet (по дате начала), инкрементально по курсору /sync")
+    ap.add_argument("--out", required=True, help="Каталог выгрузки")
+    ap.add_argument("--full", action="store_true", help="Выгрузить всё заново, без сохранённого курсора (в пустой каталог)")
+    ap.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="Строк за одно чтение курсора")
+    args = ap.parse_args()
+    try:
+        result = export_bookings(args.out, full=args.full, chunk=args.chunk)
+    except RuntimeError as e:
+        sys.exit(str(e))
+    print(json.dumps(result, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+import json, logging, time, uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.utils.errors import err
+from app.utils.locks import get_redis, acquire_lock, release_lock, seat_lock_key
+
+# Удержание места на время оплаты: живёт только в Redis и истекает само (EX), в БД
+# ничего не пишется, пока удержание не превратится в бронь (convert_hold).
+#   hold:{id}             JSON удержания, EX = HOLD_TTL_SECONDS
+#   holds:seat:{seat_id}  ZSET "{id}|{start}|{end}|{user}" -> истечение (unix); по нему — конфликты и доступность
+#   holds:user:{user_id}  ZSET "{id}" -> истечение; лимит удержаний на пользователя
+# Истёкшие элементы ZSET вычищаются при записи и игнорируются при чтении (score < now).
+
+log = logging.getLogger("holds")
+
+# проверка пересечения и запись — одним скриптом, иначе два удержания одного слота пройдут оба
+_CREATE_HOLD_LUA = """
+local now = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now)
+if redis.call('ZCARD', KEYS[3]) >= tonumber(ARGV[8]) then
+  return -2
+end
+local s, e = tonumber(ARGV[3]), tonumber(ARGV[4])
+for _, m in ipairs(redis.call('ZRANGE', KEYS[1], 0, -1)) do
+  local _, _, ms, me = string.find(m, '^[^|]+|(%d+)|(%d+)|')
+  if tonumber(ms) < e and tonumber(me) > s then
+    return -1
+  end
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[5])
+redis.call('EXPIRE', KEYS[1], ARGV[7])
+redis.call('ZADD', KEYS[3], ARGV[2], ARGV[9])
+redis.call('EXPIRE', KEYS[3], ARGV[7])
+redis.call('SET', KEYS[2], ARGV[6], 'EX', ARGV[7])
+return 1
+"""
+
+def _hold_key(hold_id: str) -> str:
+    return f"hold:{hold_id}"
+
+def _seat_key(seat_id: int) -> str:
+    return f"holds:seat:{seat_id}"
+
+def _user_key(user_id: int) -> str:
+    return f"holds:user:{user_id}"
+
+def _member(hold_id: str, start: datetime, end: datetime, user_id: int) -> str:
+    return f"{hold_id}|{int(start.timestamp())}|{int(end.timestamp())}|{user_id}"
+
+def _parse(member: str) -> tuple[str, datetime, datetime, int]:
+    hold_id, s, e, uid = member.split("|")
+    return (
+        hold_id, datetime.fromtimestamp(int(s), tz=timezone.utc),
+        datetime.fromtimestamp(int(e), tz=timezone.utc), int(uid),
+    )
+
+def create_hold(db: Session, user_id: int, seat_id: int, start: datetime, hours: int) -> dict:
+    from app.services.booking import validate_slot, check_conflict
+    seat, end = validate_slot(seat_id, start, hours)
+    lock_key = seat_lock_key(seat_id, start.isoformat(), end.isoformat())
+    if not acquire_lock(lock_key, ttl_seconds=30):
+        raise err("TEMP_LOCKED", 409)
+    try:
+        # брони — только чтение; удержания других — в скрипте ниже
+        if check_conflict(db, seat_id, start, end, holds=False):
+            raise err("SLOT_CONFLICT", 409)
+        now = time.time()
+        ttl = settings.HOLD_TTL_SECONDS
+        hold = {
+            "id": uuid.uuid4().hex, "user_id": user_id, "seat_id": seat_id,
+            "start_time": start.isoformat(), "end_time": end.isoformat(), "hours": hours,
+            "expires_at": datetime.fromtimestamp(now + ttl, tz=timezone.utc).isoformat(),
+        }
+        try:
+            res = get_redis().register_script(_CREATE_HOLD_LUA)(
+                keys=[_seat_key(seat_id), _hold_key(hold["id"]), _user_key(user_id)],
+                args=[now, now + ttl, int(start.timestamp()), int(end.timestamp()),
+                      _member(hold["id"], start, end, user_id), json.dumps(hold), ttl,
+                      settings.HOLD_MAX_PER_USER, hold["id"]],
+            )
+        except Exception as e:
+            log.warning("hold not created: %s", e)
+            raise err("HOLDS_UNAVAILABLE", 503)
+    finally:
+        release_lock(lock_key)
+    if res == -1:
+        raise err("SLOT_CONFLICT", 409)
+    if res == -2:
+        raise err("HOLD_LIMIT", 429)
+    return hold
+
+def get_hold(hold_id: str) -> dict | None:
+    try:
+        raw = get_redis().get(_hold_key(hold_id))
+    except Exception:
+        return None
+    return json.loads(raw) if raw else None
+
+def release_hold(hold: dict) -> None:
+    start = datetime.fromisoformat(hold["start_time"])
+    end = datetime.fromisoformat(hold["end_time"])
+    try:
+        r = get_redis()
+        r.zrem(_seat_key(hold["seat_id"]), _member(hold["id"], start, end, hold["user_id"]))
+        r.zrem(_user_key(hold["user_id"]), hold["id"])
+        r.delete(_hold_key(hold["id"]))
+    except Exception as e:
+        log.warning("hold %s not released: %s", hold["id"], e)
+
+def user_hold(user_id: int, hold_id: str) -> dict:
+    hold = get_hold(hold_id)
+    if not hold or hold["user_id"] != user_id:
+        raise err("HOLD_NOT_FOUND", 404)
+    return hold
+
+def my_holds(user_id: int) -> list[dict]:
+    try:
+        r = get_redis()
+        ids = r.zrangebyscore(_user_key(user_id), time.time(), "+inf")
+        raws = r.mget([_hold_key(i) for i in ids]) if ids else []
+    except Exception:
+        return []
+    return [json.loads(x) for x in raws if x]
+
+def convert_hold(db: Session, user_id: int, hold_id: str):
+    """Удержание -> бронь одним вызовом; своё удержание при проверке конфликтов не мешает."""
+    from app.services.booking import create_booking
+    hold = user_hold(user_id, hold_id)
+    booking = create_booking(
+        db, user_id=user_id, seat_id=hold["seat_id"],
+        start=datetime.fromisoformat(hold["start_time"]), hours=hold["hours"], hold_id=hold_id,
+    )
+    release_hold(hold)
+    return booking
+
+def seat_holds(
+    seat_ids: list[int], start: datetime, end: datetime, exclude_hold: str | None = None,
+) -> dict[int, list[tuple[datetime, datetime]]]:
+    """Живые удержания мест, пересекающие [start, end): один pipeline на все места.
+    Redis недоступен — удержаний как будто нет (как acquire_lock)."""
+    if not seat_ids:
+        return {}
+    now = time.time()
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for sid in seat_ids:
+            pipe.zrangebyscore(_seat_key(sid), now, "+inf")
+        results = pipe.execute()
+    except Exception:
+        return {}
+    out: dict[int, list[tuple[datetime, datetime]]] = {}
+    for sid, members in zip(seat_ids, results):
+        for m in members:
+            hold_id, s, e, _ = _parse(m)
+            if hold_id != exclude_hold and s < end and e > start:
+                out.setdefault(sid, []).append((s, e))
+    return out
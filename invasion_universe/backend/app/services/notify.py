@@ -1,10 +1,17 @@
 from __future__ import annotations
-import os, json, logging
-import httpx
+import asyncio, os, json, logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import httpx
 
 log = logging.getLogger("notify")
 
-FCM_URL = "https://fcm.googleapis.com/fcm/send"
+# FCM_URL можно переопределить, чтобы направить пуши в локальную заглушку (bench/fcm_stub.py)
+FCM_URL = os.getenv("FCM_URL", "https://fcm.googleapis.com/fcm/send")
+FCM_MAX_TOKENS_PER_REQUEST = 1000  # лимит registration_ids у FCM
+# ошибки, после которых токен больше не годится
+FCM_INVALID_TOKEN_ERRORS = {"NotRegistered", "InvalidRegistration", "MismatchSenderId"}
 
 def _fcm_key() -> str | None:
     return os.getenv("FCM_SERVER_KEY") or None
@@ -14,6 +21,7 @@ async def send_push_fcm(token: str, title: str, body: str, data: dict | None = N
     if not key:
         log.info("[PUSH:DRY] %s | %s - %s | data=%s", token[:12], title, body, data)
         return False
+    import httpx
     payload = {
         "to": token,
         "notification": {"title": title, "body": body, "sound": "default"},
@@ -25,4 +33,91 @@ async def send_push_fcm(token: str, title: str, body: str, data: dict | None = N
     ok = r.status_code < 300
     if not ok:
         log.warning("FCM error %s: %s", r.status_code, r.text)
-    return ok
\ No newline at end of file
+        return ok
+    res = (r.json().get("results") or [{}])[0]
+    if res.get("error") in FCM_INVALID_TOKEN_ERRORS:
+        from app.services.devices import report_invalid_tokens, flush_invalid_tokens
+        report_invalid_tokens([token])
+        # удаляем сразу: в API-процессе может не быть ни воркера напоминаний, ни рассылок
+        await asyncio.to_thread(flush_invalid_tokens)
+        return False
+    return ok
+
+async def send_push_fcm_multicast(
+    client: "httpx.AsyncClient", tokens: list[str], title: str, body: str, data: dict | None = None
+) -> tuple[int, int, list[str]]:
+    """Один запрос FCM на пачку токенов (registration_ids).
+
+    Возвращает (доставлено, ошибок, невалидные токены). Клиент общий на всю рассылку.
+    """
+    assert len(tokens) <= FCM_MAX_TOKENS_PER_REQUEST
+    key = _fcm_key()
+    if not key:
+        log.info("[PUSH:DRY] multicast %d tokens | %s - %s | data=%s", len(tokens), title, body, data)
+        return 0, len(tokens), []
+    payload = {
+        "registration_ids": tokens,
+        "notification": {"title": title, "body": body, "sound": "default"},
+        "data": data or {}
+    }
+    headers = {"Authorization": f"key={key}", "Content-Type": "application/json"}
+    try:
+        r = await client.post(FCM_URL, headers=headers, content=json.dumps(payload))
+    except Exception as e:
+        log.warning("FCM multicast failed: %s", e)
+        return 0, len(tokens), []
+    if r.status_code >= 300:
+        log.warning("FCM error %s: %s", r.status_code, r.text)
+        return 0, len(tokens), []
+    results = r.json().get("results") or []
+    ok, failed, invalid = 0, 0, []
+    for token, res in zip(tokens, results):
+        if "message_id" in res:
+            ok += 1
+        else:
+            failed += 1
+            if res.get("error") in FCM_INVALID_TOKEN_ERRORS:
+                invalid.append(token)
+    failed += len(tokens) - len(results)
+    return ok, failed, invalid
+
+async def push_to_tokens(tokens: list[str], title: str, body: str, data: dict | None = None) -> None:
+    """Пуш на список токенов пачками multicast (как в рассылках), мёртвые токены удаляются сразу."""
+    import httpx
+    from app.services.devices import report_invalid_tokens, flush_invalid_tokens
+    invalid: list[str] = []
+    async with httpx.AsyncClient(timeout=10) as client:
+        for i in range(0, len(tokens), FCM_MAX_TOKENS_PER_REQUEST):
+            invalid += (await send_push_fcm_multicast(client, tokens[i:i + FCM_MAX_TOKENS_PER_REQUEST], title, body, data))[2]
+    if invalid:
+        report_invalid_tokens(invalid)
+        await asyncio.to_thread(flush_invalid_tokens)
+
+_background: set[asyncio.Task] = set()
+
+def _spawn(coro) -> None:
+    task = asyncio.get_running_loop().create_task(coro)
+    _background.add(task)  # держим ссылку, пока задача не завершится
+    task.add_done_callback(_background.discard)
+
+def push_in_background(tokens: list[str], title: str, body: str, data: dict | None = None) -> None:
+    """Пуш из синхронного кода запроса: задача в event loop приложения, ответ её не ждёт."""
+    if not tokens:
+        return
+    coro = push_to_tokens(tokens, title, body, data)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        _spawn(coro)
+        return
+    from anyio.from_thread import run_sync
+    try:
+        # sync-обработчики FastAPI выполняются в пуле потоков anyio — loop приложения доступен оттуда
+        loop = run_sync(asyncio.get_running_loop)
+    except RuntimeError:
+        # вне приложения (скрипты, CLI) — отправляем синхронно
+        asyncio.run(coro)
+        return
+    loop.call_soon_threadsafe(_spawn, coro)
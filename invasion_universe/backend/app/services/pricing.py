@@ -0,0 +1,85 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from app.config import settings
+
+# Динамическая цена: базовая цена места (hourly_price_cents) × множитель часа.
+# Правила (pricing_rules) компилируются в недельный вектор множителей на каждую пару
+# (зона, тип места): 168 часов, в базисных пунктах (10000 = ×1). Совпавшие правила
+# перемножаются. Храним префиксные суммы — цена любого интервала это разность двух
+# элементов массива, без разбора правил на запрос. Векторы живут в каталоге и
+# пересобираются вместе с ним (invalidate_catalog() после изменения правил).
+
+HOURS_PER_WEEK = 168
+BP = 10000
+
+@dataclass(frozen=True, slots=True)
+class PricingRuleEntry:
+    id: int
+    zone_id: int | None
+    seat_type: str | None
+    weekdays: int
+    hour_from: int
+    hour_to: int
+    multiplier_pct: int
+
+def _vector(rules: list[PricingRuleEntry]) -> list[int]:
+    factors = [1.0] * HOURS_PER_WEEK
+    for r in rules:
+        m = r.multiplier_pct / 100
+        for day in range(7):
+            if r.weekdays >> day & 1:
+                for h in range(max(0, r.hour_from), min(24, r.hour_to)):
+                    factors[day * 24 + h] *= m
+    return [round(f * BP) for f in factors]
+
+class PriceBook:
+    def __init__(self, rules: list[PricingRuleEntry], pairs: set[tuple[int, str]]):
+        self.default = self._prefix([BP] * HOURS_PER_WEEK)
+        self.hourly: dict[tuple[int, str], list[int]] = {}
+        self.prefix: dict[tuple[int, str], list[int]] = {}
+        for zone_id, seat_type in pairs:
+            matched = [
+                r for r in rules
+                if r.zone_id in (None, zone_id) and r.seat_type in (None, seat_type)
+            ]
+            if matched:
+                vec = _vector(matched)
+                self.hourly[(zone_id, seat_type)] = vec
+                self.prefix[(zone_id, seat_type)] = self._prefix(vec)
+
+    @staticmethod
+    def _prefix(vec: list[int]) -> list[int]:
+        out = [0]
+        for v in vec:
+            out.append(out[-1] + v)
+        return out
+
+    def _bp(self, zone_id: int, seat_type: str, idx: int, hours: int) -> int:
+        prefix = self.prefix.get((zone_id, seat_type), self.default)
+        weeks, rem = divmod(hours, HOURS_PER_WEEK)
+        total = weeks * prefix[HOURS_PER_WEEK]
+        end = idx + rem
+        if end <= HOURS_PER_WEEK:
+            return total + prefix[end] - prefix[idx]
+        return total + prefix[HOURS_PER_WEEK] - prefix[idx] + prefix[end - HOURS_PER_WEEK]
+
+    def price_cents(self, zone_id: int, seat_type: str, base_cents: int, start: datetime, hours: int) -> int:
+        return (base_cents * self._bp(zone_id, seat_type, week_hour(start), hours) + BP // 2) // BP
+
+    def hourly_prices(self, zone_id: int, seat_type: str, base_cents: int, start: datetime, hours: int) -> list[int]:
+        # цена каждого часа по отдельности (для сетки доступности)
+        vec = self.hourly.get((zone_id, seat_type))
+        if vec is None:
+            return [base_cents] * hours
+        idx = week_hour(start)
+        return [(base_cents * vec[(idx + i) % HOURS_PER_WEEK] + BP // 2) // BP for i in range(hours)]
+
+CLUB_TZ = timezone(timedelta(hours=settings.PRICING_UTC_OFFSET_HOURS))
+
+def week_hour(start: datetime) -> int:
+    """Индекс часа недели (0 = понедельник 00:00) по местному времени клуба."""
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    local = start.astimezone(CLUB_TZ)
+    return local.weekday() * 24 + local.hour
@@ -0,0 +1,172 @@
+from __future__ import annotations
+import asyncio, logging, time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
+from app.config import settings
+from app.db import SessionLocal
+from app.models.booking import Booking
+from app.models.device import Device
+from app.services.devices import flush_invalid_tokens
+from app.services.notify import send_push_fcm
+from app.utils.locks import get_redis, redis_url
+
+# Напоминания о начале брони: sorted set reminders:due, score — unix-время отправки,
+# member — "{booking_id}:{за сколько минут}". Воркер забирает только наступившие элементы,
+# так что стоимость тика — O(log N + due), без опроса таблицы bookings.
+# Забранное не удаляется, а переезжает в reminders:inflight (score — срок аренды) и снимается
+# оттуда после отправки; при ошибке возвращается в очередь сразу, при падении воркера —
+# следующим тиком любого воркера, когда аренда истечёт.
+
+log = logging.getLogger("reminders")
+
+QUEUE_KEY = "reminders:due"
+INFLIGHT_KEY = "reminders:inflight"
+
+# атомарно: вернуть в очередь просроченные аренды, затем забрать до ARGV[2] элементов со
+# score <= ARGV[1] в аренду до ARGV[3] — каждый достанется ровно одному воркеру
+_LEASE_DUE_LUA = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, m in ipairs(expired) do
+  redis.call('ZADD', KEYS[1], ARGV[1], m)
+end
+if #expired > 0 then
+  redis.call('ZREM', KEYS[2], unpack(expired))
+end
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, m in ipairs(items) do
+  redis.call('ZADD', KEYS[2], ARGV[3], m)
+end
+if #items > 0 then
+  redis.call('ZREM', KEYS[1], unpack(items))
+end
+return items
+"""
+
+# вернуть арендованное в очередь (если аренду ещё не забрали назад по сроку)
+_RETURN_LUA = """
+for _, m in ipairs(ARGV) do
+  if redis.call('ZREM', KEYS[2], m) == 1 then
+    redis.call('ZADD', KEYS[1], 0, m)
+  end
+end
+return 1
+"""
+
+def _member(booking_id: int, offset_min: int) -> str:
+    return f"{booking_id}:{offset_min}"
+
+def schedule_reminders(booking_id: int, start_time: datetime) -> None:
+    now = time.time()
+    due = {}
+    for offset in settings.reminder_offsets:
+        at = (start_time - timedelta(minutes=offset)).timestamp()
+        if at > now:
+            due[_member(booking_id, offset)] = at
+    if not due or not redis_url():
+        return  # без Redis напоминаний нет (SQLite-профиль)
+    try:
+        get_redis().zadd(QUEUE_KEY, due)
+    except Exception as e:
+        log.warning("reminders for booking %s not scheduled: %s", booking_id, e)
+
+def unschedule_reminders(booking_id: int) -> None:
+    try:
+        members = [_member(booking_id, o) for o in settings.reminder_offsets]
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.zrem(QUEUE_KEY, *members)
+        pipe.zrem(INFLIGHT_KEY, *members)
+        pipe.execute()
+    except Exception:
+        pass  # воркер всё равно отбросит напоминание по статусу брони
+
+def lease_due(limit: int, now: float | None = None) -> list[tuple[int, int]]:
+    now = now or time.time()
+    items = get_redis().register_script(_LEASE_DUE_LUA)(
+        keys=[QUEUE_KEY, INFLIGHT_KEY], args=[now, limit, now + settings.REMINDER_LEASE_SECONDS],
+    )
+    out = []
+    for m in items:
+        booking_id, offset = m.split(":", 1)
+        out.append((int(booking_id), int(offset)))
+    return out
+
+def ack(due: list[tuple[int, int]]) -> None:
+    get_redis().zrem(INFLIGHT_KEY, *[_member(b, o) for b, o in due])
+
+def give_back(due: list[tuple[int, int]]) -> None:
+    # score 0 — уже наступило, следующий тик заберёт первыми
+    get_redis().register_script(_RETURN_LUA)(keys=[QUEUE_KEY, INFLIGHT_KEY], args=[_member(b, o) for b, o in due])
+
+def _load_targets(due: list[tuple[int, int]]) -> list[tuple[str, int, int, int, datetime]]:
+    # (token, booking_id, offset, seat_id, start) для актуальных броней — два запроса на пачку
+    ids = {b for b, _ in due}
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        bookings = {
+            r.id: r for r in db.execute(
+                select(Booking.id, Booking.user_id, Booking.seat_id, Booking.start_time, Booking.status)
+                .where(Booking.id.in_(ids))
+            )
+        }
+        live = {
+            bid: b for bid, b in bookings.items()
+            if b.status in ("pending", "paid") and b.start_time > now
+        }
+        users = {b.user_id for b in live.values()}
+        tokens: dict[int, list[str]] = {}
+        if users:
+            for uid, token in db.execute(select(Device.user_id, Device.token).where(Device.user_id.in_(users))):
+                tokens.setdefault(uid, []).append(token)
+    out = []
+    for bid, offset in due:
+        b = live.get(bid)
+        if not b:
+            continue  # бронь отменена/завершена/уже началась — напоминание не нужно
+        for t in tokens.get(b.user_id, ()):
+            out.append((t, bid, offset, b.seat_id, b.start_time))
+    return out
+
+async def process_due_once(limit: int | None = None) -> int:
+    """Один тик: забрать наступившие напоминания и разослать. Возвращает число забранных элементов."""
+    limit = limit or settings.REMINDER_BATCH_SIZE
+    due = await asyncio.to_thread(lease_due, limit)
+    if not due:
+        return 0
+    try:
+        targets = await asyncio.to_thread(_load_targets, due)
+        # ошибка отдельного пуша не повод слать всю пачку заново — return_exceptions
+        await asyncio.gather(*[
+            send_push_fcm(
+                token, "Скоро начало брони", f"Через {offset} мин, место #{seat_id}, старт {start.isoformat()}",
+                {"type": "booking_reminder", "booking_id": str(bid), "minutes_before": str(offset)},
+            )
+            for token, bid, offset, seat_id, start in targets
+        ], return_exceptions=True)
+    except BaseException:
+        try:
+            await asyncio.to_thread(give_back, due)
+        except Exception as e:
+            log.warning("reminders not returned to queue, lease will expire: %s", e)
+        raise
+    await asyncio.to_thread(ack, due)
+    return len(due)
+
+async def reminder_worker(stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            # пока пачки полные — сразу берём следующую, иначе ждём тика
+            while await process_due_once() >= settings.REMINDER_BATCH_SIZE:
+                pass
+            # токены, на которые FCM ответил NotRegistered (одиночные пуши процесса)
+            await asyncio.to_thread(flush_invalid_tokens)
+        except Exception as e:
+            log.warning("reminder tick failed: %s", e)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.REMINDER_TICK_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+if __name__ == "__main__":
+    # отдельный процесс: python -m app.services.reminders (тогда REMINDER_WORKER_ENABLED=false у API)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(reminder_worker(asyncio.Event()))
@@ -0,0 +1,158 @@
+from __future__ import annotations
+from sqlalchemy import event, func, select, update, text, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.booking import Booking
+from app.models.change_counter import ChangeCounter
+from app.models.seat import Seat
+from app.models.zone import Zone
+from app.schemas.booking import BookingRead
+from app.utils.fastjson import schema_columns
+
+# Журнал изменений для офлайн-кэша клиента: у строк zones/seats/bookings change_seq — номер
+# последнего изменения, change_xid — id записавшей транзакции (только Postgres).
+#
+# Postgres: оба значения ставит сам пишущий запрос (default/onupdate колонок, app/models/base.py),
+# без блокировок. Номера выдаются при записи, а коммиты идут в другом порядке, поэтому
+# курсор /sync — не номер, а id транзакции: отдаётся только то, что записали транзакции с
+# xid < pg_snapshot_xmin (все они уже завершены), остальное — в следующий раз.
+# Снаружи курсор — xid + XID_CURSOR_BASE: курсоры-номера до этой схемы меньше базы и
+# означают полную выдачу.
+#
+# SQLite пишет одним писателем (app/utils/sqlite_profile.py), порядок записи совпадает с
+# порядком коммитов: курсор — сам change_seq. Запись сбрасывает его в NULL, перед коммитом
+# сессия проставляет номера из счётчика change_seq_counter (растёт в той же транзакции,
+# номера не повторяются, даже если обновили строку с максимальным номером).
+
+SYNC_MODELS = (Zone, Seat, Booking)
+_TABLES = {m.__table__ for m in SYNC_MODELS}
+_DIRTY = "sync_dirty"
+XID_CURSOR_BASE = 1 << 40
+
+def _mark(session: Session) -> None:
+    session.info[_DIRTY] = True
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, ctx) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, SYNC_MODELS):
+            _mark(session)
+            return
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_execute(state) -> None:
+    # массовые update()/insert() мимо flush (bulk_status и т.п.)
+    if (state.is_update or state.is_insert or state.is_delete) and getattr(state.statement, "table", None) in _TABLES:
+        _mark(state.session)
+
+def _all_seqs():
+    return union_all(*(select(func.max(m.change_seq).label("s")) for m in SYNC_MODELS)).subquery()
+
+def _reserve(conn, n: int) -> int:
+    # n номеров из счётчика, возвращает последний; первая запись счётчика продолжает max() таблиц
+    start = select(func.coalesce(func.max(_all_seqs().c.s), 0) + n).scalar_subquery()
+    stmt = sqlite_insert(ChangeCounter).values(id=1, value=start)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ChangeCounter.id], set_={"value": ChangeCounter.value + n},
+    ).returning(ChangeCounter.value)
+    return conn.execute(stmt).scalar_one()
+
+@event.listens_for(Session, "before_commit")
+def _stamp(session: Session) -> None:
+    bind = session.get_bind()
+    if bind.dialect.name == "postgresql":
+        session.info.pop(_DIRTY, None)  # номера уже проставлены при записи
+        return
+    session.flush()  # before_commit вызывается до финального flush — изменения должны быть в БД
+    if not session.info.pop(_DIRTY, False):
+        return
+    conn = session.connection()
+    for m in SYNC_MODELS:
+        t = m.__table__
+        lo, hi = conn.execute(select(func.min(t.c.id), func.max(t.c.id)).where(t.c.change_seq.is_(None))).one()
+        if lo is None:
+            continue
+        # диапазон на hi-lo+1 номеров: у строк одного UPDATE номера разные (смещение id),
+        # иначе постраничная выдача могла бы разрезать группу с одинаковым номером
+        first = _reserve(conn, hi - lo + 1) - (hi - lo)
+        conn.execute(update(t).where(t.c.change_seq.is_(None)).values(change_seq=first + t.c.id - lo))
+
+def cursor_key(model, dialect: str):
+    """Колонка, по которой идёт курсор журнала изменений в этом диалекте."""
+    return model.change_xid if dialect == "postgresql" else model.change_seq
+
+def visible_top(db: Session) -> int:
+    """Граница ключа cursor_key: всё, что записано с ключом <= неё, уже закоммичено и видно;
+    позже закоммиченное получит ключ больше."""
+    if db.get_bind().dialect.name == "postgresql":
+        return db.scalar(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")) - 1
+    counter = db.scalar(select(ChangeCounter.value).where(ChangeCounter.id == 1))
+    return counter if counter is not None else db.scalar(select(func.max(_all_seqs().c.s))) or 0
+
+# ===== Выдача изменений =====
+_ZONE_COLS = (Zone.id, Zone.name, Zone.code, Zone.is_active, Zone.change_seq)
+_SEAT_COLS = (Seat.id, Seat.zone_id, Seat.label, Seat.seat_type, Seat.hourly_price_cents, Seat.is_active, Seat.change_seq)
+
+def changes_since(db: Session, user_id: int, since: int, limit: int | None = None) -> dict:
+    """Зоны, места и брони пользователя, изменённые после курсора since.
+
+    Неактивные зоны/места приходят в deleted (физически их не удаляют, брони — тоже,
+    отменённая бронь приходит со статусом cancelled). Если какой-то тип упёрся в limit,
+    cursor — наименьший из последних ключей «полных» типов, остальное отрезается по нему,
+    has_more=true, и клиент сразу запрашивает следующую страницу. Изменения одной транзакции
+    (один ключ в Postgres) не разрезаются: страница дочитывает их целиком.
+    """
+    limit = limit or settings.SYNC_PAGE_SIZE
+    dialect = db.get_bind().dialect.name
+    pg = dialect == "postgresql"
+    # курсор -> ключ: в Postgres курсор меньше базы — старый номер, отдаём всё заново
+    lo = (since - XID_CURSOR_BASE if since >= XID_CURSOR_BASE else -1) if pg else since
+    # верхняя граница фиксируется первой: закоммиченное после неё уйдёт в следующий запрос
+    top = visible_top(db)
+
+    def page(cols, model, *where, n: int | None = limit):
+        key = cursor_key(model, dialect)
+        stmt = (select(*cols, key.label("k")).where(key > lo, key <= top, *where)
+                .order_by(key, model.change_seq).limit(n))
+        return [dict(r) for r in db.execute(stmt).mappings()]
+
+    specs = (
+        (_ZONE_COLS, Zone, ()),
+        (_SEAT_COLS, Seat, ()),
+        ((*schema_columns(Booking, BookingRead), Booking.change_seq), Booking, (Booking.user_id == user_id,)),
+    )
+    pages = [page(cols, model, *where) for cols, model, where in specs]
+
+    # курсор — глобальный, даже если среди изменений нет броней этого пользователя
+    cursor = max(lo, top)
+    full = [rows[-1]["k"] for rows in pages if len(rows) >= limit]
+    if full:
+        cursor = min(full)
+        for i, ((cols, model, where), rows) in enumerate(zip(specs, pages)):
+            rows = [r for r in rows if r["k"] <= cursor]
+            if len(rows) >= limit and rows[-1]["k"] == cursor:
+                # транзакция с ключом cursor могла не поместиться в страницу — дочитываем
+                rows += page(cols, model, *where, cursor_key(model, dialect) == cursor,
+                             model.change_seq > rows[-1]["change_seq"], n=None)
+            pages[i] = rows
+    zones, seats, bookings = pages
+
+    out: dict = {"cursor": cursor + XID_CURSOR_BASE if pg else cursor, "has_more": bool(full),
+                 "zones": [], "seats": [], "bookings": [], "deleted": {"zones": [], "seats": []}}
+    for r in zones:
+        del r["change_seq"], r["k"]
+        if r.pop("is_active"):
+            out["zones"].append(r)
+        else:
+            out["deleted"]["zones"].append(r["id"])
+    for r in seats:
+        del r["change_seq"], r["k"]
+        if r.pop("is_active"):
+            out["seats"].append(r)
+        else:
+            out["deleted"]["seats"].append(r["id"])
+    for r in bookings:
+        del r["change_seq"], r["k"]
+        out["bookings"].append(r)
+    return out
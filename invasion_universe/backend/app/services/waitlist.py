@@ -0,0 +1,136 @@
+from __future__ import annotations
+import logging
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from sqlalchemy import select, update, func, and_, or_
+from sqlalchemy.orm import Session
+from app.models.device import Device
+from app.models.waitlist import WaitlistEntry
+from app.schemas.waitlist import WaitlistCreate
+from app.services.catalog import get_catalog
+from app.utils.errors import err
+
+# Лист ожидания: вместо опроса доступности пользователь оставляет заявку на место или
+# зону и интервал. Когда слот освобождается (отмена, no_show), match_waitlist одним
+# индексным запросом находит самые ранние заявки, целиком попадающие в освободившийся
+# интервал, и первому ждущему либо создаёт бронь (auto_book), либо шлёт пуш.
+
+log = logging.getLogger("waitlist")
+
+MAX_WAITLIST_PER_USER = 20
+MATCH_CANDIDATES = 5  # сколько заявок пробуем, если автобронь у первых не прошла
+
+def join_waitlist(db: Session, user_id: int, data: WaitlistCreate) -> WaitlistEntry:
+    start = data.start_time
+    if start.tzinfo is None or any([start.minute, start.second, start.microsecond]):
+        raise err("START_ALIGN", 422)
+    if (data.seat_id is None) == (data.zone_id is None):
+        raise err("WAITLIST_TARGET", 422)
+    catalog = get_catalog()
+    if data.seat_id is not None:
+        s = catalog.seat(data.seat_id)
+        if not s or not s.is_active:
+            raise err("SEAT_NOT_FOUND", 404)
+    else:
+        z = catalog.zones.get(data.zone_id)
+        if not z or not z.is_active:
+            raise err("ZONE_NOT_FOUND", 404)
+    active = db.scalar(select(func.count()).select_from(WaitlistEntry).where(
+        WaitlistEntry.user_id == user_id, WaitlistEntry.status == "waiting",
+    ))
+    if active >= MAX_WAITLIST_PER_USER:
+        raise err("WAITLIST_LIMIT", 429)
+    e = WaitlistEntry(
+        user_id=user_id, seat_id=data.seat_id, zone_id=data.zone_id,
+        seat_type=data.seat_type if data.zone_id is not None else None,
+        start_time=start, end_time=start + timedelta(hours=data.hours), auto_book=data.auto_book, status="waiting",
+    )
+    db.add(e); db.commit(); db.refresh(e)
+    return e
+
+def leave_waitlist(db: Session, user_id: int, entry_id: int) -> WaitlistEntry:
+    e = db.get(WaitlistEntry, entry_id)
+    if not e or e.user_id != user_id:
+        raise err("WAITLIST_NOT_FOUND", 404)
+    if e.status == "waiting":
+        e.status = "cancelled"
+        db.commit(); db.refresh(e)
+    return e
+
+def _claim(db: Session, entry_id: int, status: str) -> bool:
+    # заявку забирает ровно одна отмена, даже если их несколько одновременно
+    n = db.execute(
+        update(WaitlistEntry).where(WaitlistEntry.id == entry_id, WaitlistEntry.status == "waiting")
+        .values(status=status).execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return n == 1
+
+def match_waitlist(db: Session, seat_id: int, start: datetime, end: datetime) -> WaitlistEntry | None:
+    """Вызывается после commit освобождения брони seat_id на [start, end)."""
+    seat = get_catalog().seat(seat_id)
+    if not seat or not seat.is_active:
+        return None
+    now = datetime.now(timezone.utc)
+    stmt = (
+        select(WaitlistEntry)
+        .where(
+            WaitlistEntry.status == "waiting",
+            WaitlistEntry.start_time >= start, WaitlistEntry.start_time < end,
+            WaitlistEntry.end_time <= end, WaitlistEntry.start_time > now,
+            or_(
+                WaitlistEntry.seat_id == seat_id,
+                and_(
+                    WaitlistEntry.zone_id == seat.zone_id,
+                    or_(WaitlistEntry.seat_type.is_(None), WaitlistEntry.seat_type == seat.seat_type),
+                ),
+            ),
+        )
+        .order_by(WaitlistEntry.created_at, WaitlistEntry.id)
+        .limit(MATCH_CANDIDATES)
+    )
+    for e in db.scalars(stmt).all():
+        if not e.auto_book:
+            if _claim(db, e.id, "notified"):
+                _notify(db, e.user_id, "Место освободилось", f"Место {seat.label}, старт {e.start_time.isoformat()}",
+                        {"type": "waitlist_free", "waitlist_id": str(e.id), "seat_id": str(seat_id)})
+                return e
+            continue
+        if not _claim(db, e.id, "booked"):
+            continue
+        from app.services.booking import create_booking
+        hours = int((e.end_time - e.start_time).total_seconds() // 3600)
+        try:
+            b = create_booking(db, user_id=e.user_id, seat_id=seat_id, start=_aware(e.start_time), hours=hours)
+        except Exception as exc:
+            # брони нет — заявка снова ждёт; слот занят (HTTPException) — пробуем следующую,
+            # прочие ошибки пробрасываем после возврата заявки
+            db.rollback()
+            db.execute(update(WaitlistEntry).where(WaitlistEntry.id == e.id).values(status="waiting")
+                       .execution_options(synchronize_session=False))
+            db.commit()
+            if isinstance(exc, HTTPException):
+                continue
+            raise
+        db.execute(update(WaitlistEntry).where(WaitlistEntry.id == e.id).values(booking_id=b.id)
+                   .execution_options(synchronize_session=False))
+        db.commit()
+        _notify(db, e.user_id, "Бронь из листа ожидания", f"Место {seat.label}, старт {e.start_time.isoformat()}",
+                {"type": "waitlist_booked", "waitlist_id": str(e.id), "booking_id": str(b.id)})
+        return e
+    return None
+
+def match_waitlist_safe(db: Session, seat_id: int, start: datetime, end: datetime) -> None:
+    # ошибка листа ожидания не должна ломать отмену/смену статуса
+    try:
+        match_waitlist(db, seat_id, start, end)
+    except Exception:
+        db.rollback()
+        log.exception("waitlist matching failed for seat %s", seat_id)
+
+def _aware(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+def _notify(db: Session, user_id: int, title: str, body: str, data: dict) -> None:
+    from app.services.notify import push_in_background
+    push_in_background(list(db.scalars(select(Device.token).where(Device.user_id == user_id)).all()), title, body, data)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+import asyncio, json, math
+from collections import deque
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.config import settings
+from app.i18n import translate
+from app.i18n.middleware import pick_locale, scope_header
+from app.utils.flight_recorder import phase
+
+# Admission control: у каждой группы маршрутов своя ёмкость (одновременных запросов в воркере),
+# своя очередь и таймаут ожидания в ней. Медленные админские отчёты не занимают потоки и
+# соединения пула, нужные POST /bookings; при перегрузке клиент быстро получает 503 с Retry-After
+# вместо таймаута. Сумма лимитов держится в пределах пула БД и threadpool (40 потоков anyio).
+
+class Bulkhead:
+    def __init__(self, name: str, limit: int, queue: int, timeout: float) -> None:
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.queue:
+            self.rejected += 1
+            return False
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait((fut,), timeout=self.timeout)
+        except BaseException:
+            self._forget(fut)
+            raise
+        if fut.done():
+            return True  # место передано из release(), active уже учтён
+        self._forget(fut)
+        self.timed_out += 1
+        return False
+
+    def _forget(self, fut: asyncio.Future) -> None:
+        if fut.done() and not fut.cancelled():
+            self.release()  # место успели передать, а запрос уже отменён — отдаём дальше
+            return
+        fut.cancel()
+        try:
+            self._waiters.remove(fut)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        # место переходит первому в очереди, не освобождаясь — новый запрос не обгонит очередь
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit, "queue": self.queue, "timeout_seconds": self.timeout,
+            "active": self.active, "waiting": len(self._waiters),
+            "rejected": self.rejected, "timed_out": self.timed_out,
+        }
+
+_bulkheads: dict[str, Bulkhead] = {
+    name: Bulkhead(name, limit, queue, timeout)
+    for name, (limit, queue, timeout) in settings.admission_groups.items()
+}
+
+EXEMPT = ("/health", "/docs", "/redoc", "/openapi.json")
+READ_POSTS = ("/bookings/quote",)
+
+def route_group(method: str, path: str) -> str | None:
+    if path == "/" or path.startswith(EXEMPT):
+        return None
+    if path.startswith("/admin"):
+        return "admin"
+    if path.startswith("/auth"):
+        return "auth"
+    if method in ("GET", "HEAD", "OPTIONS") or path in READ_POSTS:
+        return "reads"
+    return "writes"
+
+def admission_stats() -> dict:
+    return {name: b.stats() for name, b in _bulkheads.items()}
+
+async def _reject(scope: Scope, send: Send, retry_after: float) -> None:
+    loc = pick_locale(scope_header(scope, b"accept-language"))
+    body = json.dumps({"detail": {"code": "OVERLOADED", "message": translate(loc, "OVERLOADED")}},
+                      ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start", "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        bulkhead = _bulkheads.get(route_group(scope["method"], scope["path"]) or "")
+        if bulkhead is None:
+            await self.app(scope, receive, send)
+            return
+        with phase("admission"):
+            admitted = await bulkhead.acquire()
+        if not admitted:
+            await _reject(scope, send, bulkhead.timeout)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            bulkhead.release()
@@ -0,0 +1,195 @@
+from __future__ import annotations
+import gzip, hashlib, hmac, json, logging, os, queue, random, socket, threading, time
+from urllib.parse import parse_qsl
+from jose import jwt
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+from app.i18n.middleware import scope_header
+from app.utils.flight_recorder import match_route
+
+# Запись реального трафика для bench/replay.py (CAPTURE_ENABLED, по умолчанию выключено).
+# На запрос — одна строка NDJSON в CAPTURE_DIR/capture-<host>-<pid>-<время>.ndjson.gz:
+#   t   время начала (unix)       m   метод        r   шаблон маршрута   p   path-параметры
+#   q   query                    b   JSON-тело    f   form-тело          u   псевдоним пользователя
+#   s   статус                   ms  длительность id  id созданного объекта (ответ 201)
+#   ids id созданных броней по порядку, если в ответе список bookings (POST /bookings/group)
+# Анонимизация: email/пароли/токены/тексты заменяются метками "<email>", "<password>", ...;
+# пользователь — HMAC от id на JWT_SECRET (одинаков во всех воркерах, без секрета не обратим).
+# Выборка — по пользователю (CAPTURE_SAMPLE_RATE), чтобы сессия попадала целиком:
+# иначе отмену брони нечем было бы сопоставить при повторе. Пишет фоновый поток; очередь к нему
+# ограничена (CAPTURE_QUEUE_MAX) — если диск не успевает, записи теряются и считаются в dropped.
+
+log = logging.getLogger("capture")
+
+MASKS = {
+    "email": "<email>", "username": "<email>", "password": "<password>", "token": "<token>",
+    "full_name": "<text>", "title": "<text>", "body": "<text>", "data": "<text>",
+}
+EXEMPT = ("/health", "/docs", "/redoc", "/openapi.json", "/admin/slow_requests", "/admin/admission")
+
+def _mask(value, key: str | None = None):
+    if key in MASKS:
+        return MASKS[key]
+    if isinstance(value, dict):
+        return {k: _mask(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_mask(v) for v in value]
+    return value
+
+def pseudonym(user_id: str) -> str:
+    return hmac.new(settings.JWT_SECRET.encode(), f"capture:{user_id}".encode(), hashlib.sha256).hexdigest()[:12]
+
+def _user(scope: Scope) -> str | None:
+    auth = scope_header(scope, b"authorization")
+    if not auth.startswith("Bearer "):
+        return None
+    try:
+        sub = jwt.decode(auth[7:], settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]).get("sub")
+    except Exception:
+        return None
+    return pseudonym(str(sub)) if sub else None
+
+def _sampled(user: str | None) -> bool:
+    rate = settings.CAPTURE_SAMPLE_RATE
+    if rate >= 1:
+        return True
+    if user is None:
+        return random.random() < rate
+    return int(user[:8], 16) / 0xFFFFFFFF < rate
+
+def _decode_body(raw: bytes, content_type: str) -> tuple[object, dict | None]:
+    if not raw:
+        return None, None
+    if content_type.startswith("application/json"):
+        try:
+            return _mask(json.loads(raw)), None
+        except ValueError:
+            return None, None
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        return None, {k: _mask(v, k) for k, v in parse_qsl(raw.decode("latin-1"))}
+    return None, None
+
+# ===== Запись в файлы =====
+_queue: queue.Queue = queue.Queue(maxsize=settings.CAPTURE_QUEUE_MAX)
+dropped = 0  # записи, не влезшие в очередь
+_writer: threading.Thread | None = None
+_writer_lock = threading.Lock()
+_STOP = object()
+
+def _open_file():
+    os.makedirs(settings.CAPTURE_DIR, exist_ok=True)
+    name = f"capture-{socket.gethostname()}-{os.getpid()}-{time.strftime('%Y%m%dT%H%M%S')}.ndjson.gz"
+    return gzip.open(os.path.join(settings.CAPTURE_DIR, name), "wt", encoding="utf-8")
+
+def _write_loop() -> None:
+    f, opened, written = None, 0.0, 0
+    try:
+        while True:
+            try:
+                item = _queue.get(timeout=1.0)
+            except queue.Empty:
+                if f is not None:
+                    f.flush()
+                continue
+            if item is _STOP:
+                return
+            if f is None or time.time() - opened > settings.CAPTURE_ROTATE_SECONDS \
+                    or written > settings.CAPTURE_ROTATE_MB * 1024 * 1024:
+                if f is not None:
+                    f.close()
+                f, opened, written = _open_file(), time.time(), 0
+            line = json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n"
+            f.write(line)
+            written += len(line)
+    except Exception as e:
+        log.warning("capture writer stopped: %s", e)
+    finally:
+        if f is not None:
+            f.close()
+
+def _ensure_writer() -> None:
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        return
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_write_loop, name="traffic-capture", daemon=True)
+            _writer.start()
+
+def _enqueue(item: dict) -> None:
+    # запрос не ждёт диск: при полной очереди запись теряется
+    global dropped
+    _ensure_writer()
+    try:
+        _queue.put_nowait(item)
+    except queue.Full:
+        dropped += 1
+        if dropped == 1 or dropped % 1000 == 0:
+            log.warning("capture queue full, %d requests dropped", dropped)
+
+def stop_capture() -> None:
+    # закрыть текущий файл (иначе у gzip не будет хвоста)
+    if _writer is not None and _writer.is_alive():
+        try:
+            _queue.put(_STOP, timeout=5)
+        except queue.Full:
+            return
+        _writer.join(timeout=5)
+
+class TrafficCaptureMiddleware:
+    def __init__(self, app: ASGIApp, router_app=None) -> None:
+        self.app = app
+        self.router_app = router_app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT):
+            await self.app(scope, receive, send)
+            return
+        user = _user(scope)
+        if not _sampled(user):
+            await self.app(scope, receive, send)
+            return
+        started, t0 = time.time(), time.perf_counter()
+        limit = settings.CAPTURE_MAX_BODY_BYTES
+        body = bytearray()
+        status = 0
+        resp = bytearray()
+
+        async def receive_wrapper() -> Message:
+            message = await receive()
+            if message["type"] == "http.request" and len(body) <= limit:
+                body.extend(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and status == 201 and len(resp) <= limit:
+                resp.extend(message.get("body", b""))
+            await send(message)
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            try:
+                self._record(scope, user, started, time.perf_counter() - t0, status, bytes(body), bytes(resp))
+            except Exception as e:
+                log.warning("request not captured: %s", e)
+
+    def _record(self, scope: Scope, user, started: float, seconds: float, status: int, body: bytes, resp: bytes) -> None:
+        route, params = match_route(self.router_app, scope)
+        query = {k: _mask(v, k) for k, v in parse_qsl(scope.get("query_string", b"").decode("latin-1"))}
+        b, f = _decode_body(body, scope_header(scope, b"content-type")) if len(body) <= settings.CAPTURE_MAX_BODY_BYTES else (None, None)
+        item = {
+            "t": round(started, 3), "m": scope["method"], "r": route, "p": params or None, "q": query or None,
+            "b": b, "f": f, "u": user, "s": status, "ms": round(seconds * 1000, 1),
+        }
+        if resp:
+            try:
+                created = json.loads(resp)
+                item["id"] = created.get("id") if isinstance(created, dict) else None
+                if isinstance(created, dict) and isinstance(created.get("bookings"), list):
+                    item["ids"] = [b.get("id") for b in created["bookings"] if isinstance(b, dict)]
+            except ValueError:
+                pass
+        _enqueue(item)
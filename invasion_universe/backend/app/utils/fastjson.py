@@ -0,0 +1,34 @@
+from __future__ import annotations
+from typing import Any
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from app.utils.flight_recorder import phase
+
+try:
+    import orjson
+except ImportError:  # orjson — необязательная зависимость, без неё просто медленнее
+    orjson = None
+
+class FastJSONResponse(JSONResponse):
+    """JSON-ответ через orjson для «горячих» эндпоинтов.
+
+    Эндпоинт объявляет response_model (схема в OpenAPI остаётся) и
+    response_class=FastJSONResponse, а возвращает FastJSONResponse(data) с уже
+    готовыми dict/list — FastAPI не валидирует их повторно через Pydantic.
+    datetime сериализуются как у Pydantic (UTC как "Z"), так что формат не меняется.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with phase("serialize"):
+            if orjson is None:
+                return super().render(jsonable_encoder(content))
+            return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+def schema_columns(model: type, schema: type[BaseModel]) -> list:
+    """Колонки модели под поля схемы: select(*schema_columns(Booking, BookingRead))
+    отдаёт строки ровно той формы, что описана в response_model, без ORM-объектов."""
+    return [getattr(model, name) for name in schema.model_fields]
+
+def rows_to_dicts(result) -> list[dict]:
+    return [dict(r) for r in result.mappings()]
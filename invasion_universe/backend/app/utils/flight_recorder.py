@@ -0,0 +1,221 @@
+from __future__ import annotations
+import json, logging, os, sys, threading, time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+
+# Бортовой самописец медленных запросов. На каждый запрос — объект Trace в ContextVar
+# (копируется в поток threadpool вместе с контекстом), в него пишут:
+#   phase("auth"/"bcrypt"/"serialize"/...) — суммарное время фаз,
+#   события SQLAlchemy — время и текст каждого SQL, обёртка клиента Redis — время команд.
+# Пока запрос идёт дольше половины порога, фоновый поток раз в FLIGHT_RECORDER_SAMPLE_MS
+# снимает стек потока, в котором запрос сейчас выполняется. Запросы дольше
+# FLIGHT_RECORDER_THRESHOLD_MS попадают в кольцевой буфер; остальные просто выбрасываются.
+
+log = logging.getLogger("flight_recorder")
+
+MAX_STACK_DEPTH = 12
+
+class Trace:
+    __slots__ = ("method", "path", "scope", "started", "started_at", "tid", "phases", "sql", "sql_total",
+                 "sql_count", "redis_total", "redis_count", "samples")
+
+    def __init__(self, scope: Scope) -> None:
+        self.method = scope.get("method", "")
+        self.path = scope.get("path", "")
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc)
+        self.tid = threading.get_ident()
+        self.phases: dict[str, float] = {}
+        self.sql: list[tuple[float, float, str]] = []  # (смещение от начала, длительность, SQL)
+        self.sql_total = 0.0
+        self.sql_count = 0
+        self.redis_total = 0.0
+        self.redis_count = 0
+        self.samples: list[tuple[float, list[str]]] = []
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+
+_buffer: deque[dict] = deque(maxlen=settings.FLIGHT_RECORDER_SIZE)
+_active: dict[int, Trace] = {}
+_active_lock = threading.Lock()
+
+@contextmanager
+def phase(name: str):
+    t = current_trace.get()
+    if t is None:
+        yield
+        return
+    t.tid = threading.get_ident()
+    t0 = time.perf_counter()
+    io0 = t.sql_total + t.redis_total
+    try:
+        yield
+    finally:
+        # без SQL/Redis внутри фазы — они учитываются отдельно, сумма не двоится
+        t.add_phase(name, time.perf_counter() - t0 - (t.sql_total + t.redis_total - io0))
+
+# ===== SQL =====
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # время старта — на контексте выполнения, а не в стеке на соединении: у упавшего
+    # запроса after_cursor_execute не бывает, и запись в стеке пережила бы его
+    if context is not None:
+        context._fr_t0 = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    t0 = getattr(context, "_fr_t0", None)
+    if t0 is None:
+        return
+    t = current_trace.get()
+    if t is None:
+        return
+    now = time.perf_counter()
+    t.tid = threading.get_ident()
+    t.sql_total += now - t0
+    t.sql_count += 1
+    if len(t.sql) < settings.FLIGHT_RECORDER_MAX_SQL:
+        t.sql.append((t0 - t.started, now - t0, " ".join(statement.split())[:300]))
+
+def instrument_engine(engine) -> None:
+    from sqlalchemy import event
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+# ===== Redis =====
+def instrument_redis(client) -> None:
+    execute = client.execute_command
+
+    def timed(*args, **kwargs):
+        t = current_trace.get()
+        if t is None:
+            return execute(*args, **kwargs)
+        t0 = time.perf_counter()
+        try:
+            return execute(*args, **kwargs)
+        finally:
+            t.redis_total += time.perf_counter() - t0
+            t.redis_count += 1
+    client.execute_command = timed
+
+# ===== Сэмплирование стеков =====
+def _stack(frame) -> list[str]:
+    out = []
+    while frame is not None and len(out) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        out.append(f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}")
+        frame = frame.f_back
+    return out
+
+def _sampler(stop: threading.Event) -> None:
+    interval = settings.FLIGHT_RECORDER_SAMPLE_MS / 1000
+    after = settings.FLIGHT_RECORDER_THRESHOLD_MS / 2000
+    while not stop.wait(interval):
+        with _active_lock:
+            traces = list(_active.values())
+        if not traces:
+            continue
+        now = time.perf_counter()
+        frames = None
+        for t in traces:
+            if now - t.started < after or len(t.samples) >= settings.FLIGHT_RECORDER_MAX_SAMPLES:
+                continue
+            if frames is None:
+                frames = sys._current_frames()
+            f = frames.get(t.tid)
+            if f is not None:
+                t.samples.append((now - t.started, _stack(f)))
+
+_stop = threading.Event()
+_sampler_thread: threading.Thread | None = None
+
+def start_sampler() -> None:
+    global _sampler_thread
+    if _sampler_thread is not None and _sampler_thread.is_alive():
+        return
+    _stop.clear()
+    _sampler_thread = threading.Thread(target=_sampler, args=(_stop,), name="flight-sampler", daemon=True)
+    _sampler_thread.start()
+
+def stop_sampler() -> None:
+    _stop.set()
+
+# ===== Буфер =====
+def match_route(app, scope: Scope) -> tuple[str, dict]:
+    """Шаблон пути и path-параметры запроса; ищем только для тех запросов, что записываем."""
+    for route in getattr(app, "routes", ()):
+        try:
+            match, child = route.matches(scope)
+        except Exception:
+            continue
+        if match == Match.FULL:
+            return getattr(route, "path", scope.get("path", "")), child.get("path_params", {})
+    return scope.get("path", ""), {}
+
+def _record(app, t: Trace, status: int, total: float) -> None:
+    known = t.sql_total + t.redis_total + sum(t.phases.values())
+    _buffer.append({
+        "at": t.started_at.isoformat(), "method": t.method, "path": t.path,
+        "route": match_route(app, t.scope)[0], "status": status, "total_ms": round(total * 1000, 2),
+        "phases_ms": {
+            **{k: round(v * 1000, 2) for k, v in t.phases.items()},
+            "db": round(t.sql_total * 1000, 2), "redis": round(t.redis_total * 1000, 2),
+            "other": round(max(0.0, total - known) * 1000, 2),
+        },
+        "db_statements": t.sql_count, "redis_commands": t.redis_count,
+        "sql": [{"at_ms": round(a * 1000, 2), "ms": round(d * 1000, 2), "sql": s} for a, d, s in t.sql],
+        "stack_samples": [{"at_ms": round(a * 1000, 1), "stack": st} for a, st in t.samples],
+    })
+
+def slow_requests(limit: int | None = None) -> list[dict]:
+    items = list(_buffer)[::-1]  # свежие первыми
+    return items[:limit] if limit else items
+
+def dump_to_file(path: str | None = None) -> str:
+    path = path or os.path.join(
+        settings.FLIGHT_RECORDER_DUMP_DIR, f"slow-requests-{os.getpid()}-{int(time.time())}.json"
+    )
+    with open(path, "w") as f:
+        json.dump(slow_requests(), f, ensure_ascii=False, indent=1)
+    return path
+
+class FlightRecorderMiddleware:
+    def __init__(self, app: ASGIApp, router_app=None) -> None:
+        self.app = app
+        self.router_app = router_app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        t = Trace(scope)
+        token = current_trace.set(t)
+        key = id(t)
+        with _active_lock:
+            _active[key] = t
+        status = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            with _active_lock:
+                _active.pop(key, None)
+            current_trace.reset(token)
+            total = time.perf_counter() - t.started
+            if total * 1000 >= settings.FLIGHT_RECORDER_THRESHOLD_MS:
+                try:
+                    _record(self.router_app, t, status, total)
+                except Exception as e:
+                    log.warning("slow request not recorded: %s", e)
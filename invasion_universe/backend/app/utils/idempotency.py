@@ -0,0 +1,89 @@
+from __future__ import annotations
+import hashlib, json, time, uuid
+from typing import Any, Callable
+from fastapi.responses import JSONResponse
+from app.config import settings
+from app.utils.errors import err
+from app.utils.locks import get_redis
+
+# Состояния записи idem:{user}:{key}:
+#   {"state": "pending", "fp": ..., "owner": ...}       — запрос в работе
+#   {"state": "done", "fp": ..., "status": ..., "body": ...} — сохранённый ответ
+# owner — случайный токен захвата: если pending истёк (IDEMPOTENCY_LOCK_SECONDS) и ключ взял
+# повтор, первый запрос не должен ни удалить, ни перезаписать чужой захват.
+REPLAY_HEADER = "Idempotent-Replayed"
+
+# заменить (ARGV[2]) или удалить (ARGV[2] == "") запись, только если в ней всё ещё наш pending
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+  return 0
+end
+if ARGV[2] == '' then
+  redis.call('DEL', KEYS[1])
+else
+  redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+return 1
+"""
+
+def idem_key(user_id: int, key: str) -> str:
+    return f"idem:{user_id}:{key}"
+
+def fingerprint(payload: Any) -> str:
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _replay(entry: dict) -> JSONResponse:
+    return JSONResponse(status_code=entry["status"], content=entry["body"], headers={REPLAY_HEADER: "true"})
+
+def idempotent(user_id: int, key: str | None, payload: Any, status_code: int, fn: Callable[[], Any]) -> Any:
+    """Выполняет fn() один раз на (user, Idempotency-Key).
+
+    fn должен вернуть JSON-совместимое тело ответа. Повтор с тем же ключом отдаёт
+    сохранённый ответ из Redis, параллельный дубликат ждёт завершения первого запроса.
+    Ошибки (HTTPException и прочие) не кэшируются — ключ освобождается для повтора.
+    """
+    if not key:
+        return fn()
+    rkey = idem_key(user_id, key)
+    fp = fingerprint(payload)
+    pending = json.dumps({"state": "pending", "fp": fp, "owner": uuid.uuid4().hex})
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+
+    while True:
+        try:
+            r = get_redis()
+            claimed = r.set(rkey, pending, nx=True, ex=settings.IDEMPOTENCY_LOCK_SECONDS)
+            raw = None if claimed else r.get(rkey)
+        except Exception:
+            # Redis недоступен — работаем без идемпотентности (как acquire_lock)
+            return fn()
+
+        if claimed:
+            break
+        if raw is None:
+            continue  # ключ освободили между SET и GET — пробуем захватить снова
+        entry = json.loads(raw)
+        if entry.get("fp") != fp:
+            raise err("IDEMPOTENCY_KEY_REUSED", 422)
+        if entry.get("state") == "done":
+            return _replay(entry)
+        if time.monotonic() >= deadline:
+            raise err("IDEMPOTENCY_IN_PROGRESS", 409)
+        time.sleep(settings.IDEMPOTENCY_POLL_SECONDS)
+
+    try:
+        body = fn()
+    except BaseException:
+        _release(r, rkey, pending, "")
+        raise
+
+    done = {"state": "done", "fp": fp, "status": status_code, "body": body}
+    _release(r, rkey, pending, json.dumps(done))
+    return body
+
+def _release(r, rkey: str, pending: str, value: str) -> None:
+    try:
+        r.register_script(_RELEASE_LUA)(keys=[rkey], args=[pending, value, settings.IDEMPOTENCY_TTL_SECONDS])
+    except Exception:
+        pass
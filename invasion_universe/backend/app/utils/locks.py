@@ -1,21 +1,51 @@
 from __future__ import annotations
-import os, time
-from typing import Optional
-import redis
+import os, threading, time
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import redis
 
 _redis: Optional[redis.Redis] = None
 
+def redis_url() -> str:
+    # пустой REDIS_URL — работа без Redis (SQLite-профиль на одной машине)
+    return os.getenv("REDIS_URL", "redis://redis:6379/0")
+
 def get_redis() -> redis.Redis:
     global _redis
     if _redis is None:
-        url = os.getenv("REDIS_URL", "redis://redis:6379/0")
-        _redis = redis.from_url(url, decode_responses=True)
+        url = redis_url()
+        if not url:
+            raise RuntimeError("Redis disabled (REDIS_URL is empty)")
+        import redis  # ленивый импорт: не грузим клиент в воркер, пока он не нужен
+        client = redis.from_url(url, decode_responses=True)
+        from app.config import settings
+        if settings.FLIGHT_RECORDER_ENABLED:
+            from app.utils.flight_recorder import instrument_redis
+            instrument_redis(client)
+        _redis = client
     return _redis
 
+def reset_redis_after_fork() -> None:
+    # пул соединений родителя нельзя использовать в дочернем процессе
+    global _redis
+    _redis = None
+
 def seat_lock_key(seat_id: int, start_iso: str, end_iso: str) -> str:
     return f"lock:seat:{seat_id}:{start_iso}->{end_iso}"
 
+# без Redis блокировки живут в памяти процесса (между процессами SQLite всё равно пишет по одному)
+_local_locks: dict[str, float] = {}
+_local_guard = threading.Lock()
+
 def acquire_lock(key: str, ttl_seconds: int = 300) -> bool:
+    if not redis_url():
+        now = time.monotonic()
+        with _local_guard:
+            if _local_locks.get(key, 0.0) > now:
+                return False
+            _local_locks[key] = now + ttl_seconds
+            return True
     # SET NX EX — атомарная попытка захвата
     try:
         return bool(get_redis().set(key, "1", nx=True, ex=ttl_seconds))
@@ -24,6 +54,10 @@ def acquire_lock(key: str, ttl_seconds: int = 300) -> bool:
         return True
 
 def release_lock(key: str) -> None:
+    if not redis_url():
+        with _local_guard:
+            _local_locks.pop(key, None)
+        return
     try:
         get_redis().delete(key)
     except Exception:
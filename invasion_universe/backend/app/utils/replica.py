@@ -0,0 +1,26 @@
+from __future__ import annotations
+from app.config import settings
+from app.utils.locks import get_redis
+
+# Маркер «пользователь недавно писал»: его чтения на REPLICA_PIN_SECONDS идут в primary,
+# чтобы он видел свою бронь/отмену, даже если реплика ещё не догнала.
+
+def recent_write_key(user_id: int) -> str:
+    return f"ryw:user:{user_id}"
+
+def mark_recent_write(*user_ids: int) -> None:
+    # все — одним pipeline (массовая смена статусов задевает брони многих пользователей)
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for uid in dict.fromkeys(user_ids):
+            pipe.set(recent_write_key(uid), "1", ex=settings.REPLICA_PIN_SECONDS)
+        pipe.execute()
+    except Exception:
+        pass
+
+def recently_wrote(user_id: int) -> bool | None:
+    # None — неизвестно (Redis недоступен): реплике не доверяем, решает вызывающий
+    try:
+        return bool(get_redis().exists(recent_write_key(user_id)))
+    except Exception:
+        return None
@@ -1,17 +1,24 @@
 from __future__ import annotations
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Any, Optional
 from jose import jwt
-from passlib.context import CryptContext
 from app.config import settings
+from app.utils.flight_recorder import phase
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=1)
+def pwd_context():
+    # passlib/bcrypt нужны только на login/register — грузим при первом использовании
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    with phase("bcrypt"):
+        return pwd_context().hash(password)
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+    with phase("bcrypt"):
+        return pwd_context().verify(password, hashed)
 
 def create_access_token(subject: str, expires_minutes: Optional[int] = None) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes or settings.ACCESS_TOKEN_EXPIRES_MIN)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+import logging, threading, time, uuid
+from typing import Callable
+from app.config import settings
+from app.utils.locks import get_redis
+
+# Single-flight: одинаковые одновременные запросы (одна дата/зона после пуша) считаются
+# один раз. В процессе — первый вызов по ключу считает, остальные ждут его результат.
+# Между воркерами (SINGLEFLIGHT_REDIS) — короткая аренда sf:lease:{key}: держатель кладёт
+# готовый ответ в sf:result:{key} на SINGLEFLIGHT_RESULT_TTL_MS, остальные воркеры его ждут.
+# Результат — уже сериализованные байты ответа, так что ожидающие не сериализуют повторно.
+
+log = logging.getLogger("singleflight")
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: bytes | None = None
+        self.error: BaseException | None = None
+
+_calls: dict[str, _Call] = {}
+_calls_lock = threading.Lock()
+
+def single_flight(key: str, fn: Callable[[], bytes]) -> bytes:
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+    if not leader:
+        if call.done.wait(settings.SINGLEFLIGHT_WAIT_SECONDS):
+            if call.error is not None:
+                raise call.error
+            return call.result
+        return fn()  # ведущий завис — считаем сами
+    try:
+        call.result = _across_workers(key, fn) if settings.SINGLEFLIGHT_REDIS else fn()
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _calls_lock:
+            _calls.pop(key, None)
+        call.done.set()
+
+def _across_workers(key: str, fn: Callable[[], bytes]) -> bytes:
+    lease, result_key = f"sf:lease:{key}", f"sf:result:{key}"
+    token = uuid.uuid4().hex
+    try:
+        r = get_redis()
+        cached = r.get(result_key)
+        if cached is not None:
+            return cached.encode("utf-8")
+        owner = r.set(lease, token, nx=True, px=settings.SINGLEFLIGHT_LEASE_MS)
+    except Exception:
+        return fn()  # Redis недоступен — только внутрипроцессная склейка
+
+    if owner:
+        body = fn()
+        try:
+            r.set(result_key, body.decode("utf-8"), px=settings.SINGLEFLIGHT_RESULT_TTL_MS)
+            if r.get(lease) == token:
+                r.delete(lease)
+        except Exception as e:
+            log.warning("single-flight result for %s not shared: %s", key, e)
+        return body
+
+    deadline = time.monotonic() + settings.SINGLEFLIGHT_LEASE_MS / 1000
+    try:
+        while time.monotonic() < deadline:
+            cached = r.get(result_key)
+            if cached is not None:
+                return cached.encode("utf-8")
+            if not r.exists(lease):
+                break  # держатель упал или результат уже истёк
+            time.sleep(settings.SINGLEFLIGHT_POLL_SECONDS)
+    except Exception:
+        pass
+    return fn()
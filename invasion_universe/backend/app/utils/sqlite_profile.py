@@ -0,0 +1,160 @@
+from __future__ import annotations
+import threading, time
+from datetime import timezone
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite.base import DATETIME as SQLITE_DATETIME
+from sqlalchemy.orm import Session
+from sqlalchemy.types import DateTime
+from app.config import settings
+from app.utils.errors import err
+
+# Профиль SQLite для маленьких клубов (одна машина, без Postgres/Redis).
+#  - при подключении: WAL, busy_timeout, synchronous, кэш/mmap;
+#  - чтения идут без явной транзакции (каждый SELECT видит свежие данные, как READ COMMITTED
+#    в Postgres), BEGIN IMMEDIATE — перед первой записью: долгий читающий снимок не пытается
+#    стать писателем (в WAL это SQLITE_BUSY_SNAPSHOT без ожидания);
+#  - записи процесса идут через очередь (FIFO-шлюз): сессия встаёт в неё при первой записи и
+#    держит место до конца транзакции — потоки воркера не дерутся за блокировку файла,
+#    между воркерами остаётся busy_timeout;
+#  - begin_write(db): проверка конфликта и вставка брони в одной транзакции под шлюзом —
+#    вместо Redis-блокировки места;
+#  - DateTime(timezone=True) читается aware (UTC) и пишется в UTC, как в Postgres.
+
+_GATE = "sqlite_write_gate"
+_WRITES = ("INSERT", "UPDATE", "DELETE", "REPLAC")
+
+class WriteQueue:
+    """FIFO-очередь писателей процесса (билетный замок). Место в очереди принадлежит сессии,
+    а не потоку: sync-зависимости FastAPI открывают и закрывают сессию в разных потоках пула,
+    а поток, отдавший запрос, тут же берёт следующий — со своей сессией, которая должна ждать."""
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._next = 0
+        self._serving = 0
+        self._owner: object | None = None
+        self._abandoned: set[int] = set()
+
+    def acquire(self, owner: object, timeout: float) -> bool:
+        with self._cond:
+            if self._owner is owner:
+                return True
+            ticket = self._next
+            self._next += 1
+            deadline = time.monotonic() + timeout
+            while self._serving != ticket:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    self._abandoned.add(ticket)  # ушедший по таймауту билет очередь пропустит
+                    return False
+                self._cond.wait(left)
+            self._owner = owner
+            return True
+
+    def release(self, owner: object) -> None:
+        with self._cond:
+            if self._owner is not owner:
+                return
+            self._owner = None
+            self._serving += 1
+            while self._serving in self._abandoned:
+                self._abandoned.discard(self._serving)
+                self._serving += 1
+            self._cond.notify_all()
+
+write_queue = WriteQueue()
+
+def _enter(session: Session) -> None:
+    if session.info.get(_GATE):
+        return
+    if not write_queue.acquire(session, settings.SQLITE_WRITE_QUEUE_TIMEOUT_SECONDS):
+        e = err("DB_BUSY", 503)
+        e.headers = {"Retry-After": "1"}
+        raise e
+    session.info[_GATE] = True
+
+def _leave(session: Session) -> None:
+    if session.info.pop(_GATE, False):
+        write_queue.release(session)
+
+def begin_write(db: Session) -> None:
+    """Открыть пишущую транзакцию до чтений, от которых зависит запись (проверка конфликта)."""
+    if db.get_bind().dialect.name != "sqlite":
+        return
+    _enter(db)
+    try:
+        _begin_immediate(db.connection().connection.dbapi_connection)
+    except BaseException:
+        _leave(db)
+        raise
+
+def _begin_immediate(dbapi_conn) -> None:
+    if not dbapi_conn.in_transaction:
+        dbapi_conn.execute("BEGIN IMMEDIATE")
+
+class UTCDateTime(SQLITE_DATETIME):
+    # SQLite хранит строку без зоны: пишем в UTC, читаем с tzinfo=UTC
+    def bind_processor(self, dialect):
+        proc = super().bind_processor(dialect)
+        if not self.timezone:
+            return proc
+
+        def process(value):
+            if value is not None and getattr(value, "tzinfo", None) is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            return proc(value) if proc else value
+        return process
+
+    def result_processor(self, dialect, coltype):
+        proc = super().result_processor(dialect, coltype)
+        if not self.timezone:
+            return proc
+
+        def process(value):
+            value = proc(value) if proc else value
+            if value is not None and value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            return value
+        return process
+
+def configure_sqlite(engine) -> None:
+    engine.dialect.colspecs = {**engine.dialect.colspecs, DateTime: UTCDateTime}
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, record) -> None:
+        dbapi_conn.isolation_level = None  # pysqlite сам BEGIN не шлёт — см. _before_write
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cur.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cur.execute("PRAGMA foreign_keys=ON")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_MB) * 1024}")
+        cur.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_MB) * 1024 * 1024}")
+        cur.close()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_write(conn, cursor, statement, parameters, context, executemany) -> None:
+        # первая запись в транзакции SQLAlchemy открывает транзакцию SQLite (commit/rollback
+        # pysqlite закрывают её сами); SELECT до этого читают вне транзакции
+        if conn.in_transaction() and statement.lstrip()[:6].upper() in _WRITES:
+            _begin_immediate(cursor.connection)
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session: Session, ctx, instances) -> None:
+    if (session.new or session.dirty or session.deleted) and _is_sqlite(session):
+        _enter(session)
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_execute(state) -> None:
+    if (state.is_update or state.is_insert or state.is_delete) and _is_sqlite(state.session):
+        _enter(state.session)
+
+@event.listens_for(Session, "after_transaction_end")
+def _after_transaction_end(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        _leave(session)
+
+def _is_sqlite(session: Session) -> bool:
+    bind = session.bind
+    return bind is not None and bind.dialect.name == "sqlite"
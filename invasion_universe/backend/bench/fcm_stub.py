@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Локальная заглушка FCM (legacy HTTP API) для тестов рассылок.
+
+Запуск (из backend/):
+    uvicorn bench.fcm_stub:app --port 9099
+    FCM_URL=http://127.0.0.1:9099/fcm/send FCM_SERVER_KEY=stub uvicorn app.main:app
+Токены, начинающиеся с "invalid", получают NotRegistered. FCM_STUB_LATENCY_MS задаёт задержку ответа.
+GET /stats — сколько запросов и токенов пришло.
+"""
+from __future__ import annotations
+import asyncio, os
+from fastapi import FastAPI, Request
+
+LATENCY = float(os.getenv("FCM_STUB_LATENCY_MS", "50")) / 1000
+
+app = FastAPI(title="FCM stub")
+stats = {"requests": 0, "tokens": 0, "max_in_flight": 0}
+_in_flight = 0
+
+@app.post("/fcm/send")
+async def send(request: Request):
+    global _in_flight
+    payload = await request.json()
+    tokens = payload.get("registration_ids") or [payload.get("to")]
+    _in_flight += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], _in_flight)
+    try:
+        await asyncio.sleep(LATENCY)
+    finally:
+        _in_flight -= 1
+    stats["requests"] += 1
+    stats["tokens"] += len(tokens)
+    results = [
+        {"error": "NotRegistered"} if str(t).startswith("invalid") else {"message_id": f"stub:{stats['tokens']}:{i}"}
+        for i, t in enumerate(tokens)
+    ]
+    ok = sum("message_id" in r for r in results)
+    return {"multicast_id": stats["requests"], "success": ok, "failure": len(results) - ok, "results": results}
+
+@app.get("/stats")
+async def get_stats():
+    return stats
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Профиль времени импорта app.main (то, что платит каждый воркер без preload).
+
+Запуск (из backend/, с DATABASE_URL/JWT_SECRET в окружении):
+    python -m bench.import_profile [--module app.main] [--top 25]
+Показывает общее время, самые дорогие модули (cumulative) и сумму по пакетам верхнего уровня.
+"""
+from __future__ import annotations
+import argparse, re, subprocess, sys, time
+from collections import defaultdict
+
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$")
+
+def profile(module: str) -> tuple[float, list[tuple[str, int, int, int]]]:
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        sys.exit("\n".join(l for l in proc.stderr.splitlines() if not l.startswith("import time:")))
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if m:
+            self_us, cum_us, indent, name = m.groups()
+            rows.append((name, int(self_us), int(cum_us), len(indent) // 2))
+    return wall, rows
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--module", default="app.main")
+    ap.add_argument("--top", type=int, default=25)
+    args = ap.parse_args()
+
+    wall, rows = profile(args.module)
+    print(f"python -c 'import {args.module}': {wall * 1000:.0f} ms wall (включая старт интерпретатора)")
+
+    target = next((r for r in rows if r[0] == args.module), None)
+    if target:
+        print(f"{args.module}: {target[2] / 1000:.1f} ms cumulative import")
+
+    print(f"\nTop {args.top} modules by cumulative time:")
+    for name, self_us, cum_us, depth in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"  {cum_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f})  {'  ' * min(depth, 6)}{name}")
+
+    by_pkg: dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_pkg[name.split(".", 1)[0]] += self_us
+    print("\nSelf time by top-level package:")
+    for pkg, us in sorted(by_pkg.items(), key=lambda kv: kv[1], reverse=True)[:15]:
+        print(f"  {us / 1000:8.1f} ms  {pkg}")
+
+if __name__ == "__main__":
+    main()
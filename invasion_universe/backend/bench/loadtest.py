@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Нагрузочный прогон «пятничный вечер» против запущенного API.
+
+Запуск (из backend/, API и БД подняты локально, есть зона с местами — create_test_data.py):
+    python -m bench.loadtest --base-url http://127.0.0.1:8000 --users 200 --duration 60
+
+Каждый виртуальный пользователь регистрируется и логинится (массовый логин — разгон),
+затем до конца прогона выбирает сценарии по весам --mix:
+    login         повторный логин
+    availability  опрос /bookings/availability/v2 по зоне
+    book          бронь одного из --hot-seats мест на вечерние часы (--hot-hours) — конкуренция за слоты
+    cancel        отмена своей брони
+    my            /bookings/me
+    report        админский /admin/bookings/today
+В конце — таблица по эндпоинтам: rps, p50/p95/p99, доля ошибок (сеть/5xx) и конфликтов (409),
+плюс проверка, что среди успешных неотменённых броней нет пересечений по месту.
+"""
+from __future__ import annotations
+import argparse, asyncio, json, random, sys, time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+import httpx
+
+DEFAULT_MIX = "login=1,availability=6,book=3,cancel=1,my=2,report=0.2"
+
+class Stats:
+    def __init__(self) -> None:
+        self.latency: dict[str, list[float]] = defaultdict(list)
+        self.codes: dict[str, Counter] = defaultdict(Counter)
+
+    def add(self, name: str, status: int, seconds: float) -> None:
+        self.latency[name].append(seconds)
+        self.codes[name][status] += 1
+
+    def report(self, wall: float) -> list[dict]:
+        rows = []
+        for name in sorted(self.latency):
+            lat = sorted(self.latency[name])
+            n = len(lat)
+            codes = self.codes[name]
+            errors = sum(c for s, c in codes.items() if s == 0 or s >= 500)
+            rows.append({
+                "endpoint": name, "n": n, "rps": n / wall,
+                "p50_ms": _pct(lat, 50) * 1000, "p95_ms": _pct(lat, 95) * 1000,
+                "p99_ms": _pct(lat, 99) * 1000, "max_ms": lat[-1] * 1000,
+                "error_rate": errors / n, "conflict_rate": codes.get(409, 0) / n,
+                "codes": {str(s): c for s, c in sorted(codes.items())},
+            })
+        return rows
+
+def _pct(sorted_values: list[float], p: float) -> float:
+    # nearest-rank
+    k = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[k]
+
+class Run:
+    def __init__(self, args: argparse.Namespace, client: httpx.AsyncClient) -> None:
+        self.args = args
+        self.client = client
+        self.stats = Stats()
+        self.admin: dict[str, str] = {}
+        self.zone_id = 0
+        self.seat_ids: list[int] = []
+        self.day = date.fromisoformat(args.date) if args.date else date.today() + timedelta(days=random.randint(30, 300))
+        lo, hi = (int(x) for x in args.hot_hours.split("-"))
+        self.hot_hours = list(range(lo, hi + 1))
+        self.active: dict[int, tuple[int, datetime, datetime]] = {}  # booking_id -> (seat, start, end)
+
+    async def call(self, name: str, method: str, url: str, **kw) -> httpx.Response | None:
+        t0 = time.perf_counter()
+        try:
+            r = await self.client.request(method, url, **kw)
+        except httpx.HTTPError:
+            self.stats.add(name, 0, time.perf_counter() - t0)
+            return None
+        self.stats.add(name, r.status_code, time.perf_counter() - t0)
+        return r
+
+    async def login(self, email: str, password: str) -> dict[str, str] | None:
+        r = await self.call("POST /auth/login", "POST", "/auth/login", data={"username": email, "password": password})
+        if r is None or r.status_code != 200:
+            return None
+        return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    async def setup(self) -> None:
+        a = self.args
+        admin = await self.login(a.admin_email, a.admin_password)
+        if admin is None:
+            sys.exit(f"admin login failed for {a.admin_email}")
+        self.admin = admin
+        zones = (await self.client.get("/zones")).json()
+        if not zones:
+            sys.exit("no zones: seed data first (create_test_data.py or /admin/zones/{id}/seed_seats)")
+        self.zone_id = a.zone_id or zones[0]["id"]
+        seats = (await self.client.get(f"/zones/{self.zone_id}/seats")).json()
+        self.seat_ids = [s["id"] for s in seats][: a.hot_seats]
+        if not self.seat_ids:
+            sys.exit(f"zone {self.zone_id} has no seats")
+
+    async def user(self, i: int, deadline: float, ramp: asyncio.Semaphore) -> None:
+        email, password = f"load{i}@example.com", "loadpass123"
+        async with ramp:
+            # регистрация может уже существовать с прошлого прогона — 400 не считаем ошибкой сценария
+            await self.call("POST /auth/register", "POST", "/auth/register", json={"email": email, "password": password})
+            headers = await self.login(email, password)
+        if headers is None:
+            return
+        own: list[int] = []
+        names, weights = zip(*self.mix())
+        while time.monotonic() < deadline:
+            scenario = random.choices(names, weights)[0]
+            if scenario == "login":
+                headers = await self.login(email, password) or headers
+            elif scenario == "availability":
+                await self.call("GET /bookings/availability/v2", "GET", "/bookings/availability/v2",
+                                params={"date_str": self.day.isoformat(), "zone_id": self.zone_id})
+            elif scenario == "book":
+                await self.book(headers, own)
+            elif scenario == "cancel" and own:
+                bid = own.pop(random.randrange(len(own)))
+                r = await self.call("DELETE /bookings/{id}", "DELETE", f"/bookings/{bid}", headers=headers)
+                if r is not None and r.status_code == 200:
+                    self.active.pop(bid, None)
+            elif scenario == "my":
+                await self.call("GET /bookings/me", "GET", "/bookings/me", headers=headers)
+            elif scenario == "report":
+                await self.call("GET /admin/bookings/today", "GET", "/admin/bookings/today",
+                                params={"zone_id": self.zone_id}, headers=self.admin)
+            if self.args.think_ms:
+                await asyncio.sleep(random.expovariate(1000 / self.args.think_ms))
+
+    async def book(self, headers: dict[str, str], own: list[int]) -> None:
+        seat = random.choice(self.seat_ids)
+        hour = random.choice(self.hot_hours)
+        start = datetime(self.day.year, self.day.month, self.day.day, hour, tzinfo=timezone.utc)
+        hours = random.choice((1, 1, 2))
+        r = await self.call("POST /bookings", "POST", "/bookings", headers=headers,
+                            json={"seat_id": seat, "start_time": start.isoformat(), "hours": hours})
+        if r is not None and r.status_code == 201:
+            bid = r.json()["id"]
+            own.append(bid)
+            self.active[bid] = (seat, start, start + timedelta(hours=hours))
+
+    def mix(self) -> list[tuple[str, float]]:
+        out = []
+        for part in self.args.mix.split(","):
+            name, _, w = part.partition("=")
+            out.append((name.strip(), float(w or 1)))
+        return out
+
+    def overlaps(self) -> int:
+        by_seat: dict[int, list[tuple[datetime, datetime]]] = defaultdict(list)
+        for seat, s, e in self.active.values():
+            by_seat[seat].append((s, e))
+        n = 0
+        for spans in by_seat.values():
+            spans.sort()
+            n += sum(1 for (_, e1), (s2, _) in zip(spans, spans[1:]) if s2 < e1)
+        return n
+
+def print_table(rows: list[dict], wall: float, overlaps: int | None = None) -> None:
+    print(f"{'endpoint':32} {'n':>7} {'rps':>8} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'maxms':>8} {'err%':>6} {'409%':>6}")
+    for r in rows:
+        print(f"{r['endpoint']:32} {r['n']:>7} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} {r['error_rate'] * 100:>6.2f} {r['conflict_rate'] * 100:>6.2f}")
+    total = sum(r["n"] for r in rows)
+    line = f"\n{total} requests in {wall:.1f}s ({total / wall:.1f} rps)"
+    print(line if overlaps is None else f"{line}; overlapping successful bookings: {overlaps}")
+
+async def main_async(args: argparse.Namespace) -> int:
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        run = Run(args, client)
+        await run.setup()
+        print(f"zone {run.zone_id}, hot seats {run.seat_ids}, day {run.day}, {args.users} users, {args.duration}s")
+        ramp = asyncio.Semaphore(args.ramp_concurrency)
+        t0 = time.monotonic()
+        deadline = t0 + args.duration
+        await asyncio.gather(*(run.user(i, deadline, ramp) for i in range(args.users)))
+        wall = time.monotonic() - t0
+    rows = run.stats.report(wall)
+    overlaps = run.overlaps()
+    print_table(rows, wall, overlaps)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"wall_seconds": wall, "users": args.users, "overlaps": overlaps, "endpoints": rows}, f, indent=2)
+    return 1 if overlaps else 0
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--base-url", default="http://127.0.0.1:8000")
+    p.add_argument("--users", type=int, default=100, help="виртуальных пользователей (одновременных)")
+    p.add_argument("--duration", type=float, default=30.0, help="секунд")
+    p.add_argument("--ramp-concurrency", type=int, default=50, help="одновременных регистраций/логинов на разгоне")
+    p.add_argument("--mix", default=DEFAULT_MIX)
+    p.add_argument("--zone-id", type=int, default=0)
+    p.add_argument("--hot-seats", type=int, default=5)
+    p.add_argument("--hot-hours", default="18-23", help="часы UTC, за которые борются брони")
+    p.add_argument("--date", default="", help="YYYY-MM-DD; по умолчанию случайный день в будущем")
+    p.add_argument("--think-ms", type=float, default=0.0, help="средняя пауза между действиями")
+    p.add_argument("--timeout", type=float, default=10.0)
+    p.add_argument("--admin-email", default="admin@example.com")
+    p.add_argument("--admin-password", default="adminpass123")
+    p.add_argument("--json", default="", help="сохранить результаты в файл")
+    args = p.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Накладные расходы middleware на запрос: BaseHTTPMiddleware vs чистый ASGI.
+
+Запуск (из backend/):  python -m bench.middleware_overhead [--n 20000]
+Приложение вызывается напрямую через ASGI (без сети и HTTP-клиента),
+поэтому разница между вариантами — это именно стоимость middleware.
+"""
+from __future__ import annotations
+import argparse, asyncio, time
+from fastapi import FastAPI
+from app.i18n.middleware import LocaleMiddleware, current_locale, pick_locale
+
+async def legacy_locale_middleware(request, call_next):
+    # прежняя реализация через app.middleware('http')
+    token = current_locale.set(pick_locale(request.headers.get("accept-language", "")))
+    try:
+        return await call_next(request)
+    finally:
+        current_locale.reset(token)
+
+def build(kind: str) -> FastAPI:
+    app = FastAPI()
+    if kind == "base_http":
+        app.middleware("http")(legacy_locale_middleware)
+    elif kind == "asgi":
+        app.add_middleware(LocaleMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"locale": current_locale.get()}
+    return app
+
+SCOPE = {
+    "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+    "method": "GET", "scheme": "http", "path": "/ping", "raw_path": b"/ping",
+    "root_path": "", "query_string": b"", "server": ("bench", 80), "client": ("bench", 1),
+    "headers": [(b"host", b"bench"), (b"accept-language", b"en-US,en;q=0.9")],
+}
+
+async def run(app: FastAPI, n: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):  # прогрев (сборка middleware stack, кэши роутинга)
+        await app(dict(SCOPE), receive, send)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        await app(dict(SCOPE), receive, send)
+    return (time.perf_counter() - t0) / n * 1e6
+
+async def main(n: int) -> None:
+    results = {kind: await run(build(kind), n) for kind in ("none", "base_http", "asgi")}
+    base = results["none"]
+    for kind, us in results.items():
+        print(f"{kind:10s} {us:8.1f} us/req   overhead {us - base:+7.1f} us")
+    print(f"saved per request: {results['base_http'] - results['asgi']:.1f} us")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    asyncio.run(main(ap.parse_args().n))
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""Повтор записанного трафика (CAPTURE_ENABLED, app/utils/capture.py) против локального API.
+
+Запуск (из backend/, API поднят, админ есть, зоны/места как в проде — их id не переназначаются):
+    python -m bench.replay /tmp/iu-capture/*.ndjson.gz --base-url http://127.0.0.1:8000 --speed 5
+
+Запросы уходят с теми же интервалами, что в записи, ускоренными в --speed раз.
+Каждый псевдоним пользователя из записи становится локальным пользователем replay-<псевдоним>@...
+(регистрируется и логинится до старта); пользователи, ходившие в /admin/*, — это --admin-email. Id, созданные по ходу
+(брони, удержания, лист ожидания, устройства, правила цен), сопоставляются: записанный id из
+ответа 201 -> id, который вернул локальный API; у POST /bookings/group — попарно по порядку
+bookings[].id (поле ids записи). Запрос с несопоставленным id в пути пропускается.
+Id в теле (BODY_IDS, например ids в /admin/bookings/bulk_status) сопоставляются так же:
+несопоставленные убираются из списка, а если не осталось ни одного — запрос пропускается.
+В конце — таблица как у bench.loadtest, плюс отставание отправки от расписания и пропуски.
+"""
+from __future__ import annotations
+import argparse, asyncio, glob, gzip, json, re, sys, time, uuid
+from collections import Counter
+import httpx
+from bench.loadtest import Stats, print_table, _pct
+
+# (метод, маршрут) создания -> имя path-параметра, в котором этот id приходит потом
+CREATES = {
+    ("POST", "/bookings"): "booking_id",
+    ("POST", "/bookings/group"): "booking_id",
+    ("POST", "/holds/{hold_id}/book"): "booking_id",
+    ("POST", "/holds"): "hold_id",
+    ("POST", "/waitlist"): "entry_id",
+    ("POST", "/devices/register"): "device_id",
+    ("POST", "/admin/pricing/rules"): "rule_id",
+}
+REMAPPED = set(CREATES.values())
+# (метод, маршрут) -> {поле JSON-тела: имя id из CREATES}; значение поля — id или список id
+BODY_IDS = {
+    ("POST", "/admin/bookings/bulk_status"): {"ids": "booking_id"},
+}
+PARAM_RE = re.compile(r"{(\w+)(?::\w+)?}")
+
+def load(patterns: list[str], only: str) -> list[dict]:
+    rx = re.compile(only) if only else None
+    out = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # недописанный хвост файла
+                    if rx is None or rx.search(rec["r"]):
+                        out.append(rec)
+    out.sort(key=lambda r: r["t"])
+    return out
+
+def _created_ids(data) -> list:
+    """Id созданных объектов: запись (id/ids) или ответ 201 (id или bookings[].id) — по порядку."""
+    if not isinstance(data, dict):
+        return []
+    if isinstance(data.get("ids"), list):
+        return [i for i in data["ids"] if i is not None]
+    if isinstance(data.get("bookings"), list):
+        return [b.get("id") for b in data["bookings"] if isinstance(b, dict) and b.get("id") is not None]
+    return [data["id"]] if data.get("id") is not None else []
+
+class Replay:
+    def __init__(self, args: argparse.Namespace, client: httpx.AsyncClient, records: list[dict]) -> None:
+        self.args = args
+        self.client = client
+        self.records = records
+        self.stats = Stats()
+        self.run_id = uuid.uuid4().hex[:6]
+        self.users: dict[str, tuple[str, dict[str, str]]] = {}  # псевдоним -> (email, заголовки)
+        self.pool: list[str] = []
+        self.admin: dict[str, str] = {}
+        # роли в записи нет: кто ходил в /admin/*, тот и остальные запросы шлёт от админа
+        self.admins = {r["u"] for r in records if r.get("u") and r["r"].startswith("/admin")}
+        self.ids: dict[tuple[str, str], asyncio.Future] = {}
+        self.skipped: Counter = Counter()
+        self.lag: list[float] = []
+        self.slots = asyncio.Semaphore(args.concurrency)
+        self.n_new = 0
+
+    async def login(self, email: str, password: str) -> dict[str, str] | None:
+        r = await self.client.post("/auth/login", data={"username": email, "password": password})
+        if r.status_code != 200:
+            return None
+        return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    async def setup(self) -> None:
+        a = self.args
+        admin = await self.login(a.admin_email, a.admin_password)
+        if admin is None:
+            sys.exit(f"admin login failed for {a.admin_email}")
+        self.admin = admin
+        pseudonyms = sorted({r["u"] for r in self.records if r.get("u")} - self.admins)
+        ramp = asyncio.Semaphore(a.ramp_concurrency)
+
+        async def make(u: str) -> None:
+            email = f"replay-{u}@example.com"
+            async with ramp:
+                await self.client.post("/auth/register", json={"email": email, "password": a.password})
+                headers = await self.login(email, a.password)
+            if headers is not None:
+                self.users[u] = (email, headers)
+        await asyncio.gather(*(make(u) for u in pseudonyms))
+        self.pool = [email for email, _ in self.users.values()]
+        print(f"{len(self.records)} requests, {len(self.users)}/{len(pseudonyms)} users ready")
+
+    def _key(self, param: str, value) -> tuple[str, str]:
+        return param, str(value)
+
+    def _future(self, key: tuple[str, str]) -> asyncio.Future:
+        fut = self.ids.get(key)
+        if fut is None:
+            fut = self.ids[key] = asyncio.get_running_loop().create_future()
+        return fut
+
+    async def _local(self, param: str, captured):
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._future(self._key(param, captured))), self.args.remap_wait)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _path(self, rec: dict) -> str | None:
+        params = dict(rec.get("p") or {})
+        for name in PARAM_RE.findall(rec["r"]):
+            if name in REMAPPED:
+                local = await self._local(name, params.get(name))
+                if local is None:
+                    return None
+                params[name] = local
+        return PARAM_RE.sub(lambda m: str(params.get(m.group(1), "")), rec["r"])
+
+    async def _body(self, rec: dict) -> tuple[bool, object]:
+        body = rec.get("b")
+        fields = BODY_IDS.get((rec["m"], rec["r"]))
+        if not fields or not isinstance(body, dict):
+            return True, body
+        body = dict(body)
+        for field, param in fields.items():
+            value = body.get(field)
+            if value is None:
+                continue
+            if isinstance(value, list):
+                local = [v for v in await asyncio.gather(*(self._local(param, v) for v in value)) if v is not None]
+                if value and not local:
+                    return False, None
+            else:
+                local = await self._local(param, value)
+                if local is None:
+                    return False, None
+            body[field] = local
+        return True, body
+
+    def _fill(self, value, email: str):
+        # метки анонимизации -> значения для локального повтора
+        if isinstance(value, dict):
+            return {k: self._fill(v, email) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._fill(v, email) for v in value]
+        if value == "<email>":
+            return email
+        if value == "<password>":
+            return self.args.password
+        if value == "<token>":
+            return f"replay-{uuid.uuid4().hex}"
+        if value == "<text>":
+            return "replay"
+        return value
+
+    def _identity(self, rec: dict) -> tuple[str, dict[str, str]]:
+        route = rec["r"]
+        if route.startswith("/admin") or rec.get("u") in self.admins:
+            return self.args.admin_email, self.admin
+        if route == "/auth/register":
+            self.n_new += 1
+            return f"replay-new-{self.run_id}-{self.n_new}@example.com", {}
+        if rec.get("u") in self.users:
+            return self.users[rec["u"]]
+        if route == "/auth/login" and self.pool:
+            return self.pool[int(rec["t"] * 1000) % len(self.pool)], {}
+        return self.args.admin_email if route == "/auth/login" else "", {}
+
+    async def send(self, rec: dict) -> None:
+        name = f"{rec['m']} {rec['r']}"
+        create = CREATES.get((rec["m"], rec["r"]))
+        # ожидание сопоставления — вне слота, иначе создатель может не получить слот
+        url = await self._path(rec)
+        ok, body = await self._body(rec) if url is not None else (False, None)
+        captured = _created_ids(rec) if create else []
+        if not ok:
+            self.skipped[name] += 1
+            for c in captured:
+                self._resolve(create, c, None)
+            return
+        async with self.slots:
+            email, headers = self._identity(rec)
+            kw: dict = {"headers": headers}
+            if rec.get("q"):
+                kw["params"] = self._fill(rec["q"], email)
+            if body is not None:
+                kw["json"] = self._fill(body, email)
+            elif rec.get("f"):
+                form = self._fill(rec["f"], email)
+                if rec["r"] == "/auth/login" and email == self.args.admin_email:
+                    form["password"] = self.args.admin_password
+                kw["data"] = form
+            t0 = time.perf_counter()
+            try:
+                r = await self.client.request(rec["m"], url, **kw)
+                status = r.status_code
+            except httpx.HTTPError:
+                r, status = None, 0
+            self.stats.add(name, status, time.perf_counter() - t0)
+        if captured:
+            local: list = []
+            if r is not None and status == 201:
+                try:
+                    local = _created_ids(r.json())
+                except ValueError:
+                    pass
+            for i, c in enumerate(captured):
+                self._resolve(create, c, local[i] if i < len(local) else None)
+
+    def _resolve(self, param: str, captured, local) -> None:
+        fut = self._future(self._key(param, captured))
+        if not fut.done():
+            fut.set_result(local)
+
+    async def run(self) -> float:
+        t_first = self.records[0]["t"]
+        start = time.monotonic()
+        tasks = []
+        for rec in self.records:
+            due = start + (rec["t"] - t_first) / self.args.speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.lag.append(-delay)
+            tasks.append(asyncio.create_task(self.send(rec)))
+        await asyncio.gather(*tasks)
+        return time.monotonic() - start
+
+def captured_latency(records: list[dict]) -> dict[str, dict]:
+    by: dict[str, list[float]] = {}
+    for r in records:
+        by.setdefault(f"{r['m']} {r['r']}", []).append(r.get("ms") or 0.0)
+    out = {}
+    for name, ms in by.items():
+        ms.sort()
+        out[name] = {"n": len(ms), "p50_ms": _pct(ms, 50), "p95_ms": _pct(ms, 95)}
+    return out
+
+async def main_async(args: argparse.Namespace) -> int:
+    records = load(args.files, args.only)
+    if args.limit:
+        records = records[: args.limit]
+    if not records:
+        sys.exit("no captured requests")
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        replay = Replay(args, client, records)
+        await replay.setup()
+        span = records[-1]["t"] - records[0]["t"]
+        print(f"captured span {span:.1f}s, replaying at {args.speed:g}x (~{span / args.speed:.1f}s)")
+        wall = await replay.run()
+    rows = replay.stats.report(max(wall, 1e-9))
+    print_table(rows, wall)
+    lag = sorted(replay.lag) or [0.0]
+    print(f"late dispatches: {len(replay.lag)}, p95 lag {_pct(lag, 95) * 1000:.1f}ms; "
+          f"skipped (unmapped ids): {sum(replay.skipped.values())}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "wall_seconds": wall, "speed": args.speed, "captured_span_seconds": span,
+                "endpoints": rows, "captured": captured_latency(records), "skipped": dict(replay.skipped),
+            }, f, indent=2)
+    return 0
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("files", nargs="+", help="файлы/маски capture-*.ndjson[.gz]")
+    p.add_argument("--base-url", default="http://127.0.0.1:8000")
+    p.add_argument("--speed", type=float, default=1.0, help="во сколько раз быстрее записи")
+    p.add_argument("--only", default="", help="regex по шаблону маршрута")
+    p.add_argument("--limit", type=int, default=0, help="первые N запросов")
+    p.add_argument("--concurrency", type=int, default=200, help="максимум одновременных запросов")
+    p.add_argument("--ramp-concurrency", type=int, default=20, help="одновременных регистраций/логинов на подготовке")
+    p.add_argument("--remap-wait", type=float, default=5.0, help="сколько ждать создания объекта для сопоставления id")
+    p.add_argument("--password", default="replaypass123", help="пароль локальных пользователей повтора")
+    p.add_argument("--timeout", type=float, default=10.0)
+    p.add_argument("--admin-email", default="admin@example.com")
+    p.add_argument("--admin-password", default="adminpass123")
+    p.add_argument("--json", default="", help="сохранить результаты в файл")
+    args = p.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+if __name__ == "__main__":
+    main()
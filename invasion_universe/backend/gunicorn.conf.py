@@ -0,0 +1,18 @@
+# Конфиг gunicorn для production: gunicorn -c gunicorn.conf.py app.main:app
+#
+# preload_app: app.main импортируется один раз в master, воркеры получают его через fork
+# (copy-on-write) — рестарт/масштабирование воркера не платит за импорт FastAPI/SQLAlchemy/роутов.
+# Всё, что держит сокеты (пулы SQLAlchemy, клиент Redis), после fork сбрасывается в post_fork.
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+def post_fork(server, worker):
+    from app.db import dispose_engines_after_fork
+    from app.utils.locks import reset_redis_after_fork
+    dispose_engines_after_fork()
+    reset_redis_after_fork()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+import os, sys, tempfile, uuid
+import pytest
+
+# SQLite-профиль без Redis: тесты не требуют внешних сервисов. Переменные — до импорта app.*
+_DB_DIR = tempfile.mkdtemp(prefix="iu-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ["REDIS_URL"] = ""
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ["FLIGHT_RECORDER_ENABLED"] = "false"
+os.environ["ADMISSION_ENABLED"] = "false"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from app.db import engine, SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.utils.security import hash_password  # noqa: E402
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    # Redis в памяти с настоящим Lua (fakeredis[lua]) вместо REDIS_URL="" на время теста
+    import fakeredis
+    import app.utils.locks as locks
+    r = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setenv("REDIS_URL", "redis://fake:6379/0")
+    monkeypatch.setattr(locks, "_redis", r)
+    return r
+
+@pytest.fixture(scope="session")
+def client():
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.add(User(email="admin@example.com", password_hash=hash_password("adminpass123"), role="admin"))
+        db.commit()
+    with TestClient(app) as c:
+        yield c
+
+def login(client: TestClient, email: str, password: str = "secret123") -> dict[str, str]:
+    if email != "admin@example.com":
+        client.post("/auth/register", json={"email": email, "password": password})
+    r = client.post("/auth/login", data={"username": email, "password": password})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+@pytest.fixture(scope="session")
+def admin(client) -> dict[str, str]:
+    return login(client, "admin@example.com", "adminpass123")
+
+@pytest.fixture
+def make_zone(client, admin):
+    def make(rows: str = "AB", cols: int = 4) -> tuple[int, dict[str, int]]:
+        code = uuid.uuid4().hex[:12]
+        zone = client.post("/zones", json={"name": code, "code": code}, headers=admin).json()
+        ids = {}
+        for r in rows:
+            for i in range(1, cols + 1):
+                s = client.post(f"/zones/{zone['id']}/seats", json={"label": f"{r}{i}"}, headers=admin).json()
+                ids[s["label"]] = s["id"]
+        return zone["id"], ids
+    return make
@@ -0,0 +1,68 @@
+from __future__ import annotations
+import asyncio
+from app.utils import admission
+from app.utils.admission import AdmissionMiddleware, Bulkhead
+
+def test_release_hands_slot_to_first_waiter():
+    async def run():
+        b = Bulkhead("t", limit=1, queue=5, timeout=2)
+        order: list[str] = []
+
+        async def worker(name: str) -> None:
+            assert await b.acquire()
+            order.append(name)
+
+        assert await b.acquire()
+        tasks = [asyncio.create_task(worker(n)) for n in "abc"]
+        await asyncio.sleep(0)
+        assert b.stats()["waiting"] == 3
+        for _ in range(3):
+            b.release()  # место уходит первому в очереди, active не падает
+            assert b.active == 1
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        assert order == ["a", "b", "c"]
+        b.release()
+        assert b.active == 0 and b.stats()["waiting"] == 0
+    asyncio.run(run())
+
+def test_saturated_bulkhead_answers_503_with_retry_after(monkeypatch):
+    async def run():
+        bulkhead = Bulkhead("writes", limit=1, queue=1, timeout=0.05)
+        monkeypatch.setattr(admission, "_bulkheads", {"writes": bulkhead})
+        gate = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await gate.wait()
+            await send({"type": "http.response.start", "status": 201, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        mw = AdmissionMiddleware(app)
+
+        async def call() -> tuple[int, dict]:
+            sent: list[dict] = []
+
+            async def send(message):
+                sent.append(message)
+
+            scope = {"type": "http", "method": "POST", "path": "/bookings", "headers": []}
+            await mw(scope, None, send)
+            return sent[0]["status"], dict(sent[0]["headers"])
+
+        first = asyncio.create_task(call())
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(call())
+        await asyncio.sleep(0)
+        # очередь полна — отказ сразу, без ожидания
+        status, headers = await call()
+        assert status == 503 and headers[b"retry-after"] == b"1"
+        # в очереди дольше таймаута — тоже 503
+        status, headers = await queued
+        assert status == 503 and headers[b"retry-after"] == b"1"
+        gate.set()
+        assert (await first)[0] == 201
+        assert bulkhead.stats() == {
+            "limit": 1, "queue": 1, "timeout_seconds": 0.05,
+            "active": 0, "waiting": 0, "rejected": 1, "timed_out": 1,
+        }
+    asyncio.run(run())
@@ -0,0 +1,35 @@
+from __future__ import annotations
+import uuid
+
+def test_v2_prices_are_shared_per_tier(client, admin):
+    code = uuid.uuid4().hex[:12]
+    zone_id = client.post("/zones", json={"name": code, "code": code}, headers=admin).json()["id"]
+    r = client.post(f"/admin/zones/{zone_id}/seed_seats", json={"rows": 5, "cols": 12, "vip_rows": ["A"]}, headers=admin)
+    assert r.status_code == 200, r.text
+    params = {"date_str": "2030-01-05", "zone_id": zone_id}
+    v1 = client.get("/bookings/availability", params=params)
+    v2 = client.get("/bookings/availability/v2", params=params)
+    assert v1.status_code == v2.status_code == 200
+
+    body = v2.json()
+    # цены — один вектор на ценовой ряд, в местах только маска и ключ ряда
+    assert len(body["price_tiers"]) == 2
+    assert all(set(i) == {"seat_id", "label", "free", "tier"} for i in body["items"])
+    slots = {i["seat_id"]: i["slots"] for i in v1.json()["items"]}
+    for item in body["items"]:
+        assert body["price_tiers"][item["tier"]] == [s["price_cents"] for s in slots[item["seat_id"]]]
+    assert len(v1.content) > 20 * len(v2.content)
+
+def test_bad_date_is_422(client):
+    for path in ("/bookings/availability", "/bookings/availability/v2"):
+        assert client.get(path, params={"date_str": "2030-13-01"}).status_code == 422
+
+def test_quote_echoes_start_time_in_utc(client, make_zone):
+    _, seats = make_zone("A", 1)
+    items = [{"seat_id": seats["A1"], "start_time": t, "hours": 1}
+             for t in ("2030-01-05T18:00:00", "2030-01-05T18:00:00Z", "2030-01-05T21:00:00+03:00")]
+    r = client.post("/bookings/quote", json={"items": items})
+    assert r.status_code == 200, r.text
+    out = r.json()["items"]
+    assert len({i["start_time"] for i in out}) == 1 and out[0]["start_time"].endswith(("Z", "+00:00"))
+    assert len({i["price_cents"] for i in out}) == 1
@@ -0,0 +1,21 @@
+from __future__ import annotations
+import uuid
+import app.services.notify as notify
+from conftest import login
+
+def test_create_and_cancel_push_through_app_loop(client, make_zone, monkeypatch):
+    sent = []
+
+    async def fake_push(tokens, title, body, data=None):
+        sent.append((tuple(tokens), data["type"]))
+    monkeypatch.setattr(notify, "push_to_tokens", fake_push)
+    _, seats = make_zone("A", 1)
+    user = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+    token = uuid.uuid4().hex
+    client.post("/devices/register", json={"platform": "ios", "token": token}, headers=user)
+
+    b = client.post("/bookings", json={"seat_id": seats["A1"], "start_time": "2031-06-06T10:00:00+00:00", "hours": 1}, headers=user)
+    assert b.status_code == 201, b.text
+    assert client.delete(f"/bookings/{b.json()['id']}", headers=user).status_code == 200
+    client.get("/")  # даём loop приложения выполнить фоновые задачи
+    assert sent == [((token,), "booking_created"), ((token,), "booking_cancelled")]
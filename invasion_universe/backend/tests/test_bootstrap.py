@@ -0,0 +1,23 @@
+from __future__ import annotations
+import uuid
+from sqlalchemy import update
+from app.db import SessionLocal
+from app.models.zone import Zone
+from app.services.catalog import invalidate_catalog
+from conftest import login
+
+def test_bootstrap_validates_params(client, admin, make_zone):
+    zone_id, _ = make_zone("A", 2)
+    user = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+    r = client.get("/bootstrap", params={"zone_id": zone_id, "date_str": "2030-01-05"}, headers=user)
+    assert r.status_code == 200, r.text
+    assert r.json()["availability"]["date"] == "2030-01-05"
+
+    assert client.get("/bootstrap", params={"date_str": "05.01.2030"}, headers=user).status_code == 422
+    r = client.get("/bootstrap", params={"zone_id": 10 ** 9}, headers=user)
+    assert r.status_code == 404 and r.json()["detail"]["code"] == "ZONE_NOT_FOUND"
+    with SessionLocal() as db:
+        db.execute(update(Zone).where(Zone.id == zone_id).values(is_active=False))
+        db.commit()
+    invalidate_catalog()
+    assert client.get("/bootstrap", params={"zone_id": zone_id}, headers=user).status_code == 404
@@ -0,0 +1,65 @@
+from __future__ import annotations
+import time, uuid
+import httpx
+from sqlalchemy import select
+import app.services.broadcast as broadcast
+import app.services.notify as notify
+from app.config import settings
+from app.db import SessionLocal
+from app.models.device import Device
+from bench import fcm_stub
+from conftest import login
+
+def _route_fcm_to_stub(monkeypatch):
+    # httpx.AsyncClient рассылки ходит в bench/fcm_stub.py в памяти, без сети
+    class StubClient(httpx.AsyncClient):
+        def __init__(self, **kw):
+            super().__init__(transport=httpx.ASGITransport(app=fcm_stub.app), **kw)
+    monkeypatch.setattr(httpx, "AsyncClient", StubClient)
+    monkeypatch.setattr(notify, "FCM_URL", "http://fcm/fcm/send")
+    monkeypatch.setenv("FCM_SERVER_KEY", "stub")
+    monkeypatch.setattr(fcm_stub, "LATENCY", 0)
+    monkeypatch.setattr(fcm_stub, "stats", {"requests": 0, "tokens": 0, "max_in_flight": 0})
+
+def test_broadcast_fans_out_in_chunks_and_prunes_invalid_tokens(client, admin, make_zone, fake_redis, monkeypatch):
+    _route_fcm_to_stub(monkeypatch)
+    monkeypatch.setattr(settings, "BROADCAST_CHUNK_SIZE", 3)
+    monkeypatch.setattr(settings, "BROADCAST_BATCH_SIZE", 2)
+    chunks = []
+    audience_chunk = broadcast._audience_chunk
+    monkeypatch.setattr(broadcast, "_audience_chunk", lambda after_id, limit, **kw: (
+        chunks.append(after_id), audience_chunk(after_id, limit, **kw))[1])
+
+    zone_id, seats = make_zone("A", 4)
+    tokens = {"valid": [], "invalid": []}
+    for i, seat_id in enumerate(seats.values()):
+        user = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+        r = client.post("/bookings", json={"seat_id": seat_id, "start_time": "2031-05-05T10:00:00+00:00", "hours": 1}, headers=user)
+        assert r.status_code == 201, r.text
+        for kind in ("valid", "invalid") if i % 2 else ("valid",):
+            token = f"{kind}-{uuid.uuid4().hex}"
+            client.post("/devices/register", json={"platform": "ios", "token": token}, headers=user)
+            tokens[kind].append(token)
+    # устройство пользователя без брони в зоне в аудиторию не попадает
+    outsider = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+    client.post("/devices/register", json={"platform": "ios", "token": f"valid-{uuid.uuid4().hex}"}, headers=outsider)
+
+    r = client.post("/admin/broadcasts", json={"title": "t", "body": "b", "zone_id": zone_id}, headers=admin)
+    assert r.status_code == 202
+    campaign = r.json()["id"]
+    for _ in range(200):
+        progress = client.get(f"/admin/broadcasts/{campaign}", headers=admin).json()
+        if progress["status"] in ("done", "failed"):
+            break
+        time.sleep(0.02)
+
+    total = len(tokens["valid"]) + len(tokens["invalid"])  # 6 устройств: чанки 3+3, пачки 2+1 на чанк
+    assert progress["status"] == "done"
+    assert (progress["total"], progress["sent"], progress["failed"], progress["invalid"]) == (
+        total, len(tokens["valid"]), len(tokens["invalid"]), len(tokens["invalid"]))
+    assert fake_redis.hget(f"broadcast:{campaign}", "sent") == str(len(tokens["valid"]))
+    assert len(chunks) == 3 and chunks[0] == 0 and chunks[1] < chunks[2]  # keyset: последний — пустой
+    assert fcm_stub.stats == {"requests": 4, "tokens": total, "max_in_flight": fcm_stub.stats["max_in_flight"]}
+    with SessionLocal() as db:
+        left = set(db.scalars(select(Device.token).where(Device.token.in_(tokens["valid"] + tokens["invalid"]))))
+    assert left == set(tokens["valid"])
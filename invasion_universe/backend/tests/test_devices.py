@@ -0,0 +1,14 @@
+from __future__ import annotations
+import uuid
+from app.services.devices import MAX_DEVICES_PER_USER
+from conftest import login
+
+def test_device_limit_has_its_own_error(client):
+    user = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+    for _ in range(MAX_DEVICES_PER_USER):
+        r = client.post("/devices/register", json={"platform": "ios", "token": uuid.uuid4().hex}, headers=user)
+        assert r.status_code in (200, 201), r.text
+    r = client.post("/devices/register", json={"platform": "ios", "token": uuid.uuid4().hex},
+                    headers={**user, "accept-language": "en"})
+    assert r.status_code == 429
+    assert r.json()["detail"] == {"code": "TOO_MANY_DEVICES", "message": f"Too many devices registered (limit {MAX_DEVICES_PER_USER})"}
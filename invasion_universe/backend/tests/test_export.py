@@ -0,0 +1,17 @@
+from __future__ import annotations
+import sys
+import pytest
+from app.services import export
+
+def test_missing_pyarrow_raises_not_exits(monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    monkeypatch.setitem(sys.modules, "pyarrow.parquet", None)
+    with pytest.raises(RuntimeError, match="requirements-export.txt"):
+        export.export_bookings(str(tmp_path))
+
+def test_cli_turns_error_into_exit_code(monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    monkeypatch.setattr(sys, "argv", ["export", "--out", str(tmp_path)])
+    with pytest.raises(SystemExit) as e:
+        export.main()
+    assert "pyarrow" in str(e.value.code)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from app.utils.flight_recorder import Trace, current_trace, instrument_engine
+
+def test_failed_statement_does_not_skew_next_timing():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    t = Trace({"method": "GET", "path": "/x"})
+    token = current_trace.set(t)
+    try:
+        with engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT * FROM no_such_table"))
+            conn.execute(text("SELECT 1"))
+            assert "fr_t0" not in conn.info
+    finally:
+        current_trace.reset(token)
+    # записан только удачный запрос, и его старт — его собственный, а не упавшего
+    assert t.sql_count == 1
+    assert t.sql[0][2] == "SELECT 1"
+    assert 0 <= t.sql[0][1] <= t.sql_total
+    engine.dispose()
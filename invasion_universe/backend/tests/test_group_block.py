@@ -0,0 +1,54 @@
+from __future__ import annotations
+from app.services.booking import find_group_block
+from app.services.catalog import SeatEntry, parse_label, row_index
+
+def _rows(layout: dict[str, int], vip: str = "") -> tuple[list, dict[str, int]]:
+    # {"A": 6, "B": 4} -> строки как у Catalog.zone_rows и {метка: id}
+    rows, ids, n = [], {}, 0
+    for row, cols in sorted(layout.items(), key=lambda x: row_index(x[0])):
+        seats = []
+        for col in range(1, cols + 1):
+            n += 1
+            label = f"{row}{col}"
+            seats.append((col, SeatEntry(n, 1, label, "vip" if row in vip else "standard", 100, True)))
+            ids[label] = n
+        rows.append((row, seats))
+    return rows, ids
+
+def _labels(found) -> tuple[list[str], bool]:
+    seats, same_row = found
+    return [s.label for s in sorted(seats, key=lambda s: (row_index(parse_label(s.label)[0]), parse_label(s.label)[1]))], same_row
+
+def test_row_index_orders_by_length_then_letters():
+    assert [row_index(r) for r in ("A", "B", "Z", "AA", "AB")] == [0, 1, 25, 26, 27]
+    assert sorted(["AA", "B", "Z", "A"], key=row_index) == ["A", "B", "Z", "AA"]
+
+def test_best_fit_run_in_one_row():
+    rows, ids = _rows({"A": 8, "B": 8})
+    # A: свободен отрезок из 6, B: отрезок из 3 — тройка садится в B, шестёрка в A не дробится
+    busy = {ids["A7"], ids["B1"], ids["B2"], ids["B3"], ids["B4"], ids["B8"]}
+    assert _labels(find_group_block(rows, busy, 3)) == (["B5", "B6", "B7"], True)
+
+def test_split_across_adjacent_rows():
+    rows, ids = _rows({"A": 4, "B": 4})
+    busy = {ids["A1"], ids["A4"], ids["B4"]}
+    assert _labels(find_group_block(rows, busy, 4)) == (["A2", "A3", "B2", "B3"], False)
+
+def test_rows_without_seats_between_are_not_adjacent():
+    # ряда B нет (проход) — A и C не соседние
+    rows, ids = _rows({"A": 3, "C": 3})
+    busy = {ids["A3"], ids["C3"]}
+    assert find_group_block(rows, busy, 4) is None
+    rows, ids = _rows({"Z": 3, "AA": 3})
+    busy = {ids["Z3"], ids["AA3"]}
+    assert _labels(find_group_block(rows, busy, 4)) == (["Z1", "Z2", "AA1", "AA2"], False)
+
+def test_seat_type_filter():
+    rows, ids = _rows({"A": 4, "B": 4}, vip="B")
+    assert _labels(find_group_block(rows, set(), 3, "vip")) == (["B1", "B2", "B3"], True)
+    assert find_group_block(rows, set(), 5, "vip") is None
+
+def test_busy_seats_are_skipped():
+    rows, ids = _rows({"A": 5})
+    assert find_group_block(rows, {ids["A3"]}, 3) is None
+    assert _labels(find_group_block(rows, {ids["A1"], ids["A2"]}, 3)) == (["A3", "A4", "A5"], True)
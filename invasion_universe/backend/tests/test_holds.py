@@ -0,0 +1,49 @@
+from __future__ import annotations
+import uuid
+from app.config import settings
+from conftest import login
+
+def _hold(client, user, seat_id, start_hour, hours=2, day="2031-07-07"):
+    return client.post("/holds", json={"seat_id": seat_id, "start_time": f"{day}T{start_hour:02d}:00:00+00:00", "hours": hours}, headers=user)
+
+def _code(r):
+    return r.json()["detail"]["code"]
+
+def test_per_user_hold_limit(client, make_zone, fake_redis):
+    _, seats = make_zone("A", settings.HOLD_MAX_PER_USER + 1)
+    user = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+    for seat_id in list(seats.values())[:-1]:
+        assert _hold(client, user, seat_id, 10).status_code == 201
+    r = _hold(client, user, list(seats.values())[-1], 10)
+    assert r.status_code == 429 and _code(r) == "HOLD_LIMIT"
+    assert len(client.get("/holds/me", headers=user).json()) == settings.HOLD_MAX_PER_USER
+
+def test_overlapping_hold_and_booking_conflict(client, make_zone, fake_redis):
+    _, seats = make_zone("A", 2)
+    a = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+    b = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+    assert _hold(client, a, seats["A1"], 10).status_code == 201  # 10–12
+    r = _hold(client, b, seats["A1"], 11)
+    assert r.status_code == 409 and _code(r) == "SLOT_CONFLICT"
+    assert _hold(client, b, seats["A1"], 12).status_code == 201  # стык — не пересечение
+    r = client.post("/bookings", json={"seat_id": seats["A1"], "start_time": "2031-07-07T11:00:00+00:00", "hours": 1}, headers=b)
+    assert r.status_code == 409 and _code(r) == "SLOT_CONFLICT"
+
+    # удержание поверх существующей брони
+    assert client.post("/bookings", json={"seat_id": seats["A2"], "start_time": "2031-07-07T10:00:00+00:00", "hours": 2}, headers=a).status_code == 201
+    r = _hold(client, b, seats["A2"], 11)
+    assert r.status_code == 409 and _code(r) == "SLOT_CONFLICT"
+
+def test_hold_converts_to_booking(client, make_zone, fake_redis):
+    _, seats = make_zone("A", 1)
+    user = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+    other = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+    hold = _hold(client, user, seats["A1"], 10).json()
+    assert client.post(f"/holds/{hold['id']}/book", headers=other).status_code == 404  # чужое удержание
+
+    r = client.post(f"/holds/{hold['id']}/book", headers=user)
+    assert r.status_code == 201, r.text
+    assert (r.json()["seat_id"], r.json()["start_time"][:19]) == (seats["A1"], "2031-07-07T10:00:00")
+    assert client.get("/holds/me", headers=user).json() == []
+    assert fake_redis.zcard(f"holds:seat:{seats['A1']}") == 0
+    assert _hold(client, other, seats["A1"], 10).status_code == 409  # теперь слот занят бронью
@@ -0,0 +1,47 @@
+from __future__ import annotations
+import json, uuid
+import pytest
+from fastapi import HTTPException
+from app.config import settings
+from app.utils.idempotency import REPLAY_HEADER, fingerprint, idem_key, idempotent
+from conftest import login
+
+def test_replay_returns_stored_response(client, make_zone, fake_redis):
+    _, seats = make_zone("A", 1)
+    user = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+    body = {"seat_id": seats["A1"], "start_time": "2031-03-03T10:00:00+00:00", "hours": 1}
+    headers = {**user, "Idempotency-Key": uuid.uuid4().hex}
+    first = client.post("/bookings", json=body, headers=headers)
+    second = client.post("/bookings", json=body, headers=headers)
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json() and second.headers[REPLAY_HEADER] == "true"
+    assert REPLAY_HEADER not in first.headers
+    assert len([b for b in client.get("/bookings/me", headers=user).json() if b["seat_id"] == seats["A1"]]) == 1
+
+def test_duplicate_gets_409_while_first_is_pending(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+    payload = ["POST /x", 1]
+    fake_redis.set(idem_key(1, "k"), json.dumps({"state": "pending", "fp": fingerprint(payload), "owner": "other"}))
+    with pytest.raises(HTTPException) as e:
+        idempotent(1, "k", payload, 201, lambda: pytest.fail("must not run"))
+    assert e.value.status_code == 409
+
+def test_key_is_released_after_failed_attempt(fake_redis):
+    def boom():
+        raise HTTPException(409)
+    with pytest.raises(HTTPException):
+        idempotent(1, "retry", ["POST /x"], 201, boom)
+    assert fake_redis.get(idem_key(1, "retry")) is None
+    assert idempotent(1, "retry", ["POST /x"], 201, lambda: {"ok": True}) == {"ok": True}
+    assert json.loads(fake_redis.get(idem_key(1, "retry")))["state"] == "done"
+
+def test_expired_claim_taken_by_another_request_is_not_touched(fake_redis):
+    # наш pending истёк, ключ захватил повтор — наш результат не должен его затереть
+    rkey = idem_key(1, "stolen")
+    foreign = json.dumps({"state": "pending", "fp": fingerprint(["POST /x"]), "owner": "other"})
+
+    def slow():
+        fake_redis.set(rkey, foreign)
+        return {"ok": True}
+    assert idempotent(1, "stolen", ["POST /x"], 201, slow) == {"ok": True}
+    assert fake_redis.get(rkey) == foreign
@@ -0,0 +1,33 @@
+from __future__ import annotations
+import pytest
+from starlette.requests import Request
+import app.api.deps as deps
+from app.utils.replica import mark_recent_write
+from app.utils.security import create_access_token
+
+def _request(user_id: int | None) -> Request:
+    headers = [(b"authorization", f"Bearer {create_access_token(str(user_id))}".encode())] if user_id else []
+    return Request({"type": "http", "headers": headers})
+
+def test_no_replica_skips_redis(monkeypatch):
+    monkeypatch.setattr(deps, "recently_wrote", lambda uid: pytest.fail("Redis must not be asked"))
+    assert deps.wrote_recently(_request(7)) is False
+    assert deps.shared_reads(False) is True
+
+def test_redis_outage_pins_to_primary_but_keeps_coalescing(monkeypatch):
+    monkeypatch.setattr(deps, "replica_engine", object())
+    monkeypatch.setenv("REDIS_URL", "")  # get_redis() падает — как недоступный Redis
+    pinned = deps.wrote_recently(_request(7))
+    assert pinned is None
+    assert deps.shared_reads(pinned) is True
+    monkeypatch.setattr(deps, "replica_ok", lambda: True)
+    gen = deps.get_read_db(pinned)
+    assert next(gen).bind is deps.SessionLocal.kw["bind"]
+    gen.close()
+
+def test_recent_writer_is_pinned(monkeypatch, fake_redis):
+    monkeypatch.setattr(deps, "replica_engine", object())
+    mark_recent_write(7)
+    assert deps.wrote_recently(_request(7)) is True and deps.shared_reads(True) is False
+    assert deps.wrote_recently(_request(8)) is False
+    assert deps.wrote_recently(_request(None)) is False
@@ -0,0 +1,31 @@
+from __future__ import annotations
+import argparse, asyncio
+import httpx
+from bench.replay import Replay
+
+def test_group_booking_ids_remapped_in_order():
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(f"{request.method} {request.url.path}")
+        if request.url.path == "/bookings/group":
+            return httpx.Response(201, json={"same_row": True, "bookings": [{"id": 501}, {"id": 502}]})
+        return httpx.Response(200, json={})
+
+    records = [
+        {"t": 0.0, "m": "POST", "r": "/bookings/group", "b": {"zone_id": 1, "size": 2}, "u": None,
+         "s": 201, "id": None, "ids": [11, 12]},
+        {"t": 0.1, "m": "DELETE", "r": "/bookings/{booking_id}", "p": {"booking_id": 12}, "u": None, "s": 200},
+        {"t": 0.2, "m": "DELETE", "r": "/bookings/{booking_id}", "p": {"booking_id": 11}, "u": None, "s": 200},
+    ]
+    args = argparse.Namespace(concurrency=4, remap_wait=1.0, speed=100.0, admin_email="a@example.com",
+                              admin_password="x", password="x")
+
+    async def run() -> Replay:
+        async with httpx.AsyncClient(base_url="http://test", transport=httpx.MockTransport(handler)) as client:
+            replay = Replay(args, client, records)
+            await replay.run()
+            return replay
+    replay = asyncio.run(run())
+    assert not replay.skipped
+    assert seen == ["POST /bookings/group", "DELETE /bookings/502", "DELETE /bookings/501"]
@@ -0,0 +1,19 @@
+from __future__ import annotations
+import threading
+from app.utils.sqlite_profile import WriteQueue
+
+def test_write_queue_is_owned_by_session_not_thread():
+    q, first, second = WriteQueue(), object(), object()
+    assert q.acquire(first, 1)
+    assert q.acquire(first, 1)  # повторный вход той же сессии
+    # другая сессия в том же потоке ждёт, а не входит повторно
+    assert not q.acquire(second, 0.05)
+
+    # освобождение из другого потока (закрытие сессии в пуле потоков) пускает следующего
+    t = threading.Thread(target=q.release, args=(first,))
+    t.start(); t.join()
+    assert q.acquire(second, 1)
+    q.release(first)  # чужое освобождение не снимает владельца
+    assert not q.acquire(object(), 0.05)
+    q.release(second)
+    assert q.acquire(object(), 1)
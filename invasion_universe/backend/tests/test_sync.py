@@ -0,0 +1,82 @@
+from __future__ import annotations
+import threading, uuid
+from datetime import datetime, timedelta, timezone
+from conftest import login
+
+def _sync_all(client, headers, since: int) -> tuple[int, list[dict]]:
+    bookings = []
+    while True:
+        r = client.get("/sync", params={"since": since}, headers=headers)
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert body["cursor"] >= since
+        since = body["cursor"]
+        bookings += body["bookings"]
+        if not body["has_more"]:
+            return since, bookings
+
+def _start(days: int, hour: int = 10) -> str:
+    d = datetime.now(timezone.utc).replace(hour=hour, minute=0, second=0, microsecond=0) + timedelta(days=days)
+    return d.isoformat()
+
+def test_repeated_updates_of_max_row_are_synced(client, admin, make_zone):
+    _, seats = make_zone("A", 2)
+    user = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+    b = client.post("/bookings", json={"seat_id": seats["A1"], "start_time": _start(3), "hours": 1}, headers=user).json()
+    cursor, _ = _sync_all(client, user, 0)
+
+    # бронь — последняя изменённая строка; каждое обновление должно получить новый номер
+    for status, action in (("paid", "mark_paid"), ("completed", "complete")):
+        assert client.post(f"/admin/bookings/{b['id']}/{action}", headers=admin).status_code == 200
+        new_cursor, changed = _sync_all(client, user, cursor)
+        assert new_cursor > cursor
+        assert [(x["id"], x["status"]) for x in changed] == [(b["id"], status)]
+        cursor = new_cursor
+
+def test_cursor_is_monotonic_under_concurrent_writes(client, admin, make_zone):
+    _, seats = make_zone("AB", 4)
+    user = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+    stop = threading.Event()
+    cursors: list[int] = []
+    seen: dict[int, str] = {}
+    errors: list[str] = []
+
+    def reader() -> None:
+        since = 0
+        while not stop.is_set():
+            since, changed = _sync_all(client, user, since)
+            cursors.append(since)
+            for x in changed:
+                seen[x["id"]] = x["status"]
+
+    def writer(labels: list[str], day: int) -> None:
+        for i, label in enumerate(labels):
+            r = client.post("/bookings", json={"seat_id": seats[label], "start_time": _start(day, 8 + i), "hours": 1},
+                            headers=user)
+            if r.status_code != 201:
+                errors.append(r.text)
+                continue
+            if i % 2:
+                client.post(f"/admin/bookings/{r.json()['id']}/mark_paid", headers=admin)
+            else:
+                client.delete(f"/bookings/{r.json()['id']}", headers=user)
+
+    t = threading.Thread(target=reader)
+    t.start()
+    writers = [threading.Thread(target=writer, args=(list(seats), day)) for day in range(5, 9)]
+    for w in writers:
+        w.start()
+    for w in writers:
+        w.join()
+    stop.set()
+    t.join()
+
+    assert not errors
+    assert cursors == sorted(cursors)
+    # догоняющий запрос с последнего курсора: итог совпадает с текущим состоянием броней
+    _, changed = _sync_all(client, user, cursors[-1])
+    for x in changed:
+        seen[x["id"]] = x["status"]
+    final = {x["id"]: x["status"] for x in client.get("/bookings/me", headers=user).json()}
+    assert seen == final
+    assert sorted(set(final.values())) == ["cancelled", "paid"]
@@ -0,0 +1,41 @@
+from __future__ import annotations
+import uuid
+from datetime import datetime, timedelta, timezone
+import app.services.booking as booking_service
+import app.services.notify as notify
+from conftest import login
+
+def _start(days: int) -> str:
+    d = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0) + timedelta(days=days)
+    return d.isoformat()
+
+def _setup(client, make_zone, auto_book: bool):
+    _, seats = make_zone("A", 1)
+    holder = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+    waiter = login(client, f"{uuid.uuid4().hex[:8]}@example.com")
+    slot = {"seat_id": seats["A1"], "start_time": _start(4), "hours": 2}
+    b = client.post("/bookings", json=slot, headers=holder).json()
+    client.post("/devices/register", json={"platform": "ios", "token": uuid.uuid4().hex}, headers=waiter)
+    e = client.post("/waitlist", json={**slot, "auto_book": auto_book}, headers=waiter).json()
+    return holder, waiter, b, e
+
+def test_failed_auto_book_returns_entry_to_waiting(client, make_zone, monkeypatch):
+    holder, waiter, b, e = _setup(client, make_zone, auto_book=True)
+
+    def broken(*a, **kw):
+        raise RuntimeError("db is gone")
+    monkeypatch.setattr(booking_service, "create_booking", broken)
+    assert client.delete(f"/bookings/{b['id']}", headers=holder).status_code == 200
+    [entry] = [x for x in client.get("/waitlist/me", headers=waiter).json() if x["id"] == e["id"]]
+    assert entry["status"] == "waiting" and entry["booking_id"] is None
+
+def test_notification_goes_through_app_loop(client, make_zone, monkeypatch):
+    sent = []
+
+    async def fake_push(tokens, title, body, data=None):
+        sent.append((len(tokens), data["type"]))
+    monkeypatch.setattr(notify, "push_to_tokens", fake_push)
+    holder, waiter, b, e = _setup(client, make_zone, auto_book=False)
+    assert client.delete(f"/bookings/{b['id']}", headers=holder).status_code == 200
+    client.get("/")  # даём loop приложения выполнить фоновую задачу
+    assert sent == [(1, "waitlist_free")]
@@ -213,6 +213,35 @@ class Api {
     return ZoneLayout.fromJson(data);
   }
 
+  // Delta sync: локальный снимок зон, мест и своих броней; с сервера — только изменения после cursor
+  Future<Map<String, dynamic>> syncDelta() async {
+    const key = 'sync_v1';
+    final snap = await Cache.getJson(key) ??
+        {'cursor': 0, 'zones': <String, dynamic>{}, 'seats': <String, dynamic>{}, 'bookings': <String, dynamic>{}};
+    if (!await _hasNetwork()) return snap;
+    var hasMore = true;
+    while (hasMore) {
+      final data = await _request('GET', '/sync?since=${snap['cursor']}') as Map<String, dynamic>;
+      for (final kind in ['zones', 'seats', 'bookings']) {
+        final m = snap[kind] as Map<String, dynamic>;
+        for (final e in data[kind] as List) {
+          m['${e['id']}'] = e;
+        }
+      }
+      final deleted = data['deleted'] as Map<String, dynamic>;
+      for (final kind in ['zones', 'seats']) {
+        final m = snap[kind] as Map<String, dynamic>;
+        for (final id in deleted[kind] as List) {
+          m.remove('$id');
+        }
+      }
+      snap['cursor'] = data['cursor'];
+      hasMore = data['has_more'] == true;
+    }
+    await Cache.setJson(key, snap, ttl: const Duration(days: 30));
+    return snap;
+  }
+
   // Bookings
   Future<Booking> createBooking(int seatId, DateTime startTime, int hours) async {
     final data = await _request('POST', '/bookings', body: {
@@ -245,9 +274,19 @@ class Api {
     if (zoneId != null) params['zone_id'] = zoneId.toString();
     if (seatId != null) params['seat_id'] = seatId.toString();
 
-    final data = await _request('GET', '/bookings/availability', queryParams: params);
+    final data = await _request('GET', '/bookings/availability/v2', queryParams: params);
     final response = data as Map<String, dynamic>;
-    return (response['items'] as List).map((s) => SeatAvailability.fromJson(s)).toList();
+    final dayStart = DateTime.parse(response['day_start'] as String).toUtc();
+    final slots = (response['slots'] as num?)?.toInt() ?? 24;
+    final slotMinutes = (response['slot_minutes'] as num?)?.toInt() ?? 60;
+    return (response['items'] as List)
+        .map((s) => SeatAvailability.fromCompact(
+              s as Map<String, dynamic>,
+              dayStart: dayStart,
+              slots: slots,
+              slotMinutes: slotMinutes,
+            ))
+        .toList();
   }
 
   // Admin methods
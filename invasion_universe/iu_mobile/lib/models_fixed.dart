@@ -165,6 +165,26 @@ class SeatAvailability {
           .toList(),
     );
   }
+
+  // v2 (/bookings/availability/v2): вместо списка слотов — битовая маска
+  // свободных часов, бит i = слот i от dayStart свободен.
+  factory SeatAvailability.fromCompact(
+    Map<String, dynamic> json, {
+    required DateTime dayStart,
+    int slots = 24,
+    int slotMinutes = 60,
+  }) {
+    final free = (json['free'] as num?)?.toInt() ?? 0;
+    final step = Duration(minutes: slotMinutes);
+    return SeatAvailability(
+      seatId: json['seat_id'] ?? 0,
+      label: json['label'] ?? '',
+      slots: List.generate(slots, (i) {
+        final start = dayStart.add(step * i);
+        return TimeSlot(startTime: start, endTime: start.add(step), isFree: (free >> i) & 1 == 1);
+      }),
+    );
+  }
 }
 
 class Booking {